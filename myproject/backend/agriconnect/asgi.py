@@ -0,0 +1,21 @@
+"""
+ASGI config for AgriConnect project.
+
+Serves the dashboards from their async variants (core.async_views), which
+run independent queries concurrently. Needs an ASGI server, e.g.
+``gunicorn agriconnect.asgi:application -k uvicorn.workers.UvicornWorker``.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'agriconnect.settings')
+os.environ.setdefault('ASYNC_DASHBOARDS', 'True')
+
+application = get_asgi_application()
+
+# Warm per-process caches before the first request arrives
+from core import warmup  # noqa: E402
+
+warmup.run()
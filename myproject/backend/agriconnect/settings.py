@@ -3,8 +3,10 @@ Django settings for AgriConnect project.
 """
 
 import os
+from datetime import timedelta
 from pathlib import Path
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -37,24 +39,34 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.instrumentation.PerformanceMiddleware',  # Server-Timing + per-view query budgets
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # For serving static files in production
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.db.ReplicaRoutingMiddleware',  # read-replica routing and read-your-writes pinning
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'agriconnect.urls'
 
+# Templates are compiled once per worker and kept by the cached loader;
+# core.warmup compiles everything in frontend/templates at worker boot.
+# runserver's autoreloader clears the cache when a template is edited.
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.instrumentation.TimedDjangoTemplates',  # DjangoTemplates + render timing
         'DIRS': [PROJECT_ROOT / 'frontend' / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -67,14 +79,49 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'agriconnect.wsgi.application'
 
-# Database - Use SQLite for simplicity (works everywhere)
+# Database - DATABASE_URL (Postgres on Render), else a local SQLite file.
+# Connections are reused for DB_CONN_MAX_AGE seconds (0 closes them after
+# every request) and checked before each request that reuses one.
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': dj_database_url.parse(
+        os.environ.get('DATABASE_URL') or f"sqlite:///{BASE_DIR / 'db.sqlite3'}",
+        conn_max_age=int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+        conn_health_checks=True,
+    ),
 }
 
+# Read replicas: comma-separated database URLs, served to the views marked
+# with core.db.replica_reads. A user who writes reads from the primary for
+# REPLICA_STICKY_SECONDS afterwards. That pin lives in the cache, so replicas
+# need REDIS_URL: with per-process caches a write in one worker would not pin
+# the user's next request if another worker answered it.
+DATABASE_REPLICAS = []
+for number, url in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_URLS', '').split(',')), 1):
+    alias = f'replica{number}'
+    DATABASES[alias] = dj_database_url.parse(
+        url.strip(),
+        conn_max_age=int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+        conn_health_checks=True,
+        test_options={'MIRROR': 'default'},
+    )
+    DATABASE_REPLICAS.append(alias)
+if DATABASE_REPLICAS and not os.environ.get('REDIS_URL'):
+    raise ImproperlyConfigured('DATABASE_REPLICA_URLS needs REDIS_URL: read-your-writes pins must be shared by all workers.')
+DATABASE_ROUTERS = ['core.db.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+
+# Pragmas run on every new SQLite connection (core.db). WAL lets readers
+# carry on while an order is written; synchronous=NORMAL is durable in WAL
+# mode except for the last commits on power loss. SQLITE_TUNING=false keeps
+# SQLite's defaults.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'cache_size': -1024 * int(os.environ.get('SQLITE_CACHE_MB', 64)),  # negative: KiB
+    'mmap_size': 1024 * 1024 * int(os.environ.get('SQLITE_MMAP_MB', 256)),
+    'temp_store': 'memory',
+} if os.environ.get('SQLITE_TUNING', 'True').lower() in ('true', '1', 'yes') else {}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -111,13 +158,14 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [PROJECT_ROOT / 'frontend' / 'static']
 STATIC_ROOT = PROJECT_ROOT / 'staticfiles'
 
-# WhiteNoise for static files in production
+# WhiteNoise for static files in production: collectstatic minifies the
+# project's CSS/JS, fingerprints everything and precompresses it (core.staticfiles)
 STORAGES = {
     "default": {
         "BACKEND": "django.core.files.storage.FileSystemStorage",
     },
     "staticfiles": {
-        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
+        "BACKEND": "core.staticfiles.MinifiedManifestStaticFilesStorage",
     },
 }
 
@@ -126,6 +174,84 @@ LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/dashboard/'
 LOGOUT_REDIRECT_URL = '/'
 
+# How long a supply request holds stock before the sweeper releases it
+STOCK_HOLD_TTL = timedelta(minutes=int(os.environ.get('STOCK_HOLD_TTL_MINUTES', 24 * 60)))
+
+# Days after its availability date that a listing expires (expire_produce)
+PRODUCE_EXPIRY_DAYS = int(os.environ.get('PRODUCE_EXPIRY_DAYS', 14))
+
+# Share of requests (0-1) timed by core.instrumentation.PerformanceMiddleware
+PERFORMANCE_SAMPLE_RATE = float(os.environ.get('PERFORMANCE_SAMPLE_RATE') or ('1' if DEBUG else '0'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.performance': {
+            'handlers': ['console'],
+            'level': os.environ.get('PERFORMANCE_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+# Shared cache for rendered catalog pages (core.catalog_cache) and other
+# cross-request data. Set REDIS_URL in production so all workers share it.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+
+# Seconds the per-request user is served from the cache (core.backends); 0
+# loads it from the database every request. Needs a cache all workers share
+# (REDIS_URL): saving a user only forgets the copy in the saving worker, so
+# with per-process caches a deactivated account or a changed password would
+# keep other workers' sessions working until the entry expired.
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get('AUTH_USER_CACHE_TIMEOUT') or (300 if os.environ.get('REDIS_URL') else 0))
+if AUTH_USER_CACHE_TIMEOUT and not os.environ.get('REDIS_URL'):
+    raise ImproperlyConfigured('AUTH_USER_CACHE_TIMEOUT needs REDIS_URL: the user cache must be shared by all workers.')
+
+# check_email AJAX calls allowed per client IP: (requests, window in seconds)
+CHECK_EMAIL_RATE = (int(os.environ.get('CHECK_EMAIL_RATE_LIMIT', 30)), 60)
+
+# Set when a proxy in front of the app appends the client IP to X-Forwarded-For
+TRUST_X_FORWARDED_FOR = os.environ.get('TRUST_X_FORWARDED_FOR', str(IS_RENDER)).lower() in ('true', '1', 'yes')
+
+# Seconds a rendered catalog page is kept; changes invalidate it sooner
+CATALOG_CACHE_TIMEOUT = int(os.environ.get('CATALOG_CACHE_TIMEOUT', 300))
+
+# Seconds the landing, login and register pages are cached for anonymous
+# visitors, keyed on their cookies (core.page_cache); 0 turns it off
+ANONYMOUS_PAGE_CACHE_SECONDS = int(os.environ.get('ANONYMOUS_PAGE_CACHE_SECONDS', 600))
+
+# Serve the dashboards from core.async_views; agriconnect.asgi turns this on
+ASYNC_DASHBOARDS = os.environ.get('ASYNC_DASHBOARDS', 'False').lower() in ('true', '1', 'yes')
+
+# Live order updates: seconds an async event stream stays open before the
+# browser reconnects (with Last-Event-ID), and, under WSGI where the
+# dashboards poll rather than hold a worker, seconds between polls
+ORDER_FEED_STREAM_SECONDS = int(os.environ.get('ORDER_FEED_STREAM_SECONDS', 60))
+ORDER_FEED_POLL_SECONDS = int(os.environ.get('ORDER_FEED_POLL_SECONDS', 5))
+
+# Delta sync: how old a change must be before it is handed out (so a cursor
+# never passes a row whose transaction has yet to commit), and how many days
+# deletions are remembered for clients to catch up on
+SYNC_SETTLE_SECONDS = float(os.environ.get('SYNC_SETTLE_SECONDS', 2))
+SYNC_TOMBSTONE_DAYS = int(os.environ.get('SYNC_TOMBSTONE_DAYS', 30))
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -138,6 +264,26 @@ MESSAGE_TAGS = {
     messages.WARNING: 'warning',
     messages.ERROR: 'danger',
 }
+# Flash messages travel in a signed cookie rather than the session
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+# Sessions: 'cached_db' reads them from the cache and writes through to the
+# database; 'signed_cookies' keeps them in the browser, with no server-side
+# copy that a logout elsewhere could revoke; 'db' reads the table on every
+# request. cached_db needs a cache all workers share (REDIS_URL, enforced
+# below), or a logout in one worker would leave the session alive in
+# another's memory.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_STORE = os.environ.get('SESSION_STORE') or ('cached_db' if os.environ.get('REDIS_URL') else 'db')
+if SESSION_STORE not in SESSION_ENGINES:
+    raise ImproperlyConfigured(f"SESSION_STORE must be one of: {', '.join(SESSION_ENGINES)}")
+if SESSION_STORE == 'cached_db' and not os.environ.get('REDIS_URL'):
+    raise ImproperlyConfigured('SESSION_STORE=cached_db needs REDIS_URL: a logout must reach the session cache of every worker.')
+SESSION_ENGINE = SESSION_ENGINES[SESSION_STORE]
 
 # CSRF Trusted Origins (for production)
 CSRF_TRUSTED_ORIGINS = [
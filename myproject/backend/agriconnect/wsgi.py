@@ -9,3 +9,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'agriconnect.settings')
 
 application = get_wsgi_application()
+
+# Warm per-process caches before the first request arrives
+from core import warmup  # noqa: E402
+
+warmup.run()
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User, FarmerProfile, RestaurantProfile, Produce, Order
+from .models import User, FarmerProfile, RestaurantProfile, Produce, Order, StockHold, Tombstone, UserStats, GlobalStats, MarketPrice, FarmerDailyFact
 
 
 @admin.register(User)
@@ -24,7 +24,7 @@ class RestaurantProfileAdmin(admin.ModelAdmin):
 
 @admin.register(Produce)
 class ProduceAdmin(admin.ModelAdmin):
-    list_display = ['name', 'farmer', 'quantity', 'price_per_kg', 'status', 'availability_date']
+    list_display = ['name', 'farmer', 'quantity', 'reserved_quantity', 'price_per_kg', 'status', 'availability_date']
     list_filter = ['status', 'availability_date']
     search_fields = ['name', 'farmer__username']
 
@@ -34,3 +34,41 @@ class OrderAdmin(admin.ModelAdmin):
     list_display = ['id', 'restaurant', 'farmer', 'produce', 'quantity_requested', 'total_price', 'status']
     list_filter = ['status', 'created_at']
     search_fields = ['restaurant__username', 'farmer__username', 'produce__name']
+
+
+@admin.register(StockHold)
+class StockHoldAdmin(admin.ModelAdmin):
+    list_display = ['order', 'produce', 'quantity', 'expires_at']
+    list_filter = ['expires_at']
+    raw_id_fields = ['order', 'produce']
+
+
+@admin.register(Tombstone)
+class TombstoneAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'object_id', 'user_id', 'deleted_at']
+    list_filter = ['kind', 'deleted_at']
+
+
+@admin.register(UserStats)
+class UserStatsAdmin(admin.ModelAdmin):
+    list_display = ['user', 'produce_total', 'produce_available', 'orders_pending_received', 'orders_pending_placed']
+    raw_id_fields = ['user']
+
+
+@admin.register(GlobalStats)
+class GlobalStatsAdmin(admin.ModelAdmin):
+    list_display = ['id', 'farmers', 'catalog_produce', 'catalog_version']
+
+
+@admin.register(MarketPrice)
+class MarketPriceAdmin(admin.ModelAdmin):
+    list_display = ['name', 'period', 'period_start', 'location', 'listings', 'median_price', 'trades', 'vwap']
+    list_filter = ['period']
+    search_fields = ['name', 'location']
+
+
+@admin.register(FarmerDailyFact)
+class FarmerDailyFactAdmin(admin.ModelAdmin):
+    list_display = ['farmer', 'day', 'name', 'requests', 'accepted', 'rejected', 'volume_kg', 'revenue']
+    list_filter = ['day']
+    search_fields = ['farmer__username', 'name']
@@ -0,0 +1,185 @@
+"""
+Read-only JSON API (v1) over produce listings and orders.
+
+Rows are read with ``values()`` and only for the columns the requested
+fields need (``?fields=id,name,price_per_kg``), then paged on the same
+(created_at, id) keyset as the dashboard catalog (``?cursor=&limit=``).
+
+Every response carries ``ETag`` and ``Last-Modified`` validators from one
+aggregate query over the rows in scope: the newest ``updated_at`` and the
+row count. The count catches deletions, which leave no newer timestamp
+behind. A conditional request that still matches gets a 304 before any row
+is read or serialized. ``Last-Modified`` has one-second resolution and
+cannot see deletions, so clients should prefer ``If-None-Match``.
+
+Views live in ``core.views`` and wrap themselves in ``endpoint``.
+"""
+import functools
+import hashlib
+
+from django.db.models import Count, Max
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .pagination import InvalidCursor, KeysetPaginator
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+PAGE_KEYS = ('created_at', 'id')
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def endpoint(view_func):
+    """GET-only, session-authenticated JSON view; errors come back as JSON too."""
+    @functools.wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            response = JsonResponse({'error': 'Method not allowed.'}, status=405)
+            response['Allow'] = 'GET, HEAD'
+            return response
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required.'}, status=401)
+        try:
+            return view_func(request, *args, **kwargs)
+        except ApiError as e:
+            return JsonResponse({'error': str(e)}, status=e.status)
+        except InvalidCursor as e:
+            return JsonResponse({'error': str(e)}, status=400)
+    return wrapper
+
+
+def _full_name(first, last, username):
+    return f'{first} {last}'.strip() or username
+
+
+def _field(*columns, get=None):
+    """An API field: the ``values()`` columns it reads and how to build it."""
+    return columns, get or (lambda row: row[columns[0]])
+
+
+PRODUCE_FIELDS = {
+    'id': _field('id'),
+    'name': _field('name'),
+    'farmer_id': _field('farmer_id'),
+    'farmer_name': _field(
+        'farmer__first_name', 'farmer__last_name', 'farmer__username',
+        get=lambda r: _full_name(r['farmer__first_name'], r['farmer__last_name'], r['farmer__username']),
+    ),
+    'quantity': _field('quantity'),
+    'available_to_promise': _field(
+        'quantity', 'reserved_quantity', get=lambda r: r['quantity'] - r['reserved_quantity'],
+    ),
+    'price_per_kg': _field('price_per_kg'),
+    'availability_date': _field('availability_date'),
+    'status': _field('status'),
+    'created_at': _field('created_at'),
+    'updated_at': _field('updated_at'),
+}
+
+ORDER_FIELDS = {
+    'id': _field('id'),
+    'status': _field('status'),
+    'produce_id': _field('produce_id'),
+    'produce_name': _field('produce__name'),
+    'farmer_id': _field('farmer_id'),
+    'farmer_name': _field(
+        'farmer__first_name', 'farmer__last_name', 'farmer__username',
+        get=lambda r: _full_name(r['farmer__first_name'], r['farmer__last_name'], r['farmer__username']),
+    ),
+    'restaurant_id': _field('restaurant_id'),
+    'restaurant_name': _field(
+        'restaurant__restaurant_profile__restaurant_name',
+        'restaurant__first_name', 'restaurant__last_name', 'restaurant__username',
+        get=lambda r: r['restaurant__restaurant_profile__restaurant_name'] or _full_name(
+            r['restaurant__first_name'], r['restaurant__last_name'], r['restaurant__username'],
+        ),
+    ),
+    'quantity_requested': _field('quantity_requested'),
+    'total_price': _field('total_price'),
+    'created_at': _field('created_at'),
+    'updated_at': _field('updated_at'),
+}
+
+
+def selected_fields(request, fields, param='fields'):
+    """The fields named in ``?fields=``, in the order given; all by default."""
+    raw = request.GET.get(param, '')
+    names = [name.strip() for name in raw.split(',') if name.strip()] or list(fields)
+    unknown = [name for name in names if name not in fields]
+    if unknown:
+        raise ApiError(400, f"Unknown field(s): {', '.join(unknown)}. Choose from: {', '.join(fields)}.")
+    return list(dict.fromkeys(names))
+
+
+def columns(fields, names, extra=()):
+    """The ``values()`` columns the named fields read, plus ``extra``."""
+    needed = dict.fromkeys(extra)
+    for name in names:
+        needed.update(dict.fromkeys(fields[name][0]))
+    return list(needed)
+
+
+def serialize(row, fields, names):
+    return {name: fields[name][1](row) for name in names}
+
+
+def _validators(request, scope):
+    """(ETag, Last-Modified timestamp) for ``scope`` as this request shapes it."""
+    state = scope.order_by().aggregate(last=Max('updated_at'), rows=Count('pk'))
+    last = state['last']
+    # The same rows under other fields or another page are another representation
+    query = '&'.join(f'{key}={value}' for key, value in sorted(request.GET.items()))
+    stamp = f"{last.isoformat() if last else '-'}|{state['rows']}|{query}"
+    etag = 'W/"%s"' % hashlib.md5(stamp.encode()).hexdigest()
+    return etag, (int(last.timestamp()) if last else None), state['rows']
+
+
+def _respond(request, scope, build):
+    etag, last_modified, rows = _validators(request, scope)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = build(rows)
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    # Shared caches must not keep one user's view; browsers must revalidate
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Cookie'])
+    return response
+
+
+def list_response(request, scope, fields):
+    """A page of ``scope``, newest first, or a 304 if the client is current."""
+    names = selected_fields(request, fields)
+
+    def build(rows):
+        paginator = KeysetPaginator(
+            scope.values(*columns(fields, names, extra=PAGE_KEYS)), keys=PAGE_KEYS,
+            page_size=request.GET.get('limit', PAGE_SIZE), max_page_size=MAX_PAGE_SIZE,
+        )
+        page = paginator.page(request.GET.get('cursor') or None) if rows else None
+        return JsonResponse({
+            'results': [serialize(row, fields, names) for row in page or ()],
+            'next_cursor': page.next_cursor if page else None,
+        })
+
+    return _respond(request, scope, build)
+
+
+def detail_response(request, scope, fields):
+    """The single row in ``scope`` (404 if none), or a 304 if the client is current."""
+    names = selected_fields(request, fields)
+
+    def build(rows):
+        if not rows:
+            raise ApiError(404, 'Not found.')
+        row = scope.values(*columns(fields, names)).get()
+        return JsonResponse(serialize(row, fields, names))
+
+    return _respond(request, scope, build)
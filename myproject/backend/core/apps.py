@@ -5,3 +5,6 @@ class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
     verbose_name = 'AgriConnect Core'
+    
+    def ready(self):
+        from . import db, signals  # noqa: F401  (connects receivers)
@@ -0,0 +1,151 @@
+"""
+Async variants of the dashboards, served when running under ASGI.
+
+Django 4.2's async ORM (``aget()``, ``afirst()``, ``async for``) still runs
+every query on the one thread shared by the request's sync code, so
+gathering several of them does not overlap anything. The queries a
+dashboard can run independently are instead sent to the default executor
+with ``thread_sensitive=False``; each worker thread keeps its own database
+connection, so they really do run at the same time. Session and user
+lookups stay on the request's thread with the rest of its sync middleware.
+
+The sync views in ``core.views`` remain the reference: these render the same
+templates from the same context.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth.views import redirect_to_login
+from django.db import close_old_connections
+from django.shortcuts import redirect, render
+
+from django.http import HttpResponseForbidden
+
+from . import order_feed, stats
+from .forms import CatalogFilterForm, ProduceForm
+from .instrumentation import record_queries
+from .models import Order, Produce
+from .views import INCOMING_ORDERS_SHOWN, _catalog_page, _event_stream_response, _recent_orders
+
+
+def _in_worker(func, *args):
+    """Run ``func`` on a worker thread with its own database connection."""
+    def call():
+        # Worker threads see no request_started/finished signals, so apply
+        # CONN_MAX_AGE and drop broken connections here instead.
+        close_old_connections()
+        try:
+            with record_queries():
+                return func(*args)
+        finally:
+            close_old_connections()
+    return sync_to_async(call, thread_sensitive=False)()
+
+
+async def _user_or_login(request):
+    """
+    The logged-in user, or a redirect to the login page.
+
+    ``request.user`` loads the session and the user lazily, which must not
+    happen on the event loop.
+    """
+    def resolve():
+        return request.user if request.user.is_authenticated else None
+    user = await sync_to_async(resolve)()
+    if user is None:
+        return None, redirect_to_login(request.get_full_path())
+    return user, None
+
+
+async def farmer_dashboard(request):
+    """Farmer dashboard view"""
+    user, response = await _user_or_login(request)
+    if response:
+        return response
+    if not user.is_farmer():
+        messages.error(request, 'Access denied. This page is for farmers only.')
+        return redirect('dashboard')
+
+    feed_after = await sync_to_async(order_feed.latest)(user.pk)
+
+    def incoming():
+        return list(
+            Order.objects.filter(farmer=user)
+            .select_related('restaurant__restaurant_profile', 'produce')[:INCOMING_ORDERS_SHOWN]
+        )
+
+    headline, incoming_orders = await asyncio.gather(
+        _in_worker(stats.dashboard_stats, user), _in_worker(incoming),
+    )
+
+    context = {
+        # Unused by the template today; lazy, so it costs nothing unless rendered
+        'produce_listings': Produce.objects.filter(farmer=user),
+        'incoming_orders': incoming_orders,
+        'feed_after': feed_after,
+        **order_feed.client_options(),
+        'total_produce': headline['produce_total'],
+        'available_produce': headline['produce_available'],
+        'pending_orders': headline['orders_pending_received'],
+        'form': ProduceForm(),
+    }
+    return await sync_to_async(render)(request, 'farmer_dashboard.html', context)
+
+
+async def restaurant_dashboard(request):
+    """Restaurant dashboard view"""
+    user, response = await _user_or_login(request)
+    if response:
+        return response
+    if not user.is_restaurant():
+        messages.error(request, 'Access denied. This page is for restaurants only.')
+        return redirect('dashboard')
+
+    catalog_form = CatalogFilterForm(request.GET or None)
+    feed_after = await sync_to_async(order_feed.latest)(user.pk)
+
+    def headline_and_catalog():
+        # The catalog page is keyed on the version the stats row carries
+        headline = stats.dashboard_stats(user)
+        return headline, _catalog_page(catalog_form, headline['catalog_version'])
+
+    (headline, (available_produce, catalog_rows)), (my_orders, more_orders) = await asyncio.gather(
+        _in_worker(headline_and_catalog), _in_worker(_recent_orders, user),
+    )
+
+    context = {
+        'available_produce': available_produce,
+        'catalog_rows': catalog_rows,
+        'catalog_form': catalog_form,
+        'catalog_query': catalog_form.querystring(),
+        'my_orders': my_orders,
+        'more_orders': more_orders,
+        'feed_after': feed_after,
+        **order_feed.client_options(),
+        'total_farmers': headline['total_farmers'],
+        'total_produce': headline['catalog_produce'],
+        'pending_orders': headline['orders_pending_placed'],
+    }
+    return await sync_to_async(render)(request, 'restaurant_dashboard.html', context)
+
+
+async def _events(user, after):
+    state = await sync_to_async(order_feed.Stream)(user, after)
+    yield f'retry: {order_feed.RETRY_MS}\n\n'
+    while state.open:
+        chunk = await _in_worker(state.step)
+        if chunk:
+            yield chunk
+        await asyncio.sleep(order_feed.POLL_INTERVAL)
+
+
+async def order_events(request):
+    """Server-Sent Events for the user's orders, patched into the dashboard tables"""
+    user, response = await _user_or_login(request)
+    if response:
+        return response
+    if user.role not in order_feed.ROW_TEMPLATES:
+        return HttpResponseForbidden('Order updates are for farmers and restaurants.')
+    # An idle stream holds no thread under ASGI, only a task
+    return _event_stream_response(_events(user, order_feed.start_position(request)))
@@ -1,31 +1,65 @@
+from django.conf import settings
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
 
 User = get_user_model()
 
 
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def forget_user(user_id):
+    """Drop a cached user now and again once the current transaction commits."""
+    key = user_cache_key(user_id)
+    cache.delete(key)
+    # A request that read the old row before our commit may have cached it
+    # in the meantime.
+    transaction.on_commit(lambda: cache.delete(key))
+
+
 class EmailBackend(ModelBackend):
     """
-    Custom authentication backend that allows login with email instead of username.
+    Custom authentication backend that allows login with email or username.
+    
+    The account is found with a single indexed query, and a failed attempt
+    stops here instead of falling through to ModelBackend, which would look
+    the username up and hash the password a second time. With a shared
+    cache (AUTH_USER_CACHE_TIMEOUT, which needs REDIS_URL) the user attached
+    to each request is served from it; core.signals forgets it whenever the
+    user is saved (including password changes) or deleted.
     """
     def authenticate(self, request, username=None, password=None, **kwargs):
-        try:
-            # Try to find a user matching the email
-            user = User.objects.get(email=username)
-        except User.DoesNotExist:
-            # No user with this email, try username as fallback
-            try:
-                user = User.objects.get(username=username)
-            except User.DoesNotExist:
-                return None
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
         
-        # Check the password
-        if user.check_password(password):
-            return user
-        return None
+        identifier = username.strip().lower()
+        matches = list(User.objects.with_login(username)[:2])
+        # An email match wins over another account's username
+        matches.sort(key=lambda user: user.email.lower() != identifier)
+        
+        if not matches:
+            # Hash anyway so response times do not reveal which accounts exist
+            User().set_password(password)
+        elif matches[0].check_password(password) and self.user_can_authenticate(matches[0]):
+            return matches[0]
+        # Tells django.contrib.auth.authenticate() to skip the remaining backends
+        raise PermissionDenied
     
     def get_user(self, user_id):
-        try:
-            return User.objects.get(pk=user_id)
-        except User.DoesNotExist:
-            return None
+        if not settings.AUTH_USER_CACHE_TIMEOUT:
+            return super().get_user(user_id)
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            try:
+                user = User.objects.get(pk=user_id)
+            except User.DoesNotExist:
+                return None
+            cache.set(key, user, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,73 @@
+"""
+Shared plumbing for the benchmark and stress-test management commands.
+
+Benchmarks never touch the configured database: they build a throwaway copy
+of the schema the same way the test runner does and drop it afterwards.
+"""
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.db import connections
+
+
+@contextmanager
+def scratch_database(alias='default'):
+    """Create an empty, fully migrated test database and tear it down after."""
+    connection = connections[alias]
+    old_name = connection.settings_dict['NAME']
+    test_settings = connection.settings_dict['TEST']
+    old_test_name = test_settings.get('NAME')
+    tmpdir = None
+
+    if connection.vendor == 'sqlite':
+        # SQLite test databases default to in-memory, which worker threads
+        # cannot share; use a temporary file instead.
+        tmpdir = tempfile.mkdtemp(prefix='agriconnect-bench-')
+        test_settings['NAME'] = os.path.join(tmpdir, 'bench.sqlite3')
+
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        test_settings['NAME'] = old_test_name
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of an unsorted list of numbers."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(samples, elapsed=None):
+    """Latency summary in milliseconds for a list of per-call durations (s)."""
+    summary = {
+        'count': len(samples),
+        'mean_ms': round(statistics.fmean(samples) * 1000, 3) if samples else 0.0,
+        'p50_ms': round(percentile(samples, 50) * 1000, 3),
+        'p99_ms': round(percentile(samples, 99) * 1000, 3),
+    }
+    if elapsed:
+        summary['per_second'] = round(len(samples) / elapsed, 1)
+    return summary
+
+
+class Stopwatch:
+    """``with Stopwatch() as sw: ...`` then read ``sw.elapsed`` in seconds."""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+        return False
@@ -0,0 +1,125 @@
+"""
+Versioned cache for rendered produce catalog pages.
+
+Every restaurant sees the same catalog, so a page (its rows and their
+rendered HTML) is built once per catalog version and shared. The version is
+a counter on the GlobalStats row, bumped as soon as any write that changes
+what the catalog shows commits: listings saved or deleted, and orders that
+reserve, take or release stock. Bumping after the commit, in a statement of
+its own, keeps the one row from being locked for the length of every write
+transaction, which would serialize them all. Readers look the version up
+first, so once the bump lands no old page is served; a page built from rows
+read before the commit is filed under the old version, which the bump
+abandons. Entries for old versions are never read again and simply expire.
+
+Ordinary ``save()``/``delete()`` calls bump through ``core.signals``; code
+that writes with ``update()`` or ``bulk_create()`` calls ``bump_version()``
+itself, like the counters in ``core.stats``.
+
+When a version bump empties the cache, the first reader of each page takes
+a short lock and rebuilds it while the others wait for its result instead
+of all querying at once.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .models import GlobalStats
+
+KEY_PREFIX = 'catalog'
+COUNTERS = ('hits', 'misses', 'waits', 'wait_timeouts')
+
+# A rebuild that takes longer than this is presumed dead and retried
+LOCK_TIMEOUT = 10
+WAIT_INTERVAL = 0.02
+WAIT_LIMIT = 2.0
+
+
+def _bump():
+    GlobalStats.objects.filter(pk=GlobalStats.SINGLETON_ID).update(
+        catalog_version=F('catalog_version') + 1,
+    )
+
+
+def bump_version():
+    """Move to a new version once the current transaction commits (at once outside one)."""
+    transaction.on_commit(_bump)
+
+
+def current_version():
+    return GlobalStats.objects.filter(pk=GlobalStats.SINGLETON_ID).values_list(
+        'catalog_version', flat=True,
+    ).first()
+
+
+def _count(name):
+    key = f'{KEY_PREFIX}:stats:{name}'
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:  # evicted between add() and incr()
+        cache.add(key, 1, timeout=None)
+
+
+def counters():
+    """Hit/miss counts since the cache was last cleared."""
+    values = cache.get_many([f'{KEY_PREFIX}:stats:{name}' for name in COUNTERS])
+    result = {name: values.get(f'{KEY_PREFIX}:stats:{name}', 0) for name in COUNTERS}
+    lookups = result['hits'] + result['misses']
+    result['hit_rate'] = round(result['hits'] / lookups, 4) if lookups else None
+    result['version'] = current_version()
+    return result
+
+
+def _key(version, parts):
+    digest = hashlib.sha1('\x1f'.join(parts).encode()).hexdigest()
+    return f'{KEY_PREFIX}:v{version}:{digest}'
+
+
+def get_or_build(version, parts, build):
+    """
+    Return the cached result of ``build()`` for this catalog version.
+
+    ``parts`` identify the page within a version (filters, cursor, size).
+    With no version (stats not initialised yet) nothing is cached.
+    """
+    if version is None:
+        _count('misses')
+        return build()
+
+    key = _key(version, parts)
+    entry = cache.get(key)
+    if entry is not None:
+        _count('hits')
+        return entry
+    _count('misses')
+
+    lock = f'{key}:lock'
+    if cache.add(lock, 1, timeout=LOCK_TIMEOUT):
+        try:
+            entry = build()
+            cache.set(key, entry, timeout=settings.CATALOG_CACHE_TIMEOUT)
+        finally:
+            cache.delete(lock)
+        return entry
+
+    # Another request is rebuilding this page; wait for it rather than pile on
+    deadline = time.monotonic() + WAIT_LIMIT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            _count('waits')
+            return entry
+        if not cache.get(lock):
+            entry = cache.get(key)
+            if entry is not None:
+                _count('waits')
+                return entry
+            break  # the rebuild failed; build our own copy
+    _count('wait_timeouts')
+    return build()
@@ -0,0 +1,157 @@
+"""
+Per-connection database setup and read-replica routing.
+
+SQLite keeps most tuning per connection, so the pragmas in
+``SQLITE_PRAGMAS`` are applied as each connection opens. With persistent
+connections (``CONN_MAX_AGE``) that happens once per worker thread rather
+than once per request.
+
+With ``DATABASE_REPLICA_URLS`` set, ``ReplicaRouter`` sends reads from views
+marked with ``replica_reads`` (the dashboards, the catalog and the exports)
+to a replica, one per request. Everything else stays on the primary:
+
+* every write, and every read in a request after it has written;
+* reads inside ``transaction.atomic()``;
+* accounts and sessions, so a lagging replica never logs anyone out;
+* for ``REPLICA_STICKY_SECONDS`` after a request that wrote, all reads for
+  that user, so a farmer's new listing shows up on the next page even if
+  the replicas have not caught up yet.
+
+Outside a request (management commands, the order feed's stream, the API)
+nothing is routed to a replica.
+"""
+import contextvars
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_finished
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+PIN_KEY_PREFIX = 'db:pin'
+
+_state = contextvars.ContextVar('db_routing_state', default=None)
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite' or not settings.SQLITE_PRAGMAS:
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+
+
+def replica_reads(view_func):
+    """Allow the view's reads to be served by a replica."""
+    view_func.replica_reads = True
+    return view_func
+
+
+def _pin_key(user_id):
+    return f'{PIN_KEY_PREFIX}:{user_id}'
+
+
+class _RequestState:
+    """Routing state for one request; shared with the threads it spawns."""
+
+    def __init__(self, request):
+        self.request = request
+        self.replica_reads = False
+        self.wrote = False
+        self.replica = None
+        self._pinned = None
+
+    @property
+    def pinned(self):
+        """Whether the user wrote something within the last REPLICA_STICKY_SECONDS."""
+        if self._pinned is None:
+            user = getattr(self.request, 'user', None)
+            self._pinned = bool(user and user.is_authenticated and cache.get(_pin_key(user.pk)))
+        return self._pinned
+
+
+def _replica_safe(model):
+    return model._meta.app_label == 'core' and model._meta.model_name != 'user'
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (
+            state is None or not state.replica_reads or not settings.DATABASE_REPLICAS
+            or not _replica_safe(model)
+            or state.wrote or connections['default'].in_atomic_block or state.pinned
+        ):
+            return None
+        if state.replica is None:
+            state.replica = random.choice(settings.DATABASE_REPLICAS)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None and model._meta.app_label != 'sessions':
+            state.wrote = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        databases = {'default', *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Tracks each request's writes for ReplicaRouter and pins writers to the primary.
+
+    Under ASGI the state is set in the request's own context; the
+    ``sync_to_async`` calls that run its queries copy that context, and they
+    all share the one state object, so writes made there are seen here.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        # Kept until request_finished: streamed responses still read after we return
+        state = _RequestState(request)
+        _state.set(state)
+        response = self.get_response(request)
+        if state.wrote and settings.DATABASE_REPLICAS:
+            self.pin(request)
+        return response
+
+    async def __acall__(self, request):
+        # The request's task ends with its response, so there is nothing to reset
+        state = _RequestState(request)
+        _state.set(state)
+        response = await self.get_response(request)
+        if state.wrote and settings.DATABASE_REPLICAS:
+            # request.user may still have to load the session and the user
+            await sync_to_async(self.pin)(request)
+        return response
+
+    def pin(self, request):
+        if request.user.is_authenticated:
+            cache.set(_pin_key(request.user.pk), True, timeout=settings.REPLICA_STICKY_SECONDS)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        _state.get().replica_reads = getattr(view_func, 'replica_reads', False)
+        return None
+
+
+@receiver(request_finished)
+def forget_request(sender, **kwargs):
+    _state.set(None)
@@ -0,0 +1,121 @@
+"""
+In-process Bloom filter over registered email addresses.
+
+The registration form asks ``check_email`` about every address a visitor
+types. Almost all of them are new, and a Bloom filter can say "definitely
+not registered" without touching the database; only a possible hit (a real
+account, or a ~0.1% false positive) is confirmed with a query.
+
+The filter is built from the User table when a worker starts (see
+``agriconnect.wsgi``), or on first use otherwise. Accounts saved in this
+process are added straight away through ``core.signals``. Accounts created
+by other workers are picked up every ``REFRESH_INTERVAL`` seconds by reading
+users with a higher primary key than the last one seen, so a filter is never
+wrong about an account for longer than that.
+"""
+import hashlib
+import math
+import threading
+import time
+
+from django.db.models import Max
+
+from .models import User
+
+FALSE_POSITIVE_RATE = 0.001
+MIN_CAPACITY = 10_000
+REFRESH_INTERVAL = 30  # seconds
+
+
+def normalize(email):
+    return (email or '').strip().lower()
+
+
+class BloomFilter:
+    """A fixed-size Bloom filter sized for ``capacity`` items."""
+
+    def __init__(self, capacity, error_rate=FALSE_POSITIVE_RATE):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Kirsch-Mitzenmacher: k positions from two independent 64-bit hashes
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    @property
+    def full(self):
+        return self.count > self.capacity
+
+
+_lock = threading.Lock()
+_filter = None
+_last_pk = 0
+_refreshed_at = 0.0
+
+
+def _emails(after_pk=0):
+    return (
+        User.objects.filter(pk__gt=after_pk, email__gt='')
+        .order_by('pk').values_list('pk', 'email')
+        .iterator(chunk_size=5000)
+    )
+
+
+def _build():
+    global _filter, _last_pk, _refreshed_at
+    total = User.objects.aggregate(n=Max('pk'))['n'] or 0
+    bloom = BloomFilter(max(MIN_CAPACITY, total * 2))
+    last_pk = 0
+    for pk, email in _emails():
+        bloom.add(normalize(email))
+        last_pk = pk
+    _filter, _last_pk, _refreshed_at = bloom, last_pk, time.monotonic()
+
+
+def warm():
+    """(Re)build the filter from every registered email."""
+    with _lock:
+        _build()
+
+
+def _refresh():
+    """Add accounts created by other workers since the last refresh."""
+    global _last_pk, _refreshed_at
+    with _lock:
+        if time.monotonic() - _refreshed_at < REFRESH_INTERVAL:
+            return  # another thread just did it
+        for pk, email in _emails(after_pk=_last_pk):
+            _filter.add(normalize(email))
+            _last_pk = max(_last_pk, pk)
+        _refreshed_at = time.monotonic()
+
+
+def add(email):
+    email = normalize(email)
+    if email and _filter is not None:
+        _filter.add(email)
+
+
+def might_exist(email):
+    """False only if no account has this email; True means "ask the database"."""
+    if _filter is None or _filter.full:
+        with _lock:
+            if _filter is None or _filter.full:
+                _build()
+    elif time.monotonic() - _refreshed_at >= REFRESH_INTERVAL:
+        _refresh()
+    return normalize(email) in _filter
@@ -0,0 +1,70 @@
+"""
+Scheduled recomputation of listing statuses.
+
+Statuses are kept up to date on every stock write, but two things change
+without one: a listing whose availability date is more than
+``PRODUCE_EXPIRY_DAYS`` old has expired, and rows written by raw SQL, the
+admin or older code may carry a status that no longer matches their stock.
+
+``expire_produce()`` walks the table in primary-key ranges and fixes each
+range with one ``UPDATE ... SET status = CASE ...`` that only touches rows
+whose status differs from ``Produce.status_expression()``. The only rows
+read back are aggregates, one per (farmer, old status, new status), which
+feed the dashboard counters. If a concurrent write changed a listing
+between that count and the UPDATE, the farmers in that range are recounted
+from the table instead.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+
+from . import catalog_cache, stats
+from .models import Produce
+
+
+def _transitions(rows, expression):
+    """``(farmer_id, old, new, count)`` for the rows whose status is out of date."""
+    return list(
+        rows.exclude(status=expression)
+        .annotate(new_status=expression)
+        .values_list('farmer_id', 'status', 'new_status')
+        .annotate(count=Count('pk'))
+        .order_by()
+    )
+
+
+def expire_produce(batch_size=1000, today=None, dry_run=False):
+    """
+    Bring every listing's status in line with its stock and availability
+    date, one transaction per ``batch_size`` primary keys.
+
+    Returns a Counter of ``(old status, new status)`` to the number of rows
+    changed, or that would change with ``dry_run``.
+    """
+    expression = Produce.status_expression(Produce.expiry_cutoff(today))
+    bounds = Produce.objects.aggregate(low=Min('pk'), high=Max('pk'))
+    changed = Counter()
+    if bounds['low'] is None:
+        return changed
+
+    for low in range(bounds['low'], bounds['high'] + 1, batch_size):
+        rows = Produce.objects.filter(pk__gte=low, pk__lt=low + batch_size)
+        with transaction.atomic():
+            transitions = _transitions(rows, expression)
+            for _, old, new, count in transitions:
+                changed[old, new] += count
+            if dry_run or not transitions:
+                continue
+
+            updated = rows.exclude(status=expression).update(
+                status=expression, updated_at=timezone.now(),
+            )
+            if updated == sum(count for *_, count in transitions):
+                stats.produce_statuses_changed(transitions)
+            else:
+                farmers = rows.order_by().values_list('farmer_id', flat=True).distinct()
+                stats.recompute(user_ids=list(farmers))
+            catalog_cache.bump_version()
+    return changed
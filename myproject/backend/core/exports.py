@@ -0,0 +1,112 @@
+"""
+Streaming CSV / NDJSON exports of orders and produce listings.
+
+Rows are pulled from the database with ``iterator(chunk_size=...)`` and
+written to the response one at a time, so an export of a million orders
+uses the same memory as an export of ten.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Order, Produce
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+CHUNK_SIZE = 2000
+
+
+def _iso(value):
+    """Local-time ISO 8601, identical in both formats"""
+    return timezone.localtime(value).isoformat()
+
+
+def _restaurant_name(user):
+    profile = getattr(user, 'restaurant_profile', None)
+    return profile.restaurant_name if profile else user.get_full_name() or user.username
+
+
+def _farmer_name(user):
+    return user.get_full_name() or user.username
+
+
+# (column, value getter) pairs for each export
+ORDER_COLUMNS = [
+    ('order_id', lambda o: o.pk),
+    ('created_at', lambda o: _iso(o.created_at)),
+    ('updated_at', lambda o: _iso(o.updated_at)),
+    ('status', lambda o: o.status),
+    ('restaurant', lambda o: _restaurant_name(o.restaurant)),
+    ('farmer', lambda o: _farmer_name(o.farmer)),
+    ('produce', lambda o: o.produce.name),
+    ('quantity_kg', lambda o: o.quantity_requested),
+    ('total_price', lambda o: o.total_price),
+]
+
+PRODUCE_COLUMNS = [
+    ('produce_id', lambda p: p.pk),
+    ('created_at', lambda p: _iso(p.created_at)),
+    ('updated_at', lambda p: _iso(p.updated_at)),
+    ('farmer', lambda p: _farmer_name(p.farmer)),
+    ('name', lambda p: p.name),
+    ('quantity_kg', lambda p: p.quantity),
+    ('reserved_kg', lambda p: p.reserved_quantity),
+    ('price_per_kg', lambda p: p.price_per_kg),
+    ('availability_date', lambda p: p.availability_date),
+    ('status', lambda p: p.status),
+]
+
+
+def order_queryset():
+    return Order.objects.select_related(
+        'restaurant__restaurant_profile', 'farmer', 'produce',
+    ).only(
+        'id', 'created_at', 'updated_at', 'status', 'quantity_requested', 'total_price',
+        'restaurant__username', 'restaurant__first_name', 'restaurant__last_name',
+        'restaurant__restaurant_profile__restaurant_name',
+        'farmer__username', 'farmer__first_name', 'farmer__last_name',
+        'produce__name',
+    )
+
+
+def produce_queryset():
+    return Produce.objects.select_related('farmer').only(
+        'id', 'created_at', 'updated_at', 'name', 'quantity', 'reserved_quantity',
+        'price_per_kg', 'availability_date', 'status',
+        'farmer__username', 'farmer__first_name', 'farmer__last_name',
+    )
+
+
+class _Echo:
+    """File-like object whose write() hands the line straight back."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(rows, columns):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in columns])
+    for row in rows:
+        yield writer.writerow([getter(row) for _, getter in columns])
+
+
+def _ndjson_lines(rows, columns):
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    for row in rows:
+        yield encoder.encode({name: getter(row) for name, getter in columns}) + '\n'
+
+
+def stream_export(queryset, columns, fmt, basename):
+    """Stream ``queryset`` as a downloadable CSV or NDJSON file."""
+    rows = queryset.order_by('pk').iterator(chunk_size=CHUNK_SIZE)
+    lines = _csv_lines(rows, columns) if fmt == 'csv' else _ndjson_lines(rows, columns)
+    response = StreamingHttpResponse(lines, content_type=FORMATS[fmt])
+    stamp = timezone.localdate().isoformat()
+    response['Content-Disposition'] = f'attachment; filename="{basename}-{stamp}.{fmt}"'
+    return response
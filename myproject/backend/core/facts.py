@@ -0,0 +1,204 @@
+"""
+Daily order facts per farmer and produce name.
+
+The farmer analytics page charts revenue, kg sold and acceptance rate over
+any date range. Aggregating a farmer's orders for that grows with their
+order history, so each order transition instead adds to one
+``FarmerDailyFact`` row for the farmer, the day it happened and the
+produce's normalized name (``core.market.normalize_name``):
+
+* a new order counts as a request on the day it was placed;
+* accepting it counts as accepted, and adds its kg and rupees, on the day
+  it was accepted;
+* rejecting it counts as rejected on the day it was rejected.
+
+A year of history is then at most 366 rows per produce name, whatever the
+order volume, and the page reads nothing else (``series``, ``by_produce``).
+
+Steady-state writes are a single ``UPDATE ... SET n = n + 1``; the first
+transition of a day inserts the row first. Ordinary saves are recorded by
+``core.signals``; ``core.orders`` records its ``update()`` and
+``bulk_create()`` transitions itself. Facts are history: deleting an order
+later does not rewrite them. ``rebuild()`` recomputes every row from the
+orders and backs the ``backfill_farmer_facts`` command.
+"""
+import functools
+import operator
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .market import TRADE_STATUSES, normalize_name, week_start
+from .models import FarmerDailyFact, Order
+
+COUNTERS = ('requests', 'accepted', 'rejected', 'volume_kg', 'revenue')
+
+
+def _status_counters(status, quantity, value, count=1):
+    if status in TRADE_STATUSES:
+        return {'accepted': count, 'volume_kg': quantity, 'revenue': value}
+    if status == 'rejected':
+        return {'rejected': count}
+    return {}
+
+
+def transition_deltas(old_status, new_status, quantity, value):
+    """
+    What an order moving from ``old_status`` (None when it was just placed)
+    to ``new_status`` adds to its day's counters.
+    """
+    deltas = defaultdict(int)
+    if old_status is None:
+        deltas['requests'] += 1
+    for field, amount in _status_counters(new_status, quantity, value).items():
+        deltas[field] += amount
+    for field, amount in _status_counters(old_status, quantity, value).items():
+        deltas[field] -= amount
+    return {field: amount for field, amount in deltas.items() if amount}
+
+
+def _add(farmer_id, day, name, deltas):
+    if not deltas or not name:
+        return
+    row = FarmerDailyFact.objects.filter(farmer_id=farmer_id, day=day, name=name)
+    increments = {field: F(field) + amount for field, amount in deltas.items()}
+    if not row.update(**increments):
+        # First transition of the day; another writer may race us to the row
+        FarmerDailyFact.objects.bulk_create(
+            [FarmerDailyFact(farmer_id=farmer_id, day=day, name=name)], ignore_conflicts=True,
+        )
+        row.update(**increments)
+
+
+def order_transition(farmer_id, produce_name, old_status, new_status, quantity, value, when=None):
+    """An order for ``produce_name`` moved from ``old_status`` to ``new_status``."""
+    _add(
+        farmer_id, timezone.localdate(when), normalize_name(produce_name),
+        transition_deltas(old_status, new_status, quantity, value),
+    )
+
+
+def orders_placed(orders):
+    """
+    Orders just created with ``bulk_create()``; each needs ``produce``
+    loaded. Two queries however many farmers and produce names they span.
+    """
+    placed = Counter(
+        (order.farmer_id, timezone.localdate(order.created_at), normalize_name(order.produce.name))
+        for order in orders
+    )
+    placed = {key: count for key, count in placed.items() if key[2]}
+    if not placed:
+        return
+    # Missing rows are inserted empty first, so one UPDATE can count them all
+    FarmerDailyFact.objects.bulk_create(
+        [FarmerDailyFact(farmer_id=farmer_id, day=day, name=name) for farmer_id, day, name in placed],
+        ignore_conflicts=True,
+    )
+    keys = [Q(farmer_id=farmer_id, day=day, name=name) for farmer_id, day, name in placed]
+    FarmerDailyFact.objects.filter(functools.reduce(operator.or_, keys)).update(
+        requests=F('requests') + Case(
+            *[When(key, then=Value(count)) for key, count in zip(keys, placed.values())],
+            output_field=IntegerField(),
+        ),
+    )
+
+
+def rebuild(batch_size=1000):
+    """
+    Recompute every fact from the orders with two grouped queries, one for
+    placements and one for decisions. Writes landing while it runs may be
+    missed; run it when the site is quiet. Returns the number of rows written.
+    """
+    facts = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+
+    placed = Order.objects.values(
+        'farmer_id', name=F('produce__name'), day=TruncDate('created_at'),
+    ).annotate(n=Count('id')).order_by()
+    for row in placed.iterator():
+        facts[(row['farmer_id'], row['day'], normalize_name(row['name']))]['requests'] += row['n']
+
+    # Acceptance and rejection are an order's last update
+    decided = Order.objects.filter(status__in=(*TRADE_STATUSES, 'rejected')).values(
+        'farmer_id', 'status', name=F('produce__name'), day=TruncDate('updated_at'),
+    ).annotate(n=Count('id'), volume_kg=Sum('quantity_requested'), value=Sum('total_price')).order_by()
+    for row in decided.iterator():
+        fact = facts[(row['farmer_id'], row['day'], normalize_name(row['name']))]
+        for field, amount in _status_counters(row['status'], row['volume_kg'], row['value'], row['n']).items():
+            fact[field] += amount
+
+    rows = [
+        FarmerDailyFact(farmer_id=farmer_id, day=day, name=name, **counters)
+        for (farmer_id, day, name), counters in facts.items() if name
+    ]
+    with transaction.atomic():
+        FarmerDailyFact.objects.all().delete()
+        FarmerDailyFact.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def grain_for(start, end):
+    """Days up to three months, weeks up to a year and a half, then months."""
+    days = (end - start).days + 1
+    if days <= 92:
+        return 'day'
+    if days <= 549:
+        return 'week'
+    return 'month'
+
+
+def _totals(queryset):
+    # Annotations may not reuse the field names, hence the round trip
+    totals = queryset.annotate(**{f'total_{field}': Sum(field) for field in COUNTERS})
+    for row in totals:
+        for field in COUNTERS:
+            row[field] = row.pop(f'total_{field}')
+        yield row
+
+
+def _with_rate(row):
+    decided = row['accepted'] + row['rejected']
+    row['acceptance_rate'] = round(100 * row['accepted'] / decided, 1) if decided else None
+    return row
+
+
+def _period_start(day, grain):
+    if grain == 'week':
+        return week_start(day)
+    if grain == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def series(farmer_id, start, end, grain='day'):
+    """
+    The farmer's counters per ``grain`` period between ``start`` and ``end``
+    inclusive, oldest first, with an ``acceptance_rate`` (accepted share of
+    decided orders, in percent). Periods without orders are left out.
+
+    One query grouped by day; days are folded into weeks or months here,
+    which is cheaper than truncating every fact row in SQLite.
+    """
+    periods = {}
+    days = FarmerDailyFact.objects.filter(farmer_id=farmer_id, day__range=(start, end)).values('day').order_by('day')
+    for row in _totals(days):
+        period = _period_start(row.pop('day'), grain)
+        if period not in periods:
+            periods[period] = {'period': period, **dict.fromkeys(COUNTERS, 0)}
+        for field in COUNTERS:
+            periods[period][field] += row[field]
+    return [_with_rate(row) for row in periods.values()]
+
+
+def totals(rows):
+    """The counters of ``series`` or ``by_produce`` rows added up, with their acceptance rate."""
+    return _with_rate({field: sum(row[field] for row in rows) for field in COUNTERS})
+
+
+def by_produce(farmer_id, start, end):
+    """The farmer's counters per produce name over the range, by revenue. One query."""
+    names = FarmerDailyFact.objects.filter(farmer_id=farmer_id, day__range=(start, end)).values('name').order_by()
+    return sorted(map(_with_rate, _totals(names)), key=lambda row: (-row['revenue'], row['name']))
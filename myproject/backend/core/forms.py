@@ -1,5 +1,9 @@
+import datetime
+
 from django import forms
+from django.http import QueryDict
 from django.contrib.auth.forms import UserCreationForm
+from django.utils import timezone
 from .models import User, FarmerProfile, RestaurantProfile, Produce, Order
 
 
@@ -81,6 +85,19 @@ class ProduceForm(forms.ModelForm):
             'price_per_kg': forms.NumberInput(attrs={'placeholder': 'e.g., 50', 'min': '1', 'step': '0.01'}),
             'contact_number': forms.TextInput(attrs={'placeholder': 'e.g., +91 98765 43210'}),
         }
+    
+    def clean_quantity(self):
+        # Also guards core.importers, which validates rows with this form
+        quantity = self.cleaned_data['quantity']
+        if quantity <= 0:
+            raise forms.ValidationError('Quantity must be greater than zero.')
+        return quantity
+    
+    def clean_price_per_kg(self):
+        price = self.cleaned_data['price_per_kg']
+        if price <= 0:
+            raise forms.ValidationError('Price must be greater than zero.')
+        return price
 
 
 class OrderForm(forms.ModelForm):
@@ -91,3 +108,92 @@ class OrderForm(forms.ModelForm):
         widgets = {
             'quantity_requested': forms.NumberInput(attrs={'placeholder': 'Enter quantity in kg', 'min': '1'}),
         }
+
+
+class CatalogFilterForm(forms.Form):
+    """Server-side filters for the restaurant produce catalog"""
+    name = forms.CharField(max_length=100, required=False)
+    min_price = forms.DecimalField(min_value=0, decimal_places=2, required=False)
+    max_price = forms.DecimalField(min_value=0, decimal_places=2, required=False)
+    available_from = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    available_until = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    
+    def filter(self, queryset):
+        """Apply whichever filters validated; invalid ones are ignored"""
+        # cleaned_data only keeps the fields that validated
+        self.is_valid()
+        data = getattr(self, 'cleaned_data', {})
+        
+        if data.get('name'):
+            queryset = queryset.filter(name__icontains=data['name'].strip())
+        if data.get('min_price') is not None:
+            queryset = queryset.filter(price_per_kg__gte=data['min_price'])
+        if data.get('max_price') is not None:
+            queryset = queryset.filter(price_per_kg__lte=data['max_price'])
+        if data.get('available_from'):
+            queryset = queryset.filter(availability_date__gte=data['available_from'])
+        if data.get('available_until'):
+            queryset = queryset.filter(availability_date__lte=data['available_until'])
+        return queryset
+    
+    def querystring(self):
+        """Active filters encoded for the fragment endpoint's load-more links"""
+        params = QueryDict(mutable=True)
+        if self.is_bound:
+            for key in self.fields:
+                value = self.data.get(key)
+                if value and key not in self.errors:
+                    params[key] = value
+        return params.urlencode()
+
+
+class ExportFilterForm(forms.Form):
+    """Date-range and status filters shared by the CSV/NDJSON exports"""
+    format = forms.ChoiceField(choices=[('csv', 'CSV'), ('ndjson', 'NDJSON')], required=False)
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+    status = forms.ChoiceField(required=False)
+    
+    def __init__(self, *args, status_choices=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['status'].choices = [('', 'Any')] + list(status_choices)
+    
+    def filter(self, queryset):
+        """Filter on created_at's local date and, optionally, status"""
+        data = self.cleaned_data
+        if data.get('date_from'):
+            queryset = queryset.filter(created_at__date__gte=data['date_from'])
+        if data.get('date_to'):
+            queryset = queryset.filter(created_at__date__lte=data['date_to'])
+        if data.get('status'):
+            queryset = queryset.filter(status=data['status'])
+        return queryset
+
+
+class AnalyticsRangeForm(forms.Form):
+    """Date range for the farmer analytics page, defaulting to the last 90 days"""
+    DEFAULT_DAYS = 90
+    # Ten years of daily facts is still only a few thousand rows per produce
+    MAX_DAYS = 3660
+    
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+    
+    def clean(self):
+        data = super().clean()
+        today = timezone.localdate()
+        end = data.get('date_to') or today
+        start = data.get('date_from') or end - datetime.timedelta(days=self.DEFAULT_DAYS - 1)
+        if start > end:
+            raise forms.ValidationError('The start date must not be after the end date.')
+        if (end - start).days >= self.MAX_DAYS:
+            raise forms.ValidationError(f'Please choose a range of at most {self.MAX_DAYS} days.')
+        data['date_from'], data['date_to'] = start, end
+        return data
+    
+    def date_range(self):
+        """The cleaned range, or the default one if the input was invalid"""
+        if self.is_valid():
+            return self.cleaned_data['date_from'], self.cleaned_data['date_to']
+        end = timezone.localdate()
+        return end - datetime.timedelta(days=self.DEFAULT_DAYS - 1), end
@@ -0,0 +1,138 @@
+"""
+Streaming bulk import of produce listings.
+
+Files are parsed one row at a time, so memory use does not grow with the file.
+Each row goes through ProduceForm, the same validation the dashboard form
+uses, and valid rows are inserted in ``bulk_create`` batches. A bad row is
+recorded and skipped, and the rest of the file still imports.
+"""
+import csv
+import io
+import json
+
+from django.db import transaction
+
+from . import catalog_cache, market, stats
+from .forms import ProduceForm
+from .models import Produce
+
+FORMATS = ('csv', 'ndjson')
+DEFAULT_BATCH_SIZE = 500
+
+# Keep the report small even if every row of a huge file is bad
+MAX_REPORTED_ERRORS = 100
+
+
+class ImportResult:
+    """What happened to each row of an import."""
+
+    def __init__(self):
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    def as_dict(self):
+        return {'created': self.created, 'failed': self.failed, 'errors': self.errors}
+
+
+def guess_format(filename, default='csv'):
+    """Pick a format from the file extension."""
+    name = (filename or '').lower()
+    if name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    if name.endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def iter_rows(binary_stream, fmt):
+    """
+    Yield ``(line_number, row)`` pairs from a binary file object.
+
+    ``row`` is a dict of field values, or an error string for a line that
+    could not be parsed at all.
+    """
+    text = io.TextIOWrapper(binary_stream, encoding='utf-8-sig', errors='replace', newline='')
+
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            # DictReader puts surplus columns under the None key
+            row.pop(None, None)
+            yield reader.line_num, {key.strip(): value for key, value in row.items() if key}
+    elif fmt == 'ndjson':
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield line_number, 'Line is not valid JSON.'
+                continue
+            if not isinstance(row, dict):
+                yield line_number, 'Each line must be a JSON object.'
+                continue
+            yield line_number, _text_values(row)
+    else:
+        raise ValueError(f'Unsupported format {fmt!r}; expected one of {", ".join(FORMATS)}.')
+
+
+def _text_values(row):
+    """
+    An NDJSON object with its values as text, like a CSV row; forms expect
+    strings. Nulls, lists and objects make the row an error string.
+    """
+    for key, value in row.items():
+        if value is None or isinstance(value, (list, dict)):
+            return f'{key}: expected a string or a number, got {json.dumps(value)[:40]}.'
+    return {key: str(value) for key, value in row.items()}
+
+
+def _form_errors(form):
+    return '; '.join(
+        f'{field}: {" ".join(messages)}' for field, messages in form.errors.items()
+    )
+
+
+def import_produce(farmer, rows, batch_size=DEFAULT_BATCH_SIZE):
+    """Validate and bulk-insert produce rows for ``farmer``."""
+    result = ImportResult()
+    batch = []
+    expiry_cutoff = Produce.expiry_cutoff()
+
+    def flush():
+        with transaction.atomic():
+            Produce.objects.bulk_create(batch)
+            stats.produce_added(farmer.pk, [produce.status for produce in batch])
+            market.listings_added(farmer.pk, batch)
+            catalog_cache.bump_version()
+        result.created += len(batch)
+        batch.clear()
+
+    for line, row in rows:
+        if isinstance(row, str):
+            result.add_error(line, row)
+            continue
+
+        form = ProduceForm(data=row)
+        if not form.is_valid():
+            result.add_error(line, _form_errors(form))
+            continue
+
+        produce = form.save(commit=False)
+        produce.farmer = farmer
+        produce.status = Produce.status_for_quantity(
+            produce.quantity, expired=produce.availability_date < expiry_cutoff,
+        )
+        batch.append(produce)
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
+    return result
@@ -0,0 +1,209 @@
+"""
+Per-request performance instrumentation.
+
+``PerformanceMiddleware`` records, for a sample of requests, the number of
+SQL queries and the time spent in them (via ``connection.execute_wrapper``),
+the time spent rendering templates (less any queries run while rendering, so
+nothing is counted twice) and the total time through the view. The
+numbers go out as a ``Server-Timing`` header, which browser dev tools show
+under the request's Timing tab, and as one JSON log line on the
+``core.performance`` logger.
+
+Views declare how many queries they are expected to run with
+``@query_budget(n)`` (applied in ``core.urls``); a sampled request that runs
+more logs a warning.
+
+Unsampled requests pay for one random() call and nothing else.
+
+Queries that a view runs on worker threads of its own (see
+``core.async_views``) use those threads' connections; wrap them in
+``record_queries()`` so they are counted too.
+"""
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger('core.performance')
+
+_active = ContextVar('performance_recorder', default=None)
+_render = ContextVar('performance_render', default=None)
+
+
+def query_budget(queries):
+    """Declare the most SQL queries a view should run per request."""
+    def decorator(view_func):
+        view_func.query_budget = queries
+        return view_func
+    return decorator
+
+
+class Recorder:
+    __slots__ = ('queries', 'db_time', 'template_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.db_time += elapsed
+            self.queries += 1
+            render = _render.get()
+            if render is not None:
+                render[0] += elapsed
+
+
+def _wrap_connections(stack, recorder):
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(recorder))
+
+
+@contextmanager
+def record_queries():
+    """Count queries run in this thread against the request being timed, if any."""
+    recorder = _active.get()
+    if recorder is None:
+        yield
+        return
+    with ExitStack() as stack:
+        _wrap_connections(stack, recorder)
+        yield
+
+
+class _TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        recorder = _active.get()
+        if recorder is None or _render.get() is not None:
+            return super().render(context, request)
+        # Queries this render runs (lazy querysets) add up here, to leave them
+        # out of the render time; other threads rendering keep their own
+        render_db_time = [0.0]
+        token = _render.set(render_db_time)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            _render.reset(token)
+            recorder.template_time += time.perf_counter() - start - render_db_time[0]
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    The standard Django template backend, timing each top-level render.
+
+    ``{% include %}`` and ``{% extends %}`` render inside the outer template,
+    and a template rendered while another one is (``render_to_string`` in a
+    template tag, say) is part of the outer render, so nothing is counted
+    twice.
+    """
+
+    def from_string(self, template_code):
+        return _TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name).template, self)
+
+
+class PerformanceMiddleware:
+    """
+    Works under WSGI and ASGI. On the async path the connections of the
+    thread running the request's sync code (middleware, views, sessions) are
+    wrapped from that thread, so the middleware itself never blocks the
+    event loop and costs no thread hop on unsampled requests.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PERFORMANCE_SAMPLE_RATE', 0.0)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        return self.sample_rate and random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        recorder = Recorder()
+        token = _active.set(recorder)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                _wrap_connections(stack, recorder)
+                response = self.get_response(request)
+        finally:
+            _active.reset(token)
+        self.report(request, response, recorder, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        recorder = Recorder()
+        token = _active.set(recorder)
+        start = time.perf_counter()
+        stack = ExitStack()
+        try:
+            # Same thread as the request's other sync_to_async calls
+            await sync_to_async(_wrap_connections)(stack, recorder)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        finally:
+            _active.reset(token)
+        self.report(request, response, recorder, time.perf_counter() - start)
+        return response
+
+    def report(self, request, response, recorder, total):
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={recorder.db_time * 1000:.2f};desc="{recorder.queries} queries"',
+            f'tpl;dur={recorder.template_time * 1000:.2f}',
+            f'app;dur={(total - recorder.db_time - recorder.template_time) * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ])
+        self.log(request, response, recorder, total)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_budget = getattr(view_func, 'query_budget', None)
+        return None
+
+    def log(self, request, response, recorder, total):
+        match = request.resolver_match
+        view = match.view_name if match else None
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'status': response.status_code,
+            'queries': recorder.queries,
+            'db_ms': round(recorder.db_time * 1000, 2),
+            'template_ms': round(recorder.template_time * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+        }, separators=(',', ':')))
+
+        budget = getattr(request, '_query_budget', None)
+        if budget is not None and recorder.queries > budget:
+            logger.warning(
+                '%s ran %d queries, over its budget of %d', view, recorder.queries, budget,
+            )
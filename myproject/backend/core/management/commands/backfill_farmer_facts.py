@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import facts
+
+
+class Command(BaseCommand):
+    help = "Rebuild the farmers' daily order facts from every order."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Fact rows inserted per query (default: 1000).')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        written = facts.rebuild(batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} farmer fact row(s) in {elapsed:.1f}s.'))
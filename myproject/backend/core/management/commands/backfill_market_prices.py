@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import market
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the market price rollups from every listing and accepted order.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rollup rows inserted per query (default: 1000).')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        written = market.rebuild(batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} market price row(s) in {elapsed:.1f}s.'))
@@ -0,0 +1,168 @@
+import datetime
+import json
+import logging
+import platform
+import re
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core import facts
+from core.benchmarking import Stopwatch, scratch_database, summarize
+from core.models import FarmerDailyFact, Order, User
+from core.seeding import Seeder
+
+from .bench_views import BENCH_SETTINGS, FAST_HASHER, git_commit
+
+RANGES = [30, 90, 365]
+
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+SERVER_TIMING_DB = re.compile(r'db;dur=([\d.]+)')
+SERVER_TIMING_TPL = re.compile(r'tpl;dur=([\d.]+)')
+
+
+def from_orders(farmer_id, start, end):
+    """What the page would have to run without the facts: the same figures from the orders."""
+    orders = Order.objects.filter(farmer_id=farmer_id)
+    placed = list(
+        orders.filter(created_at__date__range=(start, end))
+        .values(day=TruncDate('created_at')).annotate(n=Count('id')).order_by('day')
+    )
+    decided = list(
+        orders.filter(updated_at__date__range=(start, end), status__in=('accepted', 'completed', 'rejected'))
+        .values('produce__name', day=TruncDate('updated_at'))
+        .annotate(
+            accepted=Count('id', filter=~Q(status='rejected')),
+            rejected=Count('id', filter=Q(status='rejected')),
+            volume_kg=Sum('quantity_requested', filter=~Q(status='rejected')),
+            revenue=Sum('total_price', filter=~Q(status='rejected')),
+        ).order_by('day')
+    )
+    return placed, decided
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the farmer analytics page over growing date ranges against a '
+        'year of seeded orders, next to the same figures aggregated from the '
+        'orders themselves, and write the results to JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=100_000,
+                            help='Orders to seed over the past year.')
+        parser.add_argument('--farmers', type=int, default=10)
+        parser.add_argument('--iterations', type=int, default=50, help='Timed requests per range.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', default='bench_analytics.json')
+
+    def handle(self, *args, **options):
+        perf_logger = logging.getLogger('core.performance')
+        level = perf_logger.level
+        perf_logger.setLevel(logging.WARNING)
+        try:
+            with override_settings(**BENCH_SETTINGS, PASSWORD_HASHERS=FAST_HASHER):
+                results = self.run(options)
+        finally:
+            perf_logger.setLevel(level)
+
+        report = {
+            'commit': git_commit(),
+            'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'orders': options['orders'],
+            'iterations': options['iterations'],
+            **results,
+        }
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+
+        self.print_table(report)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def run(self, options):
+        orders = options['orders']
+        self.stdout.write(f'Seeding {orders} orders over a year ...')
+        with scratch_database():
+            Seeder(seed=options['seed'], days=365).run(
+                farmers=options['farmers'], restaurants=max(5, orders // 200),
+                produce_per_farmer=20, orders=orders,
+            )
+            farmer = (
+                User.objects.filter(role='farmer')
+                .annotate(n=Count('received_orders')).order_by('-n', 'pk').first()
+            )
+            with Stopwatch() as sw:
+                rows = facts.rebuild()
+            client = Client()
+            client.force_login(farmer)
+            today = timezone.localdate()
+
+            ranges = []
+            for days in RANGES:
+                start = today - datetime.timedelta(days=days - 1)
+                ranges.append({
+                    'days': days,
+                    'grain': facts.grain_for(start, today),
+                    'page': self.time_page(client, start, today, options),
+                    'from_orders': self.time(lambda: from_orders(farmer.pk, start, today), options),
+                })
+            return {
+                'farmer_orders': Order.objects.filter(farmer=farmer).count(),
+                'farmer_facts': FarmerDailyFact.objects.filter(farmer=farmer).count(),
+                'fact_rows': rows,
+                'rebuild_s': round(sw.elapsed, 3),
+                'ranges': ranges,
+            }
+
+    def time_page(self, client, start, end, options):
+        url = reverse('farmer_analytics')
+        params = {'date_from': start.isoformat(), 'date_to': end.isoformat()}
+        timings = []
+
+        def get():
+            response = client.get(url, params)
+            if response.status_code != 200:
+                raise CommandError(f'farmer_analytics returned HTTP {response.status_code}')
+            timings.append(response['Server-Timing'])
+
+        result = self.time(get, options)
+        # The view may read from the replica alias, so count from the page's own timing header
+        last = timings[-1]
+        result['queries'] = int(SERVER_TIMING_QUERIES.search(last).group(1))
+        result['db'] = summarize([float(SERVER_TIMING_DB.search(t).group(1)) / 1000 for t in timings])
+        result['render'] = summarize([float(SERVER_TIMING_TPL.search(t).group(1)) / 1000 for t in timings])
+        return result
+
+    def time(self, fn, options):
+        fn()
+        samples = []
+        for _ in range(options['iterations']):
+            with Stopwatch() as sw:
+                fn()
+            samples.append(sw.elapsed)
+        return summarize(samples)
+
+    def print_table(self, report):
+        self.stdout.write(
+            f"{report['farmer_orders']} orders for the busiest farmer, {report['farmer_facts']} fact rows; "
+            f"rebuilt {report['fact_rows']} rows in {report['rebuild_s']:.1f}s"
+        )
+        self.stdout.write(
+            f"{'days':>5} {'grain':<6} {'queries':>8} {'page p50 ms':>12} {'page p99 ms':>12} "
+            f"{'db ms':>7} {'render ms':>10} {'orders p50 ms':>14}"
+        )
+        for r in report['ranges']:
+            page = r['page']
+            self.stdout.write(
+                f"{r['days']:>5} {r['grain']:<6} {page['queries']:>8} {page['p50_ms']:>12.2f} {page['p99_ms']:>12.2f} "
+                f"{page['db']['p50_ms']:>7.2f} {page['render']['p50_ms']:>10.2f} {r['from_orders']['p50_ms']:>14.2f}"
+            )
@@ -0,0 +1,174 @@
+import asyncio
+import datetime
+import json
+import logging
+import platform
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.db.models import Count
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+
+from core.benchmarking import Stopwatch, scratch_database, summarize
+from core.models import User
+from core.seeding import Seeder
+
+from .bench_views import BENCH_SETTINGS, FAST_HASHER, git_commit
+
+# View name -> (WSGI route, ASGI route)
+DASHBOARDS = {
+    'farmer_dashboard': ('farmer_dashboard', 'farmer_dashboard_async'),
+    'restaurant_dashboard': ('restaurant_dashboard', 'restaurant_dashboard_async'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the sync dashboards through the WSGI handler with their async '
+        'variants through the ASGI handler, under concurrent load on a scratch '
+        'database, and write the results to JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=10000,
+                            help='Orders to seed; farmers and restaurants scale with them.')
+        parser.add_argument('--concurrency', default='1,8,32',
+                            help='Comma-separated numbers of requests kept in flight.')
+        parser.add_argument('--requests', type=int, default=400, help='Timed requests per view, mode and level.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', default='bench_asgi.json')
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(c) for c in options['concurrency'].split(',') if c.strip()]
+        except ValueError:
+            raise CommandError('--concurrency must be comma-separated integers.')
+
+        perf_logger = logging.getLogger('core.performance')
+        level = perf_logger.level
+        perf_logger.setLevel(logging.WARNING)
+        try:
+            with override_settings(**BENCH_SETTINGS, PASSWORD_HASHERS=FAST_HASHER):
+                results = self.run(levels, options)
+        finally:
+            perf_logger.setLevel(level)
+
+        report = {
+            'commit': git_commit(),
+            'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'orders': options['orders'],
+            'requests': options['requests'],
+            'results': results,
+        }
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+
+        self.print_table(results)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def run(self, levels, options):
+        orders = options['orders']
+        self.stdout.write(f'Seeding {orders} orders ...')
+        results = []
+        with scratch_database():
+            users = Seeder(seed=options['seed']).run(
+                farmers=max(10, orders // 100), restaurants=max(5, orders // 200),
+                produce_per_farmer=10, orders=orders,
+            )
+            farmer = (
+                User.objects.filter(role='farmer')
+                .annotate(n=Count('received_orders')).order_by('-n', 'pk').first()
+            )
+            logins = {
+                'farmer_dashboard': self.session_cookie(farmer),
+                'restaurant_dashboard': self.session_cookie(users['restaurants'][0]),
+            }
+            # Seeding ran in this thread; let the load threads open their own
+            close_old_connections()
+            for name, (wsgi_route, asgi_route) in DASHBOARDS.items():
+                for concurrency in levels:
+                    cookies = logins[name]
+                    results.append({
+                        'view': name, 'concurrency': concurrency,
+                        'wsgi': self.wsgi_load(reverse(wsgi_route), cookies, concurrency, options['requests']),
+                        'asgi': asyncio.run(
+                            self.asgi_load(reverse(asgi_route), cookies, concurrency, options['requests'])
+                        ),
+                    })
+        return results
+
+    def session_cookie(self, user):
+        client = Client()
+        client.force_login(user)
+        return {key: morsel.value for key, morsel in client.cookies.items()}
+
+    def wsgi_load(self, url, cookies, concurrency, total):
+        """``total`` GETs from ``concurrency`` threads, as a threaded WSGI server would run them."""
+        local = threading.local()
+
+        def get(_):
+            if not hasattr(local, 'client'):
+                local.client = Client()
+                local.client.cookies.load(cookies)
+            with Stopwatch() as sw:
+                response = local.client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f'{url} returned HTTP {response.status_code}')
+            return sw.elapsed
+
+        with ThreadPoolExecutor(concurrency) as pool:
+            list(pool.map(get, range(concurrency)))  # warm every thread's connection
+            start = time.perf_counter()
+            samples = list(pool.map(get, range(total)))
+            elapsed = time.perf_counter() - start
+        return summarize(samples, elapsed)
+
+    async def asgi_load(self, url, cookies, concurrency, total):
+        """``total`` GETs from ``concurrency`` tasks sharing one event loop."""
+        client = AsyncClient()
+        client.cookies.load(cookies)
+        queue = asyncio.Queue()
+        samples = []
+
+        async def worker():
+            while not queue.empty():
+                queue.get_nowait()
+                with Stopwatch() as sw:
+                    response = await client.get(url)
+                if response.status_code != 200:
+                    raise CommandError(f'{url} returned HTTP {response.status_code}')
+                samples.append(sw.elapsed)
+
+        for _ in range(concurrency):
+            queue.put_nowait(None)
+        await asyncio.gather(*(worker() for _ in range(concurrency)))  # warmup
+        samples.clear()
+
+        for _ in range(total):
+            queue.put_nowait(None)
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        await sync_to_async(close_old_connections)()
+        return summarize(samples, elapsed)
+
+    def print_table(self, results):
+        self.stdout.write(
+            f"{'view':<22} {'conc':>5} {'mode':<5} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>8}"
+        )
+        for r in results:
+            for mode in ('wsgi', 'asgi'):
+                s = r[mode]
+                self.stdout.write(
+                    f"{r['view']:<22} {r['concurrency']:>5} {mode:<5} "
+                    f"{s['p50_ms']:>8.2f} {s['p99_ms']:>8.2f} {s['per_second']:>8.1f}"
+                )
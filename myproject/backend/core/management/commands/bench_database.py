@@ -0,0 +1,213 @@
+import datetime
+import json
+import logging
+import platform
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections, connection, connections
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.benchmarking import Stopwatch, scratch_database, summarize
+from core.models import Produce, User
+from core.orders import place_order
+from core.seeding import Seeder
+
+from .bench_views import BENCH_SETTINGS, FAST_HASHER, git_commit
+
+# name -> (CONN_MAX_AGE, apply SQLITE_PRAGMAS)
+CONFIGURATIONS = {
+    'per_request': (0, False),
+    'persistent': (600, False),
+    'persistent_tuned': (600, True),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Run the order flow (supply requests and acceptances) against concurrent '
+        'dashboard reads under each database configuration: a connection per '
+        'request, persistent connections, and persistent connections with the '
+        'SQLITE_PRAGMAS tuning. Writes latency, throughput and errors to JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=5000,
+                            help='Orders to seed; farmers and restaurants scale with them.')
+        parser.add_argument('--writers', type=int, default=4,
+                            help='Threads each alternating a supply request and an acceptance.')
+        parser.add_argument('--readers', type=int, default=4,
+                            help='Threads loading the restaurant dashboard.')
+        parser.add_argument('--requests', type=int, default=100, help='Requests per thread.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', default='bench_database.json')
+
+    def handle(self, *args, **options):
+        if options['writers'] < 1 or options['readers'] < 0:
+            raise CommandError('Need at least one writer and a non-negative number of readers.')
+
+        configurations = dict(CONFIGURATIONS)
+        if connection.vendor != 'sqlite':
+            configurations.pop('persistent_tuned')  # the pragmas only apply to SQLite
+
+        perf_logger = logging.getLogger('core.performance')
+        level = perf_logger.level
+        perf_logger.setLevel(logging.WARNING)
+        try:
+            with override_settings(**BENCH_SETTINGS, PASSWORD_HASHERS=FAST_HASHER):
+                results = [
+                    self.run_configuration(name, max_age, tuned, options)
+                    for name, (max_age, tuned) in configurations.items()
+                ]
+        finally:
+            perf_logger.setLevel(level)
+
+        report = {
+            'commit': git_commit(),
+            'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'orders': options['orders'],
+            'writers': options['writers'],
+            'readers': options['readers'],
+            'requests': options['requests'],
+            'results': results,
+        }
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+
+        self.print_table(results)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def run_configuration(self, name, max_age, tuned, options):
+        self.stdout.write(f'{name}: seeding {options["orders"]} orders ...')
+        pragmas = settings.SQLITE_PRAGMAS if tuned else {}
+        if tuned and not pragmas:
+            raise CommandError('SQLITE_PRAGMAS is empty; unset SQLITE_TUNING=false to compare it.')
+
+        # Every thread's connection is built from this shared settings dict
+        db_settings = connection.settings_dict
+        old_max_age = db_settings['CONN_MAX_AGE']
+        db_settings['CONN_MAX_AGE'] = max_age
+        try:
+            with override_settings(SQLITE_PRAGMAS=pragmas), scratch_database():
+                Seeder(seed=options['seed']).run(
+                    farmers=max(10, options['orders'] // 100),
+                    restaurants=max(5, options['orders'] // 200),
+                    produce_per_farmer=10, orders=options['orders'],
+                )
+                samples, errors, elapsed = self.load(options)
+                journal_mode = self.journal_mode()
+                close_old_connections()
+        finally:
+            db_settings['CONN_MAX_AGE'] = old_max_age
+
+        return {
+            'configuration': name,
+            'conn_max_age': max_age,
+            'pragmas': pragmas,
+            'journal_mode': journal_mode,
+            'seconds': round(elapsed, 2),
+            'ops': {
+                op: {**summarize(samples[op], elapsed), 'errors': errors[op]}
+                for op in sorted(samples.keys() | errors.keys())
+            },
+        }
+
+    def journal_mode(self):
+        if connection.vendor != 'sqlite':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            return cursor.fetchone()[0]
+
+    def load(self, options):
+        farmer = (
+            User.objects.filter(role='farmer')
+            .annotate(n=Count('received_orders')).order_by('-n', 'pk').first()
+        )
+        restaurant = User.objects.filter(role='restaurant').order_by('pk').first()
+        total = options['writers'] * options['requests']
+        listing = Produce.objects.create(
+            farmer=farmer, name='Benchmark Tomatoes', quantity=Decimal(total * 10),
+            price_per_kg=Decimal('40'), availability_date=datetime.date.today(),
+        )
+        # Acceptances work through orders placed up front, one list per writer
+        pending = [place_order(restaurant, listing, Decimal('1')).pk for _ in range(total)]
+        close_old_connections()
+
+        supply_url = reverse('request_supply', args=[listing.pk])
+        dashboard_url = reverse('restaurant_dashboard')
+        samples, errors = defaultdict(list), Counter()
+        lock = threading.Lock()
+
+        def timed(op, call):
+            failed = False
+            with Stopwatch() as sw:
+                try:
+                    response = call()
+                    if response.status_code >= 400:
+                        raise CommandError(f'{op} returned HTTP {response.status_code}')
+                except DatabaseError:  # e.g. "database is locked"
+                    failed = True
+                # The test client skips the request_finished handler that
+                # closes or keeps connections according to CONN_MAX_AGE
+                close_old_connections()
+            with lock:
+                if failed:
+                    errors[op] += 1
+                else:
+                    samples[op].append(sw.elapsed)
+
+        def writer(orders):
+            restaurant_client, farmer_client = Client(), Client()
+            restaurant_client.force_login(restaurant)
+            farmer_client.force_login(farmer)
+            try:
+                for order_id in orders:
+                    timed('request_supply', lambda: restaurant_client.post(supply_url, {'quantity': '1'}))
+                    accept_url = reverse('update_order_status', args=[order_id, 'accepted'])
+                    timed('accept_order', lambda: farmer_client.get(accept_url))
+            finally:
+                connections.close_all()
+
+        def reader():
+            client = Client()
+            client.force_login(restaurant)
+            try:
+                for _ in range(options['requests']):
+                    timed('restaurant_dashboard', lambda: client.get(dashboard_url))
+            finally:
+                connections.close_all()
+
+        per_writer = options['requests']
+        with ThreadPoolExecutor(options['writers'] + options['readers']) as pool:
+            start = time.perf_counter()
+            futures = [
+                pool.submit(writer, pending[i * per_writer:(i + 1) * per_writer])
+                for i in range(options['writers'])
+            ] + [pool.submit(reader) for _ in range(options['readers'])]
+            for future in futures:
+                future.result()
+            elapsed = time.perf_counter() - start
+        return samples, errors, elapsed
+
+    def print_table(self, results):
+        self.stdout.write(
+            f"{'configuration':<18} {'op':<22} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>8} {'errors':>7}"
+        )
+        for r in results:
+            for op, s in r['ops'].items():
+                self.stdout.write(
+                    f"{r['configuration']:<18} {op:<22} {s['p50_ms']:>8.2f} {s['p99_ms']:>8.2f} "
+                    f"{s.get('per_second', 0):>8.1f} {s['errors']:>7}"
+                )
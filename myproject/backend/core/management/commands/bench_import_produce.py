@@ -0,0 +1,90 @@
+import csv
+import datetime
+import os
+import random
+import tempfile
+
+from django.core.management.base import BaseCommand
+
+from core import importers
+from core.benchmarking import Stopwatch, scratch_database
+from core.forms import ProduceForm
+from core.models import Produce, User
+
+NAMES = ['Tomatoes', 'Potatoes', 'Onions', 'Carrots', 'Spinach', 'Cabbage', 'Okra', 'Brinjal']
+
+
+def write_csv(path, rows, seed):
+    """A produce file with roughly one bad row in a hundred."""
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['name', 'quantity', 'price_per_kg', 'availability_date', 'contact_number'])
+        for i in range(rows):
+            quantity = rng.randint(10, 500) if rng.random() > 0.01 else 'lots'
+            writer.writerow([
+                rng.choice(NAMES),
+                quantity,
+                f'{rng.uniform(10, 120):.2f}',
+                (today + datetime.timedelta(days=rng.randint(0, 30))).isoformat(),
+                f'+91 98{i % 100000000:08d}',
+            ])
+
+
+def per_row_import(farmer, path, limit):
+    """
+    What add_produce does, once per row: validate, then save(). Counts every
+    row read, rejected ones included, like the bulk import's created + failed.
+    """
+    seen = 0
+    with open(path, 'rb') as f:
+        for line, row in importers.iter_rows(f, 'csv'):
+            if seen >= limit:
+                break
+            seen += 1
+            form = ProduceForm(data=row)
+            if form.is_valid():
+                produce = form.save(commit=False)
+                produce.farmer = farmer
+                produce.save()
+    return seen
+
+
+class Command(BaseCommand):
+    help = 'Compare the streaming bulk produce import with one save() per row.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000)
+        parser.add_argument('--per-row-rows', type=int, default=10_000,
+                            help='Rows to time on the slow per-row path; its total is projected.')
+        parser.add_argument('--batch-size', type=int, default=importers.DEFAULT_BATCH_SIZE)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        with tempfile.TemporaryDirectory() as tmp, scratch_database():
+            path = os.path.join(tmp, 'produce.csv')
+            write_csv(path, rows, options['seed'])
+            farmer = User.objects.create_user(username='bench-farmer', password=None, role='farmer')
+
+            with Stopwatch() as slow:
+                slow_rows = per_row_import(farmer, path, options['per_row_rows'])
+            Produce.objects.all().delete()
+
+            with Stopwatch() as fast, open(path, 'rb') as f:
+                result = importers.import_produce(
+                    farmer, importers.iter_rows(f, 'csv'), batch_size=options['batch_size'],
+                )
+
+        slow_rate = slow_rows / slow.elapsed
+        fast_rate = (result.created + result.failed) / fast.elapsed
+        self.stdout.write(
+            f'per-row save(): {slow_rate:>9.0f} rows/s '
+            f'({slow_rows} rows timed, ~{rows / slow_rate:.1f}s projected for {rows})'
+        )
+        self.stdout.write(
+            f'bulk import:    {fast_rate:>9.0f} rows/s '
+            f'({result.created} created, {result.failed} rejected in {fast.elapsed:.1f}s)'
+        )
+        self.stdout.write(self.style.SUCCESS(f'Speed-up: {fast_rate / slow_rate:.1f}x'))
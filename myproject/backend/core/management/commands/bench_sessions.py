@@ -0,0 +1,138 @@
+import datetime
+import json
+import logging
+import platform
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.benchmarking import Stopwatch, scratch_database, summarize
+from core.models import User
+from core.seeding import Seeder
+
+from .bench_views import BENCH_SETTINGS, FAST_HASHER, git_commit
+
+SCENARIOS = ['farmer_dashboard', 'restaurant_dashboard', 'add_produce']
+
+
+class Command(BaseCommand):
+    help = (
+        'Count the database round-trips, and the session queries among them, '
+        'that each dashboard hit costs under every SESSION_STORE, and write '
+        'the results to JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=5000,
+                            help='Orders to seed; farmers and restaurants scale with them.')
+        parser.add_argument('--iterations', type=int, default=50, help='Timed requests per scenario and store.')
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', default='bench_sessions.json')
+
+    def handle(self, *args, **options):
+        perf_logger = logging.getLogger('core.performance')
+        level = perf_logger.level
+        perf_logger.setLevel(logging.WARNING)
+        try:
+            with override_settings(**BENCH_SETTINGS, PASSWORD_HASHERS=FAST_HASHER):
+                results = self.run(options)
+        finally:
+            perf_logger.setLevel(level)
+
+        report = {
+            'commit': git_commit(),
+            'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'cache': settings.CACHES['default']['BACKEND'],
+            'message_storage': settings.MESSAGE_STORAGE,
+            'orders': options['orders'],
+            'iterations': options['iterations'],
+            'results': results,
+        }
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+
+        self.print_table(results)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def run(self, options):
+        orders = options['orders']
+        self.stdout.write(f'Seeding {orders} orders ...')
+        results = []
+        with scratch_database():
+            users = Seeder(seed=options['seed']).run(
+                farmers=max(10, orders // 100), restaurants=max(5, orders // 200),
+                produce_per_farmer=10, orders=orders,
+            )
+            farmer = (
+                User.objects.filter(role='farmer')
+                .annotate(n=Count('received_orders')).order_by('-n', 'pk').first()
+            )
+            restaurant = users['restaurants'][0]
+            for store, engine in settings.SESSION_ENGINES.items():
+                with override_settings(SESSION_ENGINE=engine):
+                    cache.clear()
+                    results.append({
+                        'store': store,
+                        'scenarios': self.time_store(farmer, restaurant, options),
+                    })
+        return results
+
+    def time_store(self, farmer, restaurant, options):
+        # Clients are built after the override so their SessionMiddleware uses it
+        farmer_client, restaurant_client = Client(), Client()
+        farmer_client.force_login(farmer)
+        restaurant_client.force_login(restaurant)
+        farmer_url, restaurant_url = reverse('farmer_dashboard'), reverse('restaurant_dashboard')
+        add_url = reverse('add_produce')
+        listing = {
+            'name': 'Benchmark Okra', 'quantity': '100', 'price_per_kg': '30',
+            'availability_date': datetime.date.today().isoformat(), 'contact_number': '',
+        }
+        requests = {
+            'farmer_dashboard': lambda: farmer_client.get(farmer_url),
+            'restaurant_dashboard': lambda: restaurant_client.get(restaurant_url),
+            # Sets a flash message, then shows it on the dashboard it redirects to
+            'add_produce': lambda: farmer_client.post(add_url, listing, follow=True),
+        }
+
+        scenarios = {}
+        for name in SCENARIOS:
+            samples, queries, session_queries = [], [], []
+            for i in range(options['warmup'] + options['iterations']):
+                with CaptureQueriesContext(connection) as ctx, Stopwatch() as sw:
+                    response = requests[name]()
+                if response.status_code >= 400:
+                    raise CommandError(f'{name} returned HTTP {response.status_code}')
+                if i < options['warmup']:
+                    continue
+                samples.append(sw.elapsed)
+                queries.append(len(ctx.captured_queries))
+                session_queries.append(sum('django_session' in q['sql'] for q in ctx.captured_queries))
+            scenarios[name] = {
+                **summarize(samples),
+                'queries': round(sum(queries) / len(queries), 2),
+                'session_queries': round(sum(session_queries) / len(session_queries), 2),
+            }
+        return scenarios
+
+    def print_table(self, results):
+        self.stdout.write(
+            f"{'store':<15} {'scenario':<22} {'queries':>8} {'session':>8} {'p50 ms':>8} {'p99 ms':>8}"
+        )
+        for r in results:
+            for name, s in r['scenarios'].items():
+                self.stdout.write(
+                    f"{r['store']:<15} {name:<22} {s['queries']:>8} {s['session_queries']:>8} "
+                    f"{s['p50_ms']:>8.2f} {s['p99_ms']:>8.2f}"
+                )
@@ -0,0 +1,164 @@
+import copy
+import datetime
+import json
+import logging
+import platform
+import re
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.template import engines
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core import warmup
+from core.benchmarking import Stopwatch, scratch_database, summarize
+from core.models import User
+from core.seeding import Seeder
+
+from .bench_views import BENCH_SETTINGS, FAST_HASHER, git_commit
+
+SERVER_TIMING_TPL = re.compile(r'tpl;dur=([\d.]+)')
+
+PAGES = {
+    'farmer_dashboard': 'farmer_dashboard.html',
+    'restaurant_dashboard': 'restaurant_dashboard.html',
+}
+
+# name -> (template loaders, compile at boot)
+CONFIGURATIONS = {
+    'uncached': (settings.TEMPLATE_LOADERS, False),
+    'cached': ([('django.template.loaders.cached.Loader', settings.TEMPLATE_LOADERS)], False),
+    'cached_warm': ([('django.template.loaders.cached.Loader', settings.TEMPLATE_LOADERS)], True),
+}
+
+
+def templates_with(loaders):
+    templates = copy.deepcopy(settings.TEMPLATES)
+    templates[0]['OPTIONS']['loaders'] = loaders
+    return templates
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the dashboards with templates parsed on every render, kept by the '
+        'cached loader, and also compiled at boot (core.warmup): the first '
+        'request of a fresh worker, steady-state requests and template loading '
+        'alone. Writes the results to JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=5000,
+                            help='Orders to seed; farmers and restaurants scale with them.')
+        parser.add_argument('--iterations', type=int, default=100, help='Timed requests per page and configuration.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', default='bench_templates.json')
+
+    def handle(self, *args, **options):
+        perf_logger = logging.getLogger('core.performance')
+        level = perf_logger.level
+        perf_logger.setLevel(logging.WARNING)
+        try:
+            with override_settings(**BENCH_SETTINGS, PASSWORD_HASHERS=FAST_HASHER):
+                results = self.run(options)
+        finally:
+            perf_logger.setLevel(level)
+
+        report = {
+            'commit': git_commit(),
+            'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'orders': options['orders'],
+            'iterations': options['iterations'],
+            'results': results,
+        }
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+
+        self.print_table(results)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def run(self, options):
+        orders = options['orders']
+        self.stdout.write(f'Seeding {orders} orders ...')
+        results = []
+        with scratch_database():
+            users = Seeder(seed=options['seed']).run(
+                farmers=max(10, orders // 100), restaurants=max(5, orders // 200),
+                produce_per_farmer=10, orders=orders,
+            )
+            farmer = (
+                User.objects.filter(role='farmer')
+                .annotate(n=Count('received_orders')).order_by('-n', 'pk').first()
+            )
+            clients = {'farmer_dashboard': Client(), 'restaurant_dashboard': Client()}
+            clients['farmer_dashboard'].force_login(farmer)
+            clients['restaurant_dashboard'].force_login(users['restaurants'][0])
+
+            for name, (loaders, compile_at_boot) in CONFIGURATIONS.items():
+                # A fresh engine per configuration, as in a newly started worker
+                with override_settings(TEMPLATES=templates_with(loaders)):
+                    with Stopwatch() as boot:
+                        if compile_at_boot:
+                            warmup.compile_templates()
+                    results.append({
+                        'configuration': name,
+                        'boot_ms': round(boot.elapsed * 1000, 3),
+                        'pages': {
+                            page: self.time_page(clients[page], page, template, options)
+                            for page, template in PAGES.items()
+                        },
+                    })
+        return results
+
+    def time_page(self, client, page, template, options):
+        url = reverse(page)
+
+        renders = []
+
+        def get():
+            with Stopwatch() as sw:
+                response = client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f'{page} returned HTTP {response.status_code}')
+            # Rendering, including {% include %}d templates; loading the page's
+            # own template happens before it and is timed separately below
+            renders.append(float(SERVER_TIMING_TPL.search(response['Server-Timing']).group(1)) / 1000)
+            return sw.elapsed
+
+        first = get()
+        first_render = renders.pop()
+        requests = [get() for _ in range(options['iterations'])]
+
+        engine = engines.all()[0]
+        loads = []
+        for _ in range(options['iterations']):
+            with Stopwatch() as sw:
+                engine.get_template(template)
+            loads.append(sw.elapsed)
+
+        return {
+            'first_request_ms': round(first * 1000, 3),
+            'first_render_ms': round(first_render * 1000, 3),
+            'requests': summarize(requests),
+            'template_load': summarize(loads),
+            'render': summarize(renders),
+        }
+
+    def print_table(self, results):
+        self.stdout.write(
+            f"{'configuration':<14} {'page':<22} {'boot ms':>8} {'first ms':>9} "
+            f"{'p50 ms':>8} {'p99 ms':>8} {'load ms':>8} {'render ms':>10}"
+        )
+        for r in results:
+            for page, p in r['pages'].items():
+                self.stdout.write(
+                    f"{r['configuration']:<14} {page:<22} {r['boot_ms']:>8.2f} {p['first_request_ms']:>9.2f} "
+                    f"{p['requests']['p50_ms']:>8.2f} {p['requests']['p99_ms']:>8.2f} "
+                    f"{p['template_load']['p50_ms']:>8.3f} {p['render']['p50_ms']:>10.2f}"
+                )
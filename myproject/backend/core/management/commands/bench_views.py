@@ -0,0 +1,226 @@
+import datetime
+import json
+import logging
+import platform
+import random
+import re
+import subprocess
+from decimal import Decimal
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.benchmarking import Stopwatch, scratch_database, summarize
+from core.models import Produce, User
+from core.orders import place_order
+from core.seeding import SEED_PASSWORD, Seeder
+
+SCENARIOS = [
+    'farmer_dashboard', 'restaurant_dashboard', 'request_supply',
+    'update_order_status', 'user_login',
+]
+
+# Run the views the way a deployed worker would, minus the things that
+# would stop the test client (host checks, HTTPS redirect, a collected
+# static manifest) and with Server-Timing on for query counts.
+BENCH_SETTINGS = {
+    'DEBUG': False,
+    'ALLOWED_HOSTS': ['testserver'],
+    'SECURE_SSL_REDIRECT': False,
+    'PERFORMANCE_SAMPLE_RATE': 1.0,
+    'STORAGES': {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    },
+}
+FAST_HASHER = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+SERVER_TIMING_DB = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+def git_commit():
+    try:
+        out = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the main views through the test client on scratch databases of '
+        'increasing size and write the results to JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default='1000,10000,100000',
+                            help='Comma-separated order counts; farmers and restaurants scale with them.')
+        parser.add_argument('--iterations', type=int, default=50, help='Timed requests per view and scale.')
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--real-hasher', action='store_true',
+                            help='Log in through the configured password hasher instead of MD5, '
+                                 'so user_login includes the deliberate hashing cost.')
+        parser.add_argument('--output', default='bench_views.json')
+        parser.add_argument('--compare', help='Earlier results file to print p50 changes against.')
+
+    def handle(self, *args, **options):
+        try:
+            scales = [int(s) for s in options['scales'].split(',') if s.strip()]
+        except ValueError:
+            raise CommandError('--scales must be comma-separated integers.')
+
+        overrides = dict(BENCH_SETTINGS)
+        if not options['real_hasher']:
+            overrides['PASSWORD_HASHERS'] = FAST_HASHER
+
+        perf_logger = logging.getLogger('core.performance')
+        level = perf_logger.level
+        perf_logger.setLevel(logging.WARNING)  # keep budget warnings, drop per-request lines
+        try:
+            with override_settings(**overrides):
+                runs = [self.run_scale(orders, options) for orders in scales]
+        finally:
+            perf_logger.setLevel(level)
+
+        report = {
+            'commit': git_commit(),
+            'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'iterations': options['iterations'],
+            'scales': runs,
+        }
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+
+        self.print_table(runs, options['compare'])
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def run_scale(self, orders, options):
+        sizes = {
+            'farmers': max(10, orders // 100),
+            'restaurants': max(5, orders // 200),
+            'produce_per_farmer': 10,
+            'orders': orders,
+        }
+        self.stdout.write(f'Seeding {orders} orders ...')
+        with scratch_database():
+            with Stopwatch() as seeding:
+                users = Seeder(seed=options['seed']).run(**sizes)
+            farmer = (
+                User.objects.filter(role='farmer')
+                .annotate(n=Count('received_orders')).order_by('-n', 'pk').first()
+            )
+            restaurant = users['restaurants'][0]
+            views = {}
+            for name in SCENARIOS:
+                views[name] = self.time_scenario(name, farmer, restaurant, options)
+        return {**sizes, 'seed_seconds': round(seeding.elapsed, 1), 'views': views}
+
+    def time_scenario(self, name, farmer, restaurant, options):
+        client = Client()
+        rng = random.Random(options['seed'])
+        total = options['warmup'] + options['iterations']
+
+        if name == 'farmer_dashboard':
+            client.force_login(farmer)
+            url = reverse('farmer_dashboard')
+            requests = [lambda: client.get(url)] * total
+        elif name == 'restaurant_dashboard':
+            client.force_login(restaurant)
+            url = reverse('restaurant_dashboard')
+            requests = [lambda: client.get(url)] * total
+        elif name == 'request_supply':
+            client.force_login(restaurant)
+            listings = list(
+                Produce.objects.filter(status='available').values_list('pk', flat=True)[:1000]
+            )
+            requests = [
+                (lambda url: lambda: client.post(url, {'quantity': '1'}))(
+                    reverse('request_supply', args=[rng.choice(listings)])
+                )
+                for _ in range(total)
+            ]
+        elif name == 'update_order_status':
+            client.force_login(farmer)
+            listing = self.stocked_listing(farmer, total)
+            pending = [place_order(restaurant, listing, Decimal('1')) for _ in range(total)]
+            requests = [
+                (lambda url: lambda: client.get(url))(
+                    reverse('update_order_status', args=[order.pk, 'accepted'])
+                )
+                for order in pending
+            ]
+        else:  # user_login
+            url = reverse('login')
+            data = {'email': restaurant.email, 'password': SEED_PASSWORD, 'role': 'restaurant'}
+
+            def login():
+                client.cookies.clear()
+                return client.post(url, data)
+            requests = [login] * total
+
+        samples, queries, db_ms = [], [], []
+        for i, request in enumerate(requests):
+            with Stopwatch() as sw:
+                response = request()
+            if response.status_code >= 400:
+                raise CommandError(f'{name} returned HTTP {response.status_code}')
+            if i < options['warmup']:
+                continue
+            samples.append(sw.elapsed)
+            match = SERVER_TIMING_DB.search(response.get('Server-Timing', ''))
+            if match:
+                db_ms.append(float(match.group(1)))
+                queries.append(int(match.group(2)))
+
+        summary = summarize(samples)
+        summary['queries'] = max(queries) if queries else None
+        summary['db_ms'] = round(sum(db_ms) / len(db_ms), 3) if db_ms else None
+        return summary
+
+    def stocked_listing(self, farmer, orders):
+        """One of the farmer's listings with stock for ``orders`` 1 kg accepts."""
+        listing = Produce.objects.filter(
+            farmer=farmer, status='available', quantity__gte=orders + 100,
+        ).first()
+        if listing is None:
+            listing = Produce.objects.create(
+                farmer=farmer, name='Benchmark Tomatoes', quantity=Decimal(orders + 100),
+                price_per_kg=Decimal('40'), availability_date=datetime.date.today(),
+            )
+        return listing
+
+    def print_table(self, runs, compare_path):
+        baseline = {}
+        if compare_path:
+            with open(compare_path) as f:
+                for run in json.load(f)['scales']:
+                    for name, result in run['views'].items():
+                        baseline[run['orders'], name] = result['p50_ms']
+
+        self.stdout.write(
+            f"{'orders':>8} {'view':<22} {'p50 ms':>8} {'p99 ms':>8} {'queries':>8} {'db ms':>7}"
+            + (f" {'vs base':>8}" if baseline else '')
+        )
+        for run in runs:
+            for name, r in run['views'].items():
+                line = (
+                    f"{run['orders']:>8} {name:<22} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+                    f"{r['queries'] if r['queries'] is not None else '-':>8} "
+                    f"{r['db_ms'] if r['db_ms'] is not None else '-':>7}"
+                )
+                before = baseline.get((run['orders'], name))
+                if before:
+                    line += f" {(r['p50_ms'] - before) / before * 100:>+7.1f}%"
+                self.stdout.write(line)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from core.expiry import expire_produce
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute listing statuses from stock and availability date, expiring '
+        'listings older than PRODUCE_EXPIRY_DAYS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Listings (by primary key) updated per transaction (default: 1000).')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report what would change without writing.')
+
+    def handle(self, *args, **options):
+        changed = expire_produce(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        for (old, new), count in sorted(changed.items()):
+            self.stdout.write(f'  {old} -> {new}: {count}')
+        verb = 'Would update' if options['dry_run'] else 'Updated'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {sum(changed.values())} listing status(es).'))
@@ -0,0 +1,111 @@
+import datetime
+import json
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from core import stats, sync
+from core.benchmarking import scratch_database
+from core.forms import CatalogFilterForm
+from core.models import Order, Produce, Tombstone, User
+from core.pagination import KeysetPaginator
+from core.seeding import Seeder
+from core.views import INCOMING_ORDERS_SHOWN
+
+# A plan line that reads a whole table rather than seeking into an index
+FULL_SCAN = {
+    'sqlite': re.compile(r'\bSCAN (?!.*\bUSING (?:COVERING )?INDEX\b)(?!CONSTANT ROW)'),
+    'postgresql': re.compile(r'\bSeq Scan on\b'),
+}
+
+
+def hot_queries(farmer, restaurant):
+    """(label, queryset) for every query a dashboard or login runs per request."""
+    paginator = KeysetPaginator(
+        CatalogFilterForm().filter(
+            Produce.objects.filter(status__in=Produce.CATALOG_STATUSES).select_related('farmer')
+        ),
+        page_size=25,
+    )
+    first_page = paginator.page()
+    email = farmer.email.upper()
+    since = (timezone.now() - datetime.timedelta(days=7), 0)
+    return [
+        ('catalog first page', paginator.ordered()[:26]),
+        ('catalog next page', paginator.ordered().filter(
+            paginator._after(paginator.decode_cursor(first_page.next_cursor)))[:26]),
+        ('farmer listings', Produce.objects.filter(farmer=farmer)),
+        ('farmer incoming orders', Order.objects.filter(farmer=farmer).select_related(
+            'restaurant__restaurant_profile', 'produce',
+        )[:INCOMING_ORDERS_SHOWN]),
+        ('order feed rows', Order.objects.filter(pk__in=[1, 2, 3]).select_related(
+            'restaurant__restaurant_profile', 'farmer', 'produce',
+        )),
+        ('farmer pending orders', Order.objects.filter(farmer=farmer, status='pending')),
+        ('restaurant orders', Order.objects.filter(restaurant=restaurant).select_related('farmer', 'produce')),
+        ('restaurant pending orders', Order.objects.filter(restaurant=restaurant, status='pending')),
+        ('dashboard stats', stats.stats_query(restaurant.pk)),
+        ('login by email or username', User.objects.with_login(email)[:2]),
+        ('session user', User.objects.filter(pk=farmer.pk)),
+        ('check_email', User.objects.with_email(email).values('pk')[:1]),
+        ('sync farmer listings', sync.changed_after(
+            Produce.objects.filter(farmer=farmer), 'updated_at', since, timezone.now(), sync.DEFAULT_LIMIT)),
+        ('sync farmer orders', sync.changed_after(
+            Order.objects.filter(farmer=farmer), 'updated_at', since, timezone.now(), sync.DEFAULT_LIMIT)),
+        ('sync restaurant orders', sync.changed_after(
+            Order.objects.filter(restaurant=restaurant), 'updated_at', since, timezone.now(), sync.DEFAULT_LIMIT)),
+        ('sync tombstones', sync.changed_after(
+            Tombstone.objects.filter(user=farmer), 'deleted_at', since, timezone.now(), sync.DEFAULT_LIMIT)),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed (and ANALYZE) a scratch database, EXPLAIN the hot dashboard and login queries, '
+        'and fail if any of them falls back to a full table scan.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--farmers', type=int, default=200)
+        parser.add_argument('--restaurants', type=int, default=200)
+        parser.add_argument('--produce-per-farmer', type=int, default=20)
+        parser.add_argument('--orders', type=int, default=50_000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Write every plan to this JSON file.')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print each plan.')
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            users = Seeder(seed=options['seed']).run(
+                farmers=options['farmers'],
+                restaurants=options['restaurants'],
+                produce_per_farmer=options['produce_per_farmer'],
+                orders=options['orders'],
+            )
+            full_scan = FULL_SCAN.get(connection.vendor)
+            report = []
+            for label, queryset in hot_queries(users['farmers'][0], users['restaurants'][0]):
+                plan = queryset.explain()
+                scans = [line.strip() for line in plan.splitlines() if full_scan and full_scan.search(line)]
+                report.append({'query': label, 'sql': str(queryset.query), 'plan': plan, 'full_scans': scans})
+
+        failures = [entry for entry in report if entry['full_scans']]
+        for entry in report:
+            mark = self.style.ERROR('SCAN') if entry['full_scans'] else self.style.SUCCESS('ok  ')
+            self.stdout.write(f"{mark} {entry['query']}")
+            if options['verbose_plans'] or entry['full_scans']:
+                for line in entry['plan'].splitlines():
+                    self.stdout.write(f'       {line}')
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({'vendor': connection.vendor, 'queries': report}, f, indent=2)
+            self.stdout.write(f"Plans written to {options['output']}")
+
+        if failures:
+            raise CommandError(
+                'Full table scan in: ' + ', '.join(entry['query'] for entry in failures)
+            )
+        self.stdout.write(self.style.SUCCESS(f'{len(report)} queries use indexes.'))
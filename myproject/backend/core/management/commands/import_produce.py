@@ -0,0 +1,46 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import importers
+from core.models import User
+
+
+class Command(BaseCommand):
+    help = 'Stream produce listings for one farmer from a CSV or NDJSON file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import, or - for stdin.')
+        parser.add_argument('--farmer', required=True, help='Email or username of the farmer.')
+        parser.add_argument('--format', choices=importers.FORMATS,
+                            help='File format (default: guessed from the extension, else csv).')
+        parser.add_argument('--batch-size', type=int, default=importers.DEFAULT_BATCH_SIZE,
+                            help=f'Rows per bulk insert (default: {importers.DEFAULT_BATCH_SIZE}).')
+
+    def handle(self, *args, **options):
+        farmer = (
+            User.objects.filter(role='farmer', email=options['farmer']).first()
+            or User.objects.filter(role='farmer', username=options['farmer']).first()
+        )
+        if farmer is None:
+            raise CommandError(f"No farmer found for {options['farmer']!r}.")
+
+        path = options['path']
+        fmt = options['format'] or importers.guess_format(path)
+        try:
+            stream = sys.stdin.buffer if path == '-' else open(path, 'rb')
+        except OSError as e:
+            raise CommandError(e)
+
+        with stream:
+            result = importers.import_produce(
+                farmer, importers.iter_rows(stream, fmt), batch_size=options['batch_size'],
+            )
+
+        for error in result.errors:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        if result.failed > len(result.errors):
+            self.stderr.write(f'... and {result.failed - len(result.errors)} more bad row(s).')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.created} listing(s); skipped {result.failed} bad row(s).'
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core.sessions import purge_expired_sessions
+
+
+class Command(BaseCommand):
+    help = 'Delete expired sessions in batches (a lock-friendly clearsessions).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Sessions deleted per query (default: 5000).')
+
+    def handle(self, *args, **options):
+        purged = purge_expired_sessions(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} expired session(s).'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from core import stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized dashboard counters from the source tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help='Only rebuild this user id (repeatable). Skips the global row.')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Users rebuilt per batch (default: 1000).')
+
+    def handle(self, *args, **options):
+        user_ids = options['user_ids']
+        written = stats.recompute(
+            user_ids=user_ids,
+            include_global=user_ids is None,
+            batch_size=options['batch_size'],
+        )
+        message = f'Recomputed stats for {written} user(s)'
+        if user_ids is None:
+            message += ' and the global row'
+        self.stdout.write(self.style.SUCCESS(message + '.'))
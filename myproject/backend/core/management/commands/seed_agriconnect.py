@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarking import Stopwatch
+from core.models import User
+from core.seeding import SEED_PASSWORD, Seeder
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the configured database with synthetic farmers, restaurants, '
+        'listings and orders. The same --seed always builds the same data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--farmers', type=int, default=1000)
+        parser.add_argument('--restaurants', type=int, default=500)
+        parser.add_argument('--produce-per-farmer', type=int, default=10)
+        parser.add_argument('--orders', type=int, default=100_000)
+        parser.add_argument('--days', type=int, default=180, help='Spread timestamps over this many days.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefix', default='seed',
+                            help='Username prefix; use a new one to seed the same database twice.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=f'{prefix}-').exists():
+            raise CommandError(f'Accounts prefixed "{prefix}-" already exist; pass a different --prefix.')
+
+        seeder = Seeder(
+            seed=options['seed'],
+            prefix=prefix,
+            days=options['days'],
+            batch_size=options['batch_size'],
+            log=self.stdout.write,
+        )
+        with Stopwatch() as sw:
+            seeder.run(
+                farmers=options['farmers'],
+                restaurants=options['restaurants'],
+                produce_per_farmer=options['produce_per_farmer'],
+                orders=options['orders'],
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded in {sw.elapsed:.1f}s. Log in as {prefix}-farmer0@example.com or '
+            f'{prefix}-restaurant0@example.com with password "{SEED_PASSWORD}".'
+        ))
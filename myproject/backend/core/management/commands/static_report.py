@@ -0,0 +1,134 @@
+import datetime
+import gzip
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.benchmarking import scratch_database
+from core.seeding import Seeder
+
+from .bench_views import BENCH_SETTINGS, FAST_HASHER, git_commit
+
+# URL name -> who views it
+PAGES = {
+    'home': None,
+    'login': None,
+    'register': None,
+    'farmer_dashboard': 'farmer',
+    'restaurant_dashboard': 'restaurant',
+}
+
+# Assets that used to be inline <style>/<script> blocks in the templates
+FORMERLY_INLINE = 'pages/'
+
+ASSET_TAG = re.compile(r'<(?:link[^>]*\bhref|script[^>]*\bsrc)="([^"]+)"[^>]*>(?:</script>)?')
+
+
+def gzipped(data):
+    return len(gzip.compress(data, compresslevel=9))
+
+
+class Command(BaseCommand):
+    help = (
+        'Collect static files into a temporary directory, render each page and '
+        'report its bytes with the page styles and scripts inlined (as before) '
+        'and as minified, fingerprinted, precompressed bundles.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='static_report.json')
+
+    def handle(self, *args, **options):
+        static_root = tempfile.mkdtemp(prefix='agriconnect-static-')
+        overrides = {
+            **BENCH_SETTINGS,
+            'PASSWORD_HASHERS': FAST_HASHER,
+            'STATIC_ROOT': static_root,
+            'STORAGES': settings.STORAGES,
+        }
+        perf_logger = logging.getLogger('core.performance')
+        level = perf_logger.level
+        perf_logger.setLevel(logging.WARNING)
+        try:
+            with override_settings(**overrides):
+                call_command('collectstatic', interactive=False, verbosity=0)
+                with scratch_database():
+                    users = Seeder(seed=42).run(farmers=5, restaurants=5, produce_per_farmer=10, orders=200)
+                    pages = {
+                        name: self.measure(name, users[f'{role}s'][0] if role else None, static_root)
+                        for name, role in PAGES.items()
+                    }
+        finally:
+            perf_logger.setLevel(level)
+            shutil.rmtree(static_root, ignore_errors=True)
+
+        report = {
+            'commit': git_commit(),
+            'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'pages': pages,
+        }
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+
+        self.print_table(pages)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def measure(self, name, user, static_root):
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        response = client.get(reverse(name))
+        if response.status_code != 200:
+            raise CommandError(f'{name} returned HTTP {response.status_code}')
+        html = response.content
+
+        inlined = html
+        assets = {'raw': 0, 'gzip': 0, 'brotli': 0}
+        for match in ASSET_TAG.finditer(html.decode()):
+            tag, url = match.group(0), match.group(1)
+            if not url.startswith(settings.STATIC_URL):
+                continue
+            collected = os.path.join(static_root, url[len(settings.STATIC_URL):])
+            assets['raw'] += os.path.getsize(collected)
+            assets['gzip'] += os.path.getsize(collected + '.gz')
+            if os.path.exists(collected + '.br'):
+                assets['brotli'] += os.path.getsize(collected + '.br')
+
+            source = self.source_of(url)
+            if source and source.startswith(FORMERLY_INLINE):
+                with open(finders.find(source), 'rb') as f:
+                    body = f.read()
+                block = b'<style>\n%s</style>' if source.endswith('.css') else b'<script>\n%s</script>'
+                inlined = inlined.replace(tag.encode(), block % body)
+
+        return {
+            'before': {'html': len(inlined), 'html_gzip': gzipped(inlined)},
+            'after': {'html': len(html), 'html_gzip': gzipped(html), 'assets': assets},
+        }
+
+    def source_of(self, url):
+        """``pages/login.css`` for ``/static/pages/login.3f2a9c1b7e4d.css``."""
+        name = url[len(settings.STATIC_URL):]
+        return re.sub(r'\.[0-9a-f]{12}(\.\w+)$', r'\1', name)
+
+    def print_table(self, pages):
+        self.stdout.write(
+            f"{'page':<22} {'before html':>12} {'after html':>11} {'saved/view':>11} "
+            f"{'assets (br)':>12}"
+        )
+        for name, p in pages.items():
+            before, after = p['before'], p['after']
+            self.stdout.write(
+                f"{name:<22} {before['html']:>12} {after['html']:>11} "
+                f"{before['html'] - after['html']:>11} {after['assets']['brotli']:>12}"
+            )
@@ -0,0 +1,158 @@
+import datetime
+import queue
+import random
+import threading
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+
+from core.benchmarking import Stopwatch, scratch_database
+from core.models import Order, Produce, User
+from core.orders import OrderTransitionError, accept_order
+
+
+def legacy_accept(order_id, farmer_id):
+    """The read-modify-write accept path update_order_status used to run."""
+    order = Order.objects.get(id=order_id, farmer_id=farmer_id)
+    order.status = 'accepted'
+    order.save()
+    produce = order.produce
+    produce.quantity -= order.quantity_requested
+    produce.status = Produce.status_for_quantity(produce.quantity)
+    produce.save()
+    return True
+
+
+def engine_accept(order_id, farmer_id):
+    """The conditional-update path from core.orders."""
+    order = Order.objects.only(
+        'id', 'status', 'quantity_requested', 'produce_id', 'farmer_id', 'restaurant_id', 'total_price',
+    ).get(id=order_id, farmer_id=farmer_id)
+    try:
+        accept_order(order)
+    except OrderTransitionError:
+        return False
+    return True
+
+
+class Command(BaseCommand):
+    help = (
+        'Accept the same orders from many threads at once against a scratch '
+        'database, check that stock is never oversold and report each path\'s '
+        'attempts and successful acceptances per second.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--orders', type=int, default=200, help='Pending orders to create.')
+        parser.add_argument('--stock', type=int, default=1000, help='Starting stock in kg.')
+        parser.add_argument('--quantity', type=int, default=10, help='Kg requested per order.')
+        parser.add_argument('--clicks', type=int, default=2, help='Accept attempts per order.')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            results = [
+                self.run_trial('legacy', legacy_accept, options),
+                self.run_trial('engine', engine_accept, options),
+            ]
+
+        self.stdout.write(
+            f"{'path':<8} {'calls/s':>9} {'accepted/s':>11} {'accepted':>9} {'sold kg':>9} "
+            f"{'stock kg':>9} {'lost kg':>8} {'errors':>7}"
+        )
+        for r in results:
+            self.stdout.write(
+                f"{r['path']:<8} {r['per_second']:>9.1f} {r['accepted_per_second']:>11.1f} {r['accepted']:>9} "
+                f"{r['sold']:>9} {r['final_stock']:>9} {r['lost']:>8} {r['errors']:>7}"
+            )
+        self.stdout.write(
+            'calls/s counts every attempt, including repeat clicks and refusals; '
+            'accepted/s counts orders left accepted, oversold ones included.'
+        )
+
+        engine = results[1]
+        if engine['oversold'] or engine['lost'] or engine['double_accepts']:
+            raise CommandError('Order acceptance oversold stock under concurrency.')
+        self.stdout.write(self.style.SUCCESS('No oversell with the acceptance engine.'))
+
+    def seed(self, options):
+        farmer = User.objects.create_user(
+            username=f'stress-farmer-{User.objects.count()}', password=None, role='farmer',
+        )
+        restaurant = User.objects.create_user(
+            username=f'stress-restaurant-{User.objects.count()}', password=None, role='restaurant',
+        )
+        stock = Decimal(options['stock'])
+        produce = Produce.objects.create(
+            farmer=farmer, name='Tomatoes', quantity=stock, price_per_kg=Decimal('40'),
+            availability_date=datetime.date.today(),
+        )
+        amount = Decimal(options['quantity'])
+        orders = Order.objects.bulk_create([
+            Order(
+                restaurant=restaurant, farmer=farmer, produce=produce,
+                quantity_requested=amount, total_price=amount * produce.price_per_kg,
+            )
+            for _ in range(options['orders'])
+        ])
+        return farmer, produce, [o.pk for o in orders]
+
+    def run_trial(self, path, accept, options):
+        farmer, produce, order_ids = self.seed(options)
+        attempts = order_ids * options['clicks']
+        random.Random(options['seed']).shuffle(attempts)
+
+        work = queue.Queue()
+        for order_id in attempts:
+            work.put(order_id)
+
+        lock = threading.Lock()
+        tally = {'ok': 0, 'errors': 0}
+
+        def worker():
+            try:
+                while True:
+                    try:
+                        order_id = work.get_nowait()
+                    except queue.Empty:
+                        return
+                    try:
+                        ok = accept(order_id, farmer.pk)
+                    except OperationalError:
+                        ok, error = False, True
+                    else:
+                        error = False
+                    with lock:
+                        tally['ok'] += ok
+                        tally['errors'] += error
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        with Stopwatch() as sw:
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        produce.refresh_from_db()
+        accepted = Order.objects.filter(produce=produce, status='accepted').count()
+        sold = accepted * options['quantity']
+        stock = options['stock']
+        final_stock = produce.quantity
+        return {
+            'path': path,
+            'per_second': len(attempts) / sw.elapsed,
+            'accepted_per_second': accepted / sw.elapsed,
+            'accepted': accepted,
+            'sold': sold,
+            'final_stock': final_stock,
+            # Stock that left the listing without an accepted order to show for
+            # it, or accepted orders whose stock was never taken off.
+            'lost': abs((stock - sold) - final_stock),
+            'oversold': sold > stock or final_stock < 0,
+            'double_accepts': tally['ok'] > accepted,
+            'errors': tally['errors'],
+        }
@@ -0,0 +1,296 @@
+"""
+Market price rollups per produce name.
+
+Whether ₹50/kg for tomatoes is a fair price depends on what tomatoes list
+and sell for, and aggregating every listing and order on each page view
+would not scale. ``MarketPrice`` rows hold those numbers per normalized
+name (``normalize_name``), per day and per Monday-based week, once across
+all locations and once per farmer location:
+
+* listings created in the period: their count and min/median/max asking
+  price;
+* orders accepted in the period: their count, kg and rupees, whose ratio
+  is the volume-weighted average price (``MarketPrice.vwap``).
+
+The median needs every price, so each row also keeps a histogram of listed
+prices; a new observation updates it and the row's figures under a row
+lock. A write touches at most four rows (day and week, overall and local)
+in two queries.
+
+New listings are recorded by ``core.signals`` (and by ``core.importers``
+for bulk inserts), accepted orders by ``core.orders.accept_order``. Rollups
+are history: deleting a listing or an order later, or editing a listing's
+price, does not rewrite the periods it was counted in. ``rebuild()``
+recomputes every row from the source tables with grouped queries and backs
+the ``backfill_market_prices`` command.
+
+``annotate_listings`` gives catalog listings their price-vs-market badge
+from one query per catalog page, which is cached with the page.
+"""
+import functools
+import operator
+import re
+from collections import Counter, defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import FarmerProfile, MarketPrice, Order, Produce
+
+# Orders whose stock changed hands
+TRADE_STATUSES = ('accepted', 'completed')
+
+# Listings priced within this share of the market price are "fair"
+FAIR_BAND = Decimal('0.10')
+
+# Listings plus trades a week needs for the badge to prefer it over last
+# week, or a farmer's location over all locations
+MIN_OBSERVATIONS = 3
+
+CENT = Decimal('0.01')
+
+KEY_FIELDS = ('name', 'period', 'period_start', 'location')
+UPDATE_FIELDS = (
+    'listings', 'min_price', 'median_price', 'max_price', 'price_counts',
+    'trades', 'volume_kg', 'value',
+)
+
+
+def _singular(word):
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'  # cherries
+    if len(word) > 4 and word.endswith('oes'):
+        return word[:-2]  # tomatoes, potatoes
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]  # onions, beans
+    return word
+
+
+def normalize_name(name):
+    """'Fresh  Tomatoes!' and 'fresh tomato' both become 'fresh tomato'."""
+    words = re.sub(r'[^\w\s]', ' ', name.lower()).split()
+    if words:
+        words[-1] = _singular(words[-1])
+    return ' '.join(words)[:100]
+
+
+def normalize_location(location):
+    return ' '.join((location or '').split()).lower()[:300]
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def _buckets(name, location, day):
+    locations = ('', location) if location else ('',)
+    return [
+        (name, period, start, place)
+        for period, start in (('day', day), ('week', week_start(day)))
+        for place in locations
+    ]
+
+
+def price_stats(counts):
+    """Min, median and max of a ``{price: listings}`` histogram."""
+    prices = sorted((Decimal(price), n) for price, n in counts.items() if n)
+    total = sum(n for _, n in prices)
+    if not total:
+        return None, None, None
+
+    def nth(index):
+        for price, n in prices:
+            if index < n:
+                return price
+            index -= n
+
+    median = ((nth((total - 1) // 2) + nth(total // 2)) / 2).quantize(CENT)
+    return prices[0][0], median, prices[-1][0]
+
+
+class _Rollup:
+    """Observations grouped by the rows they land in."""
+
+    def __init__(self):
+        self.deltas = defaultdict(lambda: {
+            'prices': Counter(), 'trades': 0, 'volume_kg': Decimal('0'), 'value': Decimal('0'),
+        })
+
+    def add_listings(self, name, location, day, price, count=1):
+        name = normalize_name(name)
+        if not name:
+            return
+        for key in _buckets(name, normalize_location(location), day):
+            self.deltas[key]['prices'][str(Decimal(price).quantize(CENT))] += count
+
+    def add_trades(self, name, location, day, volume_kg, value, count=1):
+        name = normalize_name(name)
+        if not name:
+            return
+        for key in _buckets(name, normalize_location(location), day):
+            delta = self.deltas[key]
+            delta['trades'] += count
+            delta['volume_kg'] += volume_kg
+            delta['value'] += value
+
+    def merge(self, row, key):
+        delta = self.deltas[key]
+        counts = Counter(row.price_counts)
+        counts.update(delta['prices'])
+        row.price_counts = dict(counts)
+        row.listings = sum(counts.values())
+        row.min_price, row.median_price, row.max_price = price_stats(counts)
+        row.trades += delta['trades']
+        row.volume_kg += delta['volume_kg']
+        row.value += delta['value']
+        return row
+
+    def new_rows(self):
+        return [self.merge(MarketPrice(**dict(zip(KEY_FIELDS, key))), key) for key in self.deltas]
+
+
+def _locked_rows(keys):
+    match = functools.reduce(operator.or_, (Q(**dict(zip(KEY_FIELDS, key))) for key in keys))
+    return {
+        tuple(getattr(row, field) for field in KEY_FIELDS): row
+        for row in MarketPrice.objects.select_for_update().filter(match).order_by('pk')
+    }
+
+
+def _apply(rollup):
+    if not rollup.deltas:
+        return
+    keys = list(rollup.deltas)
+    with transaction.atomic():
+        rows = _locked_rows(keys)
+        missing = [key for key in keys if key not in rows]
+        if missing:
+            # First observation of the period; another writer may race us to it
+            MarketPrice.objects.bulk_create(
+                [MarketPrice(**dict(zip(KEY_FIELDS, key))) for key in missing], ignore_conflicts=True,
+            )
+            rows.update(_locked_rows(missing))
+        MarketPrice.objects.bulk_update(
+            [rollup.merge(row, key) for key, row in rows.items()], UPDATE_FIELDS,
+        )
+
+
+def listings_added(farmer_id, listings):
+    """Listings one farmer just created."""
+    location = FarmerProfile.objects.filter(user_id=farmer_id).values_list('location', flat=True).first()
+    rollup = _Rollup()
+    for listing in listings:
+        rollup.add_listings(listing.name, location, timezone.localdate(listing.created_at), listing.price_per_kg)
+    _apply(rollup)
+
+
+def trade_recorded(name, location, volume_kg, value, when=None):
+    """An order for ``volume_kg`` of ``name`` was accepted for ``value`` rupees."""
+    rollup = _Rollup()
+    rollup.add_trades(name, location, timezone.localdate(when), volume_kg, value)
+    _apply(rollup)
+
+
+def rebuild(batch_size=1000):
+    """
+    Recompute every rollup from the listings and accepted orders.
+
+    The source tables are read with grouped queries (one row per name,
+    location, day and price, or per name, location and day), never row by
+    row. Writes landing while it runs may be missed; run it when the site
+    is quiet. Returns the number of rows written.
+    """
+    rollup = _Rollup()
+    listings = Produce.objects.values(
+        'name', 'price_per_kg', location=F('farmer__farmer_profile__location'), day=TruncDate('created_at'),
+    ).annotate(n=Count('id')).order_by()
+    for row in listings.iterator():
+        rollup.add_listings(row['name'], row['location'], row['day'], row['price_per_kg'], row['n'])
+
+    # Acceptance is an order's last update: nothing writes to it afterwards
+    trades = Order.objects.filter(status__in=TRADE_STATUSES).values(
+        name=F('produce__name'), location=F('farmer__farmer_profile__location'), day=TruncDate('updated_at'),
+    ).annotate(n=Count('id'), volume_kg=Sum('quantity_requested'), value=Sum('total_price')).order_by()
+    for row in trades.iterator():
+        rollup.add_trades(row['name'], row['location'], row['day'], row['volume_kg'], row['value'], row['n'])
+
+    rows = rollup.new_rows()
+    with transaction.atomic():
+        MarketPrice.objects.all().delete()
+        MarketPrice.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def _reference(row):
+    return row.vwap or row.median_price
+
+
+def _observations(row):
+    return row.listings + row.trades
+
+
+def badge(price, row):
+    """How ``price`` compares with ``row``'s market price; None without a usable one."""
+    reference = _reference(row)
+    if reference is None or reference <= 0:
+        # Listings priced at zero predate the form check; nothing to compare with
+        return None
+    difference = (price - reference) / reference
+    if difference < -FAIR_BAND:
+        level = 'below'
+    elif difference > FAIR_BAND:
+        level = 'above'
+    else:
+        level = 'fair'
+    return {
+        'level': level,
+        'percent': int((difference * 100).to_integral_value()),
+        'reference': reference,
+        'location': row.location,
+    }
+
+
+def annotate_listings(listings, today=None):
+    """
+    Set ``market`` on each listing: its ``badge()`` against this or last
+    week's prices for its name, in its farmer's location when that has
+    MIN_OBSERVATIONS, else across all locations; None without data.
+
+    Listings need ``farmer__farmer_profile`` selected. One query in all.
+    """
+    listings = list(listings)
+    if not listings:
+        return
+    this_week = week_start(today or timezone.localdate())
+
+    def key(listing):
+        profile = getattr(listing.farmer, 'farmer_profile', None)
+        return normalize_name(listing.name), normalize_location(profile.location if profile else '')
+
+    keys = {listing.pk: key(listing) for listing in listings}
+    rows = MarketPrice.objects.filter(
+        period='week', period_start__gte=this_week - timedelta(weeks=1),
+        name__in={name for name, _ in keys.values()},
+        location__in={'', *(location for _, location in keys.values())},
+    ).order_by('period_start')
+
+    # This week per name and location, unless it is still thin and last week was not
+    weeks = {}
+    for row in rows:
+        reference = _reference(row)
+        if reference is None or reference <= 0:
+            continue
+        last = weeks.get((row.name, row.location))
+        if last is None or _observations(row) >= min(MIN_OBSERVATIONS, _observations(last)):
+            weeks[(row.name, row.location)] = row
+
+    for listing in listings:
+        name, location = keys[listing.pk]
+        row = weeks.get((name, location))
+        if row is None or _observations(row) < MIN_OBSERVATIONS:
+            row = weeks.get((name, ''))
+        listing.market = badge(listing.price_per_kg, row) if row else None
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_produce_contact_number'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='produce',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='produce_catalog_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_produce_catalog_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='produce',
+            name='reserved_quantity',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.CreateModel(
+            name='StockHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stock_hold', to='core.order')),
+                ('produce', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_holds', to='core.produce')),
+            ],
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:04
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_stock_holds'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GlobalStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('farmers', models.IntegerField(default=0)),
+                ('catalog_produce', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Global stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('produce_total', models.IntegerField(default=0)),
+                ('produce_available', models.IntegerField(default=0)),
+                ('orders_pending_received', models.IntegerField(default=0)),
+                ('orders_pending_placed', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'User stats',
+            },
+        ),
+    ]
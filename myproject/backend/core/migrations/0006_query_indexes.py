@@ -0,0 +1,65 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:06
+
+import core.models
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+def clear_duplicate_emails(apps, schema_editor):
+    """
+    Registration used to compare emails case-sensitively, so an older
+    database can hold Foo@x.com and foo@x.com, which user_email_ci_unique
+    refuses. Of each such group the account that logged in last keeps the
+    email; the others have it cleared (blank emails are exempt from the
+    constraint). They still log in with their username, which registration
+    set to the email as typed. Affected accounts are listed in the output.
+    """
+    from django.db.models import Count, F
+    from django.db.models.functions import Lower
+
+    User = apps.get_model('core', 'User')
+    users = User.objects.filter(email__gt='').annotate(email_lower=Lower('email'))
+    duplicated = (
+        users.values('email_lower').annotate(n=Count('id')).filter(n__gt=1).values_list('email_lower', flat=True)
+    )
+    cleared = []
+    for email_lower in duplicated:
+        group = users.filter(email_lower=email_lower).order_by(F('last_login').desc(nulls_last=True), 'pk')
+        keep, *others = group.values_list('pk', flat=True)
+        User.objects.filter(pk__in=others).update(email='')
+        cleared.append((email_lower, keep, others))
+    for email_lower, keep, others in cleared:
+        print(f'\n  {email_lower}: kept on user {keep}, cleared on users {", ".join(map(str, others))}', end='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_dashboard_stats'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', core.models.UserManager()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='produce',
+            index=models.Index(fields=['-created_at', '-id'], name='produce_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['farmer', 'status'], name='order_farmer_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['restaurant', 'status'], name='order_restaurant_status_idx'),
+        ),
+        migrations.RunPython(clear_duplicate_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), condition=models.Q(('email__gt', '')), name='user_email_ci_unique', violation_error_message='This email is already registered. Please login instead.'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_sync_tombstones'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='produce',
+            name='status',
+            field=models.CharField(choices=[('available', 'Available'), ('pending', 'Pending'), ('sold', 'Sold Out'), ('expired', 'Expired')], default='available', max_length=20),
+        ),
+    ]
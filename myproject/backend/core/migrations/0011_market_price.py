@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_produce_expired_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarketPrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('period', models.CharField(choices=[('day', 'Day'), ('week', 'Week')], max_length=4)),
+                ('period_start', models.DateField()),
+                ('location', models.CharField(blank=True, max_length=300)),
+                ('listings', models.IntegerField(default=0)),
+                ('min_price', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('median_price', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('max_price', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('price_counts', models.JSONField(default=dict)),
+                ('trades', models.IntegerField(default=0)),
+                ('volume_kg', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('value', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='marketprice',
+            constraint=models.UniqueConstraint(fields=('name', 'period', 'period_start', 'location'), name='market_price_bucket_uniq'),
+        ),
+    ]
@@ -1,8 +1,39 @@
-from django.contrib.auth.models import AbstractUser
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
 from django.db import models
+from django.db.models import Case, Q, Value, When
+from django.db.models.functions import Lower
 from django.utils import timezone
 
 
+class UserManager(BaseUserManager):
+    def with_email(self, email):
+        """
+        Users whose email matches case-insensitively.
+        
+        Written as LOWER(email) = ? AND email > '' so that it is answered by
+        the partial unique index user_email_ci_unique.
+        """
+        return self.alias(email_lower=Lower('email')).filter(
+            email_lower=(email or '').strip().lower(), email__gt='',
+        )
+    
+    def with_login(self, identifier):
+        """
+        Users whose email (case-insensitively) or username is ``identifier``.
+        
+        One query; each side of the OR is answered by its own unique index.
+        At most two rows can match.
+        """
+        identifier = (identifier or '').strip()
+        return self.alias(email_lower=Lower('email')).filter(
+            Q(email_lower=identifier.lower(), email__gt='') | Q(username=identifier)
+        )
+
+
 class User(AbstractUser):
     """Custom User model with role-based authentication"""
     ROLE_CHOICES = [
@@ -14,6 +45,26 @@ class User(AbstractUser):
     phone = models.CharField(max_length=15, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = UserManager()
+    
+    class Meta(AbstractUser.Meta):
+        constraints = [
+            # One account per email regardless of case; blank emails are exempt
+            models.UniqueConstraint(
+                Lower('email'),
+                name='user_email_ci_unique',
+                condition=Q(email__gt=''),
+                violation_error_message='This email is already registered. Please login instead.',
+            ),
+        ]
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored email so signal handlers can see changes
+        instance._loaded_email = instance.__dict__.get('email')
+        return instance
+    
     def is_farmer(self):
         return self.role == 'farmer'
     
@@ -62,11 +113,19 @@ class Produce(models.Model):
         ('available', 'Available'),
         ('pending', 'Pending'),
         ('sold', 'Sold Out'),
+        ('expired', 'Expired'),
     ]
     
+    # Listings below this many kg are shown as low stock
+    LOW_STOCK_THRESHOLD = Decimal('50')
+    
+    # Listings restaurants can still request supply from
+    CATALOG_STATUSES = ('available', 'pending')
+    
     farmer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='produce_listings')
     name = models.CharField(max_length=100)
     quantity = models.DecimalField(max_digits=10, decimal_places=2)  # in kg
+    reserved_quantity = models.DecimalField(max_digits=10, decimal_places=2, default=0)  # held by pending orders
     price_per_kg = models.DecimalField(max_digits=10, decimal_places=2)
     availability_date = models.DateField()
     contact_number = models.CharField(max_length=15, blank=True)  # Contact number for this produce
@@ -77,19 +136,85 @@ class Produce(models.Model):
     class Meta:
         verbose_name_plural = "Produce"
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of the restaurant catalog
+            models.Index(fields=['status', '-created_at', '-id'], name='produce_catalog_idx'),
+            # First catalog page: newest-first without a sort, stops after one page
+            models.Index(fields=['-created_at', '-id'], name='produce_recent_idx'),
+            # Newest change per status: API validators answer from the index
+            models.Index(fields=['status', 'updated_at'], name='produce_status_updated_idx'),
+            # Delta sync: a farmer's listings changed after a cursor
+            models.Index(fields=['farmer', 'updated_at', 'id'], name='produce_farmer_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} by {self.farmer.username}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so signal handlers can see transitions
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+    
+    @property
+    def available_to_promise(self):
+        """Stock not already held for pending orders"""
+        return self.quantity - self.reserved_quantity
+    
+    @classmethod
+    def status_for_quantity(cls, quantity, expired=False):
+        """Status a listing should have with this much stock left"""
+        if quantity <= 0:
+            return 'sold'
+        elif expired:
+            return 'expired'
+        elif quantity < cls.LOW_STOCK_THRESHOLD:
+            return 'pending'  # Low stock
+        return 'available'
+    
+    @classmethod
+    def status_after_decrement(cls, amount):
+        """
+        SQL expression for the status once ``amount`` kg is taken off the row.
+        
+        Evaluated against the pre-update quantity, so it can be used in the
+        same UPDATE that decrements stock. Mirrors status_for_quantity();
+        an expired listing stays expired until it sells out.
+        """
+        return Case(
+            When(quantity__lte=amount, then=Value('sold')),
+            When(status='expired', then=Value('expired')),
+            When(quantity__lt=amount + cls.LOW_STOCK_THRESHOLD, then=Value('pending')),
+            default=Value('available'),
+            output_field=models.CharField(),
+        )
+    
+    @classmethod
+    def expiry_cutoff(cls, today=None):
+        """Listings available before this date have expired"""
+        today = today or timezone.localdate()
+        return today - timedelta(days=settings.PRODUCE_EXPIRY_DAYS)
+    
+    @classmethod
+    def status_expression(cls, cutoff):
+        """
+        SQL expression for the status a row should have now: the rules of
+        status_for_quantity(), plus expiry for listings available before
+        ``cutoff``. Lets ``expire_produce`` fix whole ranges in one UPDATE.
+        """
+        return Case(
+            When(quantity__lte=0, then=Value('sold')),
+            When(availability_date__lt=cutoff, then=Value('expired')),
+            When(quantity__lt=cls.LOW_STOCK_THRESHOLD, then=Value('pending')),
+            default=Value('available'),
+            output_field=models.CharField(),
+        )
+    
     def update_status(self):
         """Auto-update status based on quantity"""
-        if self.quantity <= 0:
-            self.status = 'sold'
-        elif self.quantity < 50:
-            self.status = 'pending'  # Low stock
-        else:
-            self.status = 'available'
-        self.save()
+        self.status = self.status_for_quantity(self.quantity, expired=self.status == 'expired')
+        self.save(update_fields=['quantity', 'status', 'updated_at'])
 
 
 class Order(models.Model):
@@ -112,11 +237,163 @@ class Order(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Dashboard filters on one side of the order plus its status
+            models.Index(fields=['farmer', 'status'], name='order_farmer_status_idx'),
+            models.Index(fields=['restaurant', 'status'], name='order_restaurant_status_idx'),
+            # Newest change on each side of the order (API validators), and
+            # the orders changed after a delta-sync cursor
+            models.Index(fields=['farmer', 'updated_at', 'id'], name='order_farmer_updated_idx'),
+            models.Index(fields=['restaurant', 'updated_at', 'id'], name='order_restaurant_updated_idx'),
+        ]
     
     def __str__(self):
         return f"Order #{self.id} - {self.produce.name}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so signal handlers can see transitions
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+    
+    @staticmethod
+    def price_for(quantity, price_per_kg):
+        """The order total in rupees, rounded half up to the paisa"""
+        return (Decimal(quantity) * price_per_kg).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    
     def save(self, *args, **kwargs):
         # Calculate total price
-        self.total_price = self.quantity_requested * self.produce.price_per_kg
+        self.total_price = self.price_for(self.quantity_requested, self.produce.price_per_kg)
         super().save(*args, **kwargs)
+
+
+class StockHold(models.Model):
+    """Soft reservation of a listing's stock while an order awaits the farmer"""
+    order = models.OneToOneField(Order, on_delete=models.CASCADE, related_name='stock_hold')
+    produce = models.ForeignKey(Produce, on_delete=models.CASCADE, related_name='stock_holds')
+    quantity = models.DecimalField(max_digits=10, decimal_places=2)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    def __str__(self):
+        return f"{self.quantity} kg of {self.produce_id} for order #{self.order_id}"
+
+
+class Tombstone(models.Model):
+    """A deleted listing or order, kept so delta-sync clients can drop their copy"""
+    KIND_CHOICES = [
+        ('produce', 'Produce'),
+        ('order', 'Order'),
+    ]
+    
+    # Whose replica held the row; no constraint, so deleting the user keeps it
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at', 'id'], name='tombstone_user_deleted_idx'),
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Deleted {self.kind} #{self.object_id}"
+
+
+class UserStats(models.Model):
+    """Headline dashboard numbers for one user, kept current on every write"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    produce_total = models.IntegerField(default=0)
+    produce_available = models.IntegerField(default=0)
+    orders_pending_received = models.IntegerField(default=0)  # as a farmer
+    orders_pending_placed = models.IntegerField(default=0)  # as a restaurant
+    
+    class Meta:
+        verbose_name_plural = "User stats"
+    
+    def __str__(self):
+        return f"Stats for user #{self.user_id}"
+
+
+class GlobalStats(models.Model):
+    """Platform-wide dashboard numbers, stored in a single row"""
+    SINGLETON_ID = 1
+    
+    farmers = models.IntegerField(default=0)
+    catalog_produce = models.IntegerField(default=0)  # listings in the restaurant catalog
+    catalog_version = models.PositiveBigIntegerField(default=0)  # bumped on every catalog change, see core.catalog_cache
+    
+    class Meta:
+        verbose_name_plural = "Global stats"
+    
+    def __str__(self):
+        return "Global stats"
+
+
+class MarketPrice(models.Model):
+    """
+    Price rollup for one produce name over a day or a week, across all
+    locations or in one. Maintained by ``core.market``.
+    """
+    PERIOD_CHOICES = [
+        ('day', 'Day'),
+        ('week', 'Week'),
+    ]
+    
+    name = models.CharField(max_length=100)  # normalized, see core.market.normalize_name
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    period_start = models.DateField()  # the day, or the Monday of the week
+    location = models.CharField(max_length=300, blank=True)  # normalized farmer location; '' for all
+    # Asking prices of the listings created in the period
+    listings = models.IntegerField(default=0)
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    median_price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    price_counts = models.JSONField(default=dict)  # listed price -> listings at it, for the median
+    # Orders accepted in the period
+    trades = models.IntegerField(default=0)
+    volume_kg = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    value = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'period', 'period_start', 'location'], name='market_price_bucket_uniq',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} {self.period} of {self.period_start} ({self.location or 'all locations'})"
+    
+    @property
+    def vwap(self):
+        """Volume-weighted average price paid per kg, if anything traded"""
+        if not self.volume_kg:
+            return None
+        return (self.value / self.volume_kg).quantize(Decimal('0.01'))
+
+
+class FarmerDailyFact(models.Model):
+    """
+    One farmer's orders for one produce name on one day, for the analytics
+    page. Maintained by ``core.facts``.
+    """
+    farmer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_facts')
+    day = models.DateField()
+    name = models.CharField(max_length=100)  # normalized, see core.market.normalize_name
+    requests = models.IntegerField(default=0)  # orders placed that day
+    accepted = models.IntegerField(default=0)  # orders accepted that day
+    rejected = models.IntegerField(default=0)  # orders rejected that day
+    volume_kg = models.DecimalField(max_digits=14, decimal_places=2, default=0)  # sold by those acceptances
+    revenue = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    
+    class Meta:
+        constraints = [
+            # Also the index behind the analytics page's farmer + date range reads
+            models.UniqueConstraint(fields=['farmer', 'day', 'name'], name='farmer_fact_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.farmer.username}: {self.name} on {self.day}"
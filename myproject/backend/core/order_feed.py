@@ -0,0 +1,220 @@
+"""
+Live order events for the dashboards, streamed as Server-Sent Events.
+
+Every order write appends an event to a short per-user log in the shared
+cache: a sequence counter per user plus one entry per sequence number naming
+the order that changed. The order's farmer and restaurant each get one.
+Events are published on commit, so a stream never reads an order whose
+transaction could still roll back.
+
+Under ASGI the dashboards hold a Server-Sent Events stream open, which
+checks its user's counter every ``POLL_INTERVAL`` seconds. That is a cache
+read, so idle dashboards never query the database; orders are only loaded,
+in one query, when there is something to send. Each SSE event id is the
+user's sequence number, so a browser that reconnects with ``Last-Event-ID``
+is replayed what it missed. If those events have already expired, the
+browser is told to reload the page instead.
+
+A stream would pin a sync worker for as long as the tab stays open, so
+under WSGI the same endpoint answers one short poll with JSON
+(``snapshot()``) and the page asks again every ``ORDER_FEED_POLL_SECONDS``
+(``client_options()``).
+
+Ordinary ``save()``/``delete()`` calls publish through ``core.signals``;
+code that writes orders with ``update()`` or ``bulk_create()`` calls
+``publish()`` itself. With several worker processes the cache must be shared
+(``REDIS_URL``) for events to cross between them.
+"""
+import json
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import render_to_string
+
+from .models import Order
+
+KEY_PREFIX = 'orders:feed'
+EVENT_TTL = 15 * 60  # seconds an event can still be replayed
+MAX_REPLAY = 500
+POLL_INTERVAL = 1.0
+HEARTBEAT_INTERVAL = 15.0
+RETRY_MS = 3000
+
+ROW_TEMPLATES = {
+    'farmer': 'order_row_farmer.html',
+    'restaurant': 'order_row_restaurant.html',
+}
+
+
+def _seq_key(user_id):
+    return f'{KEY_PREFIX}:{user_id}:seq'
+
+
+def _event_key(user_id, seq):
+    return f'{KEY_PREFIX}:{user_id}:{seq}'
+
+
+def latest(user_id):
+    """The user's last event number; pages pass it to the stream as ``after``."""
+    return cache.get(_seq_key(user_id), 0)
+
+
+def _append(user_id, order_ids):
+    key = _seq_key(user_id)
+    cache.add(key, 0, timeout=None)
+    try:
+        last = cache.incr(key, len(order_ids))
+    except ValueError:  # evicted between add() and incr()
+        cache.add(key, 0, timeout=None)
+        last = cache.incr(key, len(order_ids))
+    first = last - len(order_ids) + 1
+    cache.set_many(
+        {_event_key(user_id, seq): order_id for seq, order_id in enumerate(order_ids, first)},
+        timeout=EVENT_TTL,
+    )
+
+
+def publish(orders):
+    """Announce that ``orders`` were created, changed or deleted."""
+    by_user = defaultdict(list)
+    for order in orders:
+        by_user[order.farmer_id].append(order.pk)
+        by_user[order.restaurant_id].append(order.pk)
+
+    def send():
+        for user_id, order_ids in by_user.items():
+            _append(user_id, order_ids)
+
+    if by_user:
+        transaction.on_commit(send)
+
+
+def since(user_id, after):
+    """
+    ``(seq, order_id)`` pairs for the user's events after ``after``, oldest
+    first, or None if some of them are gone and the page must reload.
+    """
+    last = latest(user_id)
+    if last == after:
+        return []
+    if after > last or last - after > MAX_REPLAY:
+        return None  # the counter was reset, or the client is too far behind
+    keys = {_event_key(user_id, seq): seq for seq in range(after + 1, last + 1)}
+    found = cache.get_many(keys)
+    if len(found) < len(keys):
+        return None
+    return sorted((keys[key], order_id) for key, order_id in found.items())
+
+
+def _frame(event, data, event_id=None):
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines += [f'event: {event}', f'data: {json.dumps(data)}']
+    return '\n'.join(lines) + '\n\n'
+
+
+def changes(user, after):
+    """
+    ``(events, position)`` for everything after event ``after``: ``events``
+    is a list of ``(seq, order_id, html)``, or None if the page must reload.
+
+    Each changed order appears once, as its freshly rendered table row
+    (``html`` is None once the order is deleted), under the number of the
+    last event that named it.
+    """
+    events = since(user.pk, after)
+    if events is None:
+        return None, latest(user.pk)
+    if not events:
+        return [], after
+
+    last_seq = {}
+    for seq, order_id in events:
+        last_seq[order_id] = seq
+    orders = (
+        Order.objects.filter(pk__in=last_seq)
+        .select_related('restaurant__restaurant_profile', 'farmer', 'produce')
+        .in_bulk()
+    )
+    template = ROW_TEMPLATES[user.role]
+    changed = []
+    for order_id, seq in sorted(last_seq.items(), key=lambda item: item[1]):
+        order = orders.get(order_id)
+        changed.append((seq, order_id, render_to_string(template, {'order': order}) if order else None))
+    return changed, events[-1][0]
+
+
+def poll(user, after):
+    """SSE frames for everything after event ``after``, and the new position."""
+    changed, position = changes(user, after)
+    if changed is None:
+        return [_frame('reload', {})], position
+    return [_frame('order', {'id': order_id, 'html': html}, event_id=seq) for seq, order_id, html in changed], position
+
+
+def snapshot(user, after):
+    """
+    The same as one ``poll()``, as a JSON-ready dict for clients that poll
+    instead of holding a stream open: ``events`` (``{"id", "html"}``),
+    ``after`` for the next call, and ``reload``.
+    """
+    if after is None:
+        return {'events': [], 'after': latest(user.pk), 'reload': False}
+    changed, position = changes(user, after)
+    if changed is None:
+        return {'events': [], 'after': position, 'reload': True}
+    return {
+        'events': [{'id': order_id, 'html': html} for _, order_id, html in changed],
+        'after': position,
+        'reload': False,
+    }
+
+
+def client_options():
+    """
+    Page context telling order_feed.js how to follow the events route:
+    ``stream`` when it is the async SSE view, else ``poll``, one short
+    request every ``ORDER_FEED_POLL_SECONDS``, so sync workers are never held.
+    """
+    return {
+        'feed_mode': 'stream' if settings.ASYNC_DASHBOARDS else 'poll',
+        'feed_poll_seconds': settings.ORDER_FEED_POLL_SECONDS,
+    }
+
+
+def start_position(request):
+    """Where a new stream starts: the ``Last-Event-ID`` header, else ``?after=``."""
+    for value in (request.headers.get('Last-Event-ID'), request.GET.get('after')):
+        try:
+            return max(0, int(value))
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+class Stream:
+    """State of one client's stream, driven by ``core.async_views``."""
+
+    def __init__(self, user, after):
+        self.user = user
+        self.after = latest(user.pk) if after is None else after
+        self.deadline = time.monotonic() + settings.ORDER_FEED_STREAM_SECONDS
+        self.quiet_since = time.monotonic()
+
+    @property
+    def open(self):
+        return time.monotonic() < self.deadline
+
+    def step(self):
+        """Whatever should be sent now, possibly nothing."""
+        frames, self.after = poll(self.user, self.after)
+        now = time.monotonic()
+        if frames:
+            self.quiet_since = now
+        elif now - self.quiet_since >= HEARTBEAT_INTERVAL:
+            # Comments keep proxies from closing an idle connection
+            frames = [': keepalive\n\n']
+            self.quiet_since = now
+        return ''.join(frames)
@@ -0,0 +1,274 @@
+"""
+Order state transitions.
+
+Every transition is a conditional UPDATE: the WHERE clause carries the state
+the caller expects the row to be in, and the affected-row count tells us
+whether we won. Two farmer tabs clicking "accept" at once therefore cannot
+both succeed, and stock is decremented with an F() expression guarded by
+``quantity >= requested`` so it can never go negative or lose an update.
+
+Pending orders also hold a soft reservation (a StockHold) against their
+listing, tracked incrementally in ``Produce.reserved_quantity``. New requests
+are checked against available-to-promise, ``quantity - reserved_quantity``,
+so hot listings stop collecting more pending demand than they have stock.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.utils import timezone
+
+from . import catalog_cache, facts, market, order_feed, stats
+from .models import Order, Produce, StockHold
+
+
+class OrderTransitionError(Exception):
+    """The order is not in a state that allows the requested change."""
+
+
+class InsufficientStock(OrderTransitionError):
+    """Accepting the order would take more stock than the listing has."""
+
+
+class ProduceUnavailable(OrderTransitionError):
+    """The listing is sold out, expired or otherwise out of the catalog."""
+
+
+def _claim(order, from_status, to_status, now):
+    """Move ``order`` between states; False if someone else moved it first."""
+    claimed = Order.objects.filter(pk=order.pk, status=from_status).update(
+        status=to_status, updated_at=now,
+    )
+    if claimed:
+        order.status = to_status
+        order.updated_at = now
+    return bool(claimed)
+
+
+def place_order(restaurant, produce, quantity):
+    """
+    Create a pending order and hold its stock for STOCK_HOLD_TTL.
+
+    The availability check and the reservation are one UPDATE on the
+    listing's primary key, so concurrent requests cannot over-promise, and
+    listings that have left the catalog cannot be ordered.
+    """
+    quantity = Decimal(quantity)
+    with transaction.atomic():
+        reserved = Produce.objects.filter(
+            pk=produce.pk, status__in=Produce.CATALOG_STATUSES,
+            quantity__gte=F('reserved_quantity') + quantity,
+        ).update(reserved_quantity=F('reserved_quantity') + quantity, updated_at=timezone.now())
+        if not reserved:
+            # Only failed requests pay to find out which check failed
+            if not Produce.objects.filter(pk=produce.pk, status__in=Produce.CATALOG_STATUSES).exists():
+                raise ProduceUnavailable(f'{produce.name} is no longer available.')
+            raise InsufficientStock(f'Not enough {produce.name} left to promise {quantity} kg.')
+
+        order = Order.objects.create(
+            restaurant=restaurant,
+            farmer_id=produce.farmer_id,
+            produce=produce,
+            quantity_requested=quantity,
+        )
+        StockHold.objects.create(
+            order=order,
+            produce=produce,
+            quantity=quantity,
+            expires_at=timezone.now() + settings.STOCK_HOLD_TTL,
+        )
+    return order
+
+
+def place_cart(restaurant, lines):
+    """
+    Place one pending order per ``(produce_id, quantity)`` line.
+
+    Lines whose id or quantity could not be parsed carry ``None`` there and
+    are reported back as failures.
+    All listings are fetched with a single ``in_bulk`` query and priced in
+    Python, then every order and stock hold is inserted with one
+    ``bulk_create`` each inside a single transaction. Reservations stay one
+    conditional UPDATE per line so two carts cannot over-promise a listing.
+    A bad line never fails the others. Returns one report dict per line.
+    """
+    listings = Produce.objects.only(
+        'id', 'name', 'farmer_id', 'price_per_kg', 'status',
+    ).in_bulk({produce_id for produce_id, _ in lines if produce_id is not None})
+
+    report = []
+    accepted = []
+    now = timezone.now()
+    with transaction.atomic():
+        for produce_id, quantity in lines:
+            line = {'produce_id': produce_id, 'quantity': None if quantity is None else str(quantity), 'ok': False}
+            report.append(line)
+
+            produce = listings.get(produce_id)
+            if produce is None or produce.status not in Produce.CATALOG_STATUSES:
+                line['error'] = 'This produce is not available.'
+                continue
+            if quantity is None:
+                line['error'] = 'Please enter a valid number for quantity.'
+                continue
+            if quantity <= 0:
+                line['error'] = 'Quantity must be greater than zero.'
+                continue
+
+            # The status may have changed since in_bulk() read it
+            reserved = Produce.objects.filter(
+                pk=produce_id, status__in=Produce.CATALOG_STATUSES,
+                quantity__gte=F('reserved_quantity') + quantity,
+            ).update(reserved_quantity=F('reserved_quantity') + quantity, updated_at=now)
+            if not reserved:
+                if not Produce.objects.filter(pk=produce_id, status__in=Produce.CATALOG_STATUSES).exists():
+                    line['error'] = 'This produce is not available.'
+                else:
+                    line['error'] = f'Not enough {produce.name} left to promise {quantity} kg.'
+                continue
+
+            accepted.append((line, Order(
+                restaurant=restaurant,
+                farmer_id=produce.farmer_id,
+                produce=produce,
+                quantity_requested=quantity,
+                # bulk_create skips Order.save(), which normally prices the order
+                total_price=Order.price_for(quantity, produce.price_per_kg),
+            )))
+
+        if not accepted:
+            return report
+        orders = Order.objects.bulk_create([order for _, order in accepted])
+        stats.orders_added(orders)
+        facts.orders_placed(orders)
+        catalog_cache.bump_version()
+        order_feed.publish(orders)
+        expires_at = now + settings.STOCK_HOLD_TTL
+        StockHold.objects.bulk_create([
+            StockHold(order=order, produce_id=order.produce_id,
+                      quantity=order.quantity_requested, expires_at=expires_at)
+            for order in orders
+        ])
+
+    for line, order in accepted:
+        line.update(ok=True, order_id=order.pk, total_price=str(order.total_price))
+    return report
+
+
+def _drop_hold(order):
+    """Delete the order's hold, returning how many kg it was holding."""
+    deleted, _ = StockHold.objects.filter(order_id=order.pk).delete()
+    return order.quantity_requested if deleted else Decimal('0')
+
+
+def accept_order(order):
+    """
+    Accept a pending order and take its quantity out of the listing's stock.
+
+    All writes happen in one transaction: if the stock decrement fails the
+    state change is rolled back too. The listing's status is recomputed by
+    the database in the same UPDATE that takes the stock.
+    """
+    amount = order.quantity_requested
+    with transaction.atomic():
+        now = timezone.now()
+        if not _claim(order, 'pending', 'accepted', now):
+            raise OrderTransitionError(f'Order #{order.pk} is no longer pending.')
+
+        # An order whose hold already expired must not eat into stock that is
+        # promised to other pending orders.
+        held = _drop_hold(order)
+
+        # Lock the listing; its current status feeds the dashboard counters,
+        # its name the farmer's daily facts and, with its farm location, the
+        # market prices.
+        farmer_id, quantity, old_status, name, location = Produce.objects.select_for_update(
+            of=('self',),
+        ).values_list(
+            'farmer_id', 'quantity', 'status', 'name', 'farmer__farmer_profile__location',
+        ).get(pk=order.produce_id)
+        decremented = Produce.objects.filter(
+            pk=order.produce_id, quantity__gte=F('reserved_quantity') + (amount - held),
+        ).update(
+            quantity=F('quantity') - amount,
+            reserved_quantity=F('reserved_quantity') - held,
+            status=Produce.status_after_decrement(amount),
+            updated_at=now,
+        )
+        if not decremented:
+            order.status = 'pending'  # the claim is rolled back with us
+            raise InsufficientStock(
+                f'Not enough stock left to accept order #{order.pk} ({amount} kg).'
+            )
+
+        stats.order_status_changed(order.farmer_id, order.restaurant_id, 'pending', 'accepted')
+        stats.produce_status_changed(
+            farmer_id, old_status,
+            Produce.status_for_quantity(quantity - amount, expired=old_status == 'expired'),
+        )
+        facts.order_transition(order.farmer_id, name, 'pending', 'accepted', amount, order.total_price, now)
+        market.trade_recorded(name, location, amount, order.total_price, now)
+        catalog_cache.bump_version()
+        order_feed.publish([order])
+    return order
+
+
+def reject_order(order):
+    """Reject a pending order and give its held stock back."""
+    with transaction.atomic():
+        now = timezone.now()
+        if not _claim(order, 'pending', 'rejected', now):
+            raise OrderTransitionError(f'Order #{order.pk} is no longer pending.')
+        held = _drop_hold(order)
+        if held:
+            Produce.objects.filter(pk=order.produce_id).update(
+                reserved_quantity=F('reserved_quantity') - held, updated_at=now,
+            )
+        stats.order_status_changed(order.farmer_id, order.restaurant_id, 'pending', 'rejected')
+        name = Produce.objects.filter(pk=order.produce_id).values_list('name', flat=True).get()
+        facts.order_transition(
+            order.farmer_id, name, 'pending', 'rejected', order.quantity_requested, order.total_price, now,
+        )
+        catalog_cache.bump_version()
+        order_feed.publish([order])
+    return order
+
+
+def release_expired_holds(batch_size=1000, now=None):
+    """
+    Release every hold that expired before ``now``, ``batch_size`` at a time.
+
+    Each batch is one SELECT, one DELETE and one UPDATE that gives the stock
+    back to all affected listings at once. Rows locked by a concurrent accept
+    or reject are skipped; that transaction releases them itself.
+    Returns the number of holds released.
+    """
+    now = now or timezone.now()
+    released = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                StockHold.objects.select_for_update(skip_locked=True)
+                .filter(expires_at__lte=now)
+                .order_by('expires_at')
+                .values_list('pk', 'produce_id', 'quantity')[:batch_size]
+            )
+            if not batch:
+                return released
+
+            totals = defaultdict(Decimal)
+            for _, produce_id, quantity in batch:
+                totals[produce_id] += quantity
+
+            StockHold.objects.filter(pk__in=[pk for pk, _, _ in batch]).delete()
+            Produce.objects.filter(pk__in=totals).update(
+                reserved_quantity=F('reserved_quantity') - Case(
+                    *[When(pk=pk, then=Value(total)) for pk, total in totals.items()],
+                    output_field=DecimalField(max_digits=10, decimal_places=2),
+                ),
+                updated_at=timezone.now(),
+            )
+            catalog_cache.bump_version()
+        released += len(batch)
@@ -0,0 +1,60 @@
+"""
+Whole-page cache for the pages anonymous visitors see.
+
+The landing, login and registration pages render the same HTML for every
+visitor bar the CSRF token, which comes from the visitor's ``csrftoken``
+cookie. Responses are therefore cached with ``Vary: Cookie``: the key
+includes the request's cookies, so a page is only ever replayed to the
+browser it was rendered for, and a visitor without cookies gets the shared
+copy of pages that need none.
+
+Nothing is cached when:
+
+* the visitor is logged in (these views redirect them anyway);
+* the request is not a GET or HEAD, so form errors are never replayed;
+* a flash message was pending, since it is shown once;
+* the page issued the visitor's first CSRF cookie (a first visit to a page
+  with a form), since a replay would carry a token with no cookie to match.
+
+Unlike ``cache_page`` no ``Cache-Control: max-age`` is added: a login form
+kept by the browser would outlive the CSRF token rotated at login.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.utils.cache import get_cache_key, learn_cache_key, patch_vary_headers
+
+KEY_PREFIX = 'anonymous'
+
+
+def _cacheable(request, response):
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return False
+    if settings.CSRF_COOKIE_NAME not in request.COOKIES and request.META.get('CSRF_COOKIE_NEEDS_UPDATE'):
+        return False
+    return not len(get_messages(request))
+
+
+def anonymous_page(view_func):
+    """Cache the view's GET responses to anonymous visitors for ANONYMOUS_PAGE_CACHE_SECONDS."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        timeout = settings.ANONYMOUS_PAGE_CACHE_SECONDS
+        if not timeout or request.method not in ('GET', 'HEAD') or request.user.is_authenticated:
+            return view_func(request, *args, **kwargs)
+
+        key = get_cache_key(request, KEY_PREFIX, 'GET', cache=cache)
+        if key is not None:
+            response = cache.get(key)
+            if response is not None:
+                return response
+
+        response = view_func(request, *args, **kwargs)
+        patch_vary_headers(response, ('Cookie',))
+        if request.method == 'GET' and _cacheable(request, response):
+            key = learn_cache_key(request, response, timeout, KEY_PREFIX, cache=cache)
+            cache.set(key, response, timeout)
+        return response
+    return wrapper
@@ -0,0 +1,136 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Offset pagination gets slower the deeper a client pages because the database
+still has to walk every skipped row. Keyset pagination instead remembers the
+sort key of the last row served and asks for rows strictly after it, which an
+index on the same columns answers in constant time regardless of depth.
+"""
+import base64
+import datetime
+import functools
+import json
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client supplies a cursor we did not issue."""
+
+
+def _cursor_value(value):
+    # DjangoJSONEncoder truncates datetimes to milliseconds, which would make
+    # rows created within the same millisecond compare equal to the cursor.
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class KeysetPage:
+    """One page of results plus the cursor for the page after it."""
+
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset on a fixed tuple of unique-together sort keys.
+
+    ``keys`` are model field names; the last one must be unique (normally
+    ``id``) so that rows sharing a timestamp are never skipped or repeated.
+    """
+
+    def __init__(self, queryset, keys=('created_at', 'id'), descending=True,
+                 page_size=25, max_page_size=100):
+        self.queryset = queryset
+        self.keys = tuple(keys)
+        self.descending = descending
+        self.max_page_size = max_page_size
+        self.page_size = self.clamp_page_size(page_size)
+
+    def clamp_page_size(self, page_size):
+        try:
+            page_size = int(page_size)
+        except (TypeError, ValueError):
+            return 25
+        return max(1, min(page_size, self.max_page_size))
+
+    # Cursor encoding -------------------------------------------------------
+
+    def encode_cursor(self, obj):
+        # Pages of values() querysets hold dicts rather than instances
+        get = obj.__getitem__ if isinstance(obj, dict) else functools.partial(getattr, obj)
+        values = [_cursor_value(get(key)) for key in self.keys]
+        raw = json.dumps(values, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (ValueError, TypeError) as exc:
+            raise InvalidCursor('Malformed cursor.') from exc
+        if not isinstance(values, list) or len(values) != len(self.keys):
+            raise InvalidCursor('Cursor does not match this listing.')
+
+        # We only ever issue strings and numbers; a null would make the
+        # comparison match nothing and a list or object cannot be compared
+        if any(value is None or isinstance(value, (list, dict)) for value in values):
+            raise InvalidCursor('Cursor contains invalid values.')
+
+        opts = self.queryset.model._meta
+        try:
+            # clean() also runs the field's validators, which bound integers
+            # to what the database can store
+            return [
+                opts.get_field(key).clean(value, None)
+                for key, value in zip(self.keys, values)
+            ]
+        except (ValidationError, TypeError, ValueError, OverflowError) as exc:
+            raise InvalidCursor('Cursor contains invalid values.') from exc
+
+    # Querying --------------------------------------------------------------
+
+    def _after(self, values):
+        """Build ``(k1, k2, ...) > (v1, v2, ...)`` as OR-ed equality prefixes."""
+        lookup = 'lt' if self.descending else 'gt'
+        condition = Q()
+        for i, key in enumerate(self.keys):
+            prefix = {k: v for k, v in zip(self.keys[:i], values[:i])}
+            prefix[f'{key}__{lookup}'] = values[i]
+            condition |= Q(**prefix)
+        return condition
+
+    def ordered(self):
+        prefix = '-' if self.descending else ''
+        return self.queryset.order_by(*[f'{prefix}{key}' for key in self.keys])
+
+    def page(self, cursor=None):
+        queryset = self.ordered()
+        if cursor:
+            queryset = queryset.filter(self._after(self.decode_cursor(cursor)))
+
+        # Fetch one extra row to learn whether another page exists without
+        # issuing a separate COUNT query.
+        items = list(queryset[:self.page_size + 1])
+        next_cursor = None
+        if len(items) > self.page_size:
+            items = items[:self.page_size]
+            next_cursor = self.encode_cursor(items[-1])
+        return KeysetPage(items, next_cursor)
@@ -0,0 +1,223 @@
+"""
+Deterministic synthetic data for benchmarks and query-plan checks.
+
+Everything is written with ``bulk_create`` in fixed-size batches, so memory
+stays bounded and a million orders take minutes rather than hours. The same
+``seed`` always produces the same rows.
+"""
+import datetime
+import random
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import facts, market, stats
+from .models import FarmerProfile, Order, Produce, RestaurantProfile, User
+
+# (name, typical price per kg) - prices are jittered per listing
+PRODUCE_CATALOG = [
+    ('Tomatoes', 40), ('Potatoes', 30), ('Onions', 35), ('Carrots', 55),
+    ('Spinach', 35), ('Cabbage', 25), ('Cauliflower', 45), ('Okra', 60),
+    ('Brinjal', 40), ('Green Chillies', 80), ('Coriander', 120), ('Cucumber', 30),
+    ('Beans', 70), ('Peas', 90), ('Bottle Gourd', 28), ('Mangoes', 110),
+    ('Bananas', 45), ('Garlic', 150), ('Ginger', 130), ('Capsicum', 75),
+]
+LOCATIONS = ['Nashik', 'Pune', 'Kolar', 'Guntur', 'Ooty', 'Indore', 'Karnal', 'Hassan']
+RESTAURANT_TYPES = [choice for choice, _ in RestaurantProfile.RESTAURANT_TYPES]
+
+# Share of orders in each state once the platform has been running a while
+ORDER_STATUS_WEIGHTS = [('pending', 15), ('accepted', 50), ('rejected', 25), ('completed', 10)]
+
+SEED_PASSWORD = 'agriconnect-seed'
+
+
+@contextmanager
+def _manual_timestamps(*models):
+    """Let bulk_create keep the created_at/updated_at values we generate."""
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Seeder:
+    """
+    Build farmers, restaurants, listings and orders.
+
+    Listing popularity is skewed (a few staples get most of the orders) and
+    timestamps are spread over ``days`` days ending now.
+    """
+
+    def __init__(self, seed=42, prefix='seed', days=180, batch_size=5000, log=None):
+        self.rng = random.Random(seed)
+        self.prefix = prefix
+        self.days = days
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.now = timezone.now()
+        self.password = make_password(SEED_PASSWORD)  # hash once, reuse for every account
+
+    def _timestamp(self, after=None):
+        start = after or self.now - datetime.timedelta(days=self.days)
+        span = max((self.now - start).total_seconds(), 1)
+        return start + datetime.timedelta(seconds=self.rng.random() * span)
+
+    def _users(self, role, count):
+        users = []
+        for chunk in _chunks(range(count), self.batch_size):
+            batch = [
+                User(
+                    username=f'{self.prefix}-{role}{i}@example.com',
+                    email=f'{self.prefix}-{role}{i}@example.com',
+                    first_name=f'{role.title()}{i}',
+                    last_name=self.prefix.title(),
+                    role=role,
+                    phone=f'98{self.rng.randrange(10 ** 8):08d}',
+                    password=self.password,
+                    created_at=self.now,
+                    date_joined=self.now,
+                )
+                for i in chunk
+            ]
+            users.extend(User.objects.bulk_create(batch))
+        return users
+
+    def farmers(self, count):
+        farmers = self._users('farmer', count)
+        for chunk in _chunks(farmers, self.batch_size):
+            FarmerProfile.objects.bulk_create([
+                FarmerProfile(
+                    user=farmer,
+                    farm_name=f'{farmer.first_name} Farms',
+                    location=self.rng.choice(LOCATIONS),
+                )
+                for farmer in chunk
+            ])
+        self.log(f'{count} farmers')
+        return farmers
+
+    def restaurants(self, count):
+        restaurants = self._users('restaurant', count)
+        for chunk in _chunks(restaurants, self.batch_size):
+            RestaurantProfile.objects.bulk_create([
+                RestaurantProfile(
+                    user=restaurant,
+                    restaurant_name=f'{restaurant.first_name} Kitchen',
+                    restaurant_type=self.rng.choice(RESTAURANT_TYPES),
+                    address=f'{self.rng.randint(1, 300)} Market Road, {self.rng.choice(LOCATIONS)}',
+                )
+                for restaurant in chunk
+            ])
+        self.log(f'{count} restaurants')
+        return restaurants
+
+    def produce(self, farmers, per_farmer):
+        """Returns lightweight (id, farmer_id, price, created_at) tuples."""
+        today = timezone.localdate()
+        names = [name for name, _ in PRODUCE_CATALOG]
+        weights = [len(PRODUCE_CATALOG) - i for i in range(len(PRODUCE_CATALOG))]
+        prices = dict(PRODUCE_CATALOG)
+
+        def rows():
+            for farmer in farmers:
+                for _ in range(per_farmer):
+                    name = self.rng.choices(names, weights)[0]
+                    quantity = Decimal(self.rng.choice([0, 20, 40, 80, 150, 300, 500]))
+                    created_at = self._timestamp()
+                    yield Produce(
+                        farmer_id=farmer.pk,
+                        name=name,
+                        quantity=quantity,
+                        price_per_kg=Decimal(prices[name] * self.rng.uniform(0.7, 1.4)).quantize(Decimal('0.01')),
+                        availability_date=today + datetime.timedelta(days=self.rng.randint(-30, 30)),
+                        status=Produce.status_for_quantity(quantity),
+                        created_at=created_at,
+                        updated_at=created_at,
+                    )
+
+        listings = []
+        with _manual_timestamps(Produce):
+            for chunk in _chunks(rows(), self.batch_size):
+                for p in Produce.objects.bulk_create(chunk):
+                    listings.append((p.pk, p.farmer_id, p.price_per_kg, p.created_at))
+        self.log(f'{len(listings)} produce listings')
+        return listings
+
+    def orders(self, restaurants, listings, count):
+        statuses = [status for status, _ in ORDER_STATUS_WEIGHTS]
+        status_weights = [weight for _, weight in ORDER_STATUS_WEIGHTS]
+        # Zipf-ish popularity: earlier listings in a shuffled order sell more
+        popular = listings[:]
+        self.rng.shuffle(popular)
+        cum_weights = []
+        total = 0.0
+        for rank in range(len(popular)):
+            total += 1.0 / (rank + 1)
+            cum_weights.append(total)
+
+        def rows():
+            for _ in range(count):
+                produce_id, farmer_id, price, listed_at = self.rng.choices(popular, cum_weights=cum_weights)[0]
+                quantity = Decimal(self.rng.choice([5, 10, 10, 20, 25, 50, 100]))
+                created_at = self._timestamp(after=listed_at)
+                status = self.rng.choices(statuses, status_weights)[0]
+                yield Order(
+                    restaurant_id=self.rng.choice(restaurants).pk,
+                    farmer_id=farmer_id,
+                    produce_id=produce_id,
+                    quantity_requested=quantity,
+                    total_price=Order.price_for(quantity, price),
+                    status=status,
+                    created_at=created_at,
+                    updated_at=created_at if status == 'pending' else self._timestamp(after=created_at),
+                )
+
+        created = 0
+        with _manual_timestamps(Order):
+            for chunk in _chunks(rows(), self.batch_size):
+                with transaction.atomic():
+                    Order.objects.bulk_create(chunk)
+                created += len(chunk)
+                if created % (self.batch_size * 20) == 0:
+                    self.log(f'  ... {created} orders')
+        self.log(f'{created} orders')
+        return created
+
+    def run(self, farmers=100, restaurants=50, produce_per_farmer=10, orders=10_000):
+        farmer_rows = self.farmers(farmers)
+        restaurant_rows = self.restaurants(restaurants)
+        listings = self.produce(farmer_rows, produce_per_farmer)
+        if restaurant_rows and listings:
+            self.orders(restaurant_rows, listings, orders)
+        stats.recompute()
+        self.log('dashboard stats recomputed')
+        market.rebuild()
+        self.log('market prices rebuilt')
+        facts.rebuild()
+        self.log('farmer daily facts rebuilt')
+        # Without fresh statistics after a bulk load SQLite picks the status
+        # index for the catalog and sorts every listing instead of one page
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        return {'farmers': farmer_rows, 'restaurants': restaurant_rows}
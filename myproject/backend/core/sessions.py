@@ -0,0 +1,24 @@
+"""
+Housekeeping for database-backed sessions.
+
+Django's ``clearsessions`` removes every expired session in one DELETE,
+which holds a write lock on the whole table for as long as that takes.
+``purge_expired_sessions()`` deletes them a batch at a time instead, so
+logins and session writes can interleave. Rows left behind after switching
+to ``SESSION_STORE=signed_cookies`` are cleaned up the same way.
+"""
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+
+
+def purge_expired_sessions(batch_size=5000, now=None):
+    """Delete sessions that expired before ``now``; returns how many."""
+    now = now or timezone.now()
+    purged = 0
+    while True:
+        batch = list(
+            Session.objects.filter(expire_date__lt=now).values_list('pk', flat=True)[:batch_size]
+        )
+        if not batch:
+            return purged
+        purged += Session.objects.filter(pk__in=batch).delete()[0]
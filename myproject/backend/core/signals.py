@@ -0,0 +1,81 @@
+"""
+Signal receivers that keep denormalized data in step with model writes.
+
+Only ordinary ``save()`` / ``delete()`` calls reach these receivers;
+``update()`` and ``bulk_create()`` callers maintain the same data explicitly.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import catalog_cache, email_filter, facts, market, order_feed, stats, sync
+from .backends import forget_user
+from .models import Order, Produce, User, UserStats
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, **kwargs):
+    forget_user(instance.pk)
+    # Only new addresses go into the filter; every add counts towards its capacity
+    email = instance.__dict__.get('email')
+    if email is not None and (created or email != getattr(instance, '_loaded_email', None)):
+        email_filter.add(email)
+    instance._loaded_email = email
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+        if instance.role == 'farmer':
+            stats.bump_global(farmers=1)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    forget_user(instance.pk)
+    if instance.role == 'farmer':
+        stats.bump_global(farmers=-1)
+
+
+@receiver(post_save, sender=Produce)
+def produce_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        stats.produce_added(instance.farmer_id, [instance.status])
+        market.listings_added(instance.farmer_id, [instance])
+    else:
+        old = getattr(instance, '_loaded_status', None)
+        if old is not None:
+            stats.produce_status_changed(instance.farmer_id, old, instance.status)
+    instance._loaded_status = instance.status
+    catalog_cache.bump_version()
+
+
+@receiver(post_delete, sender=Produce)
+def produce_deleted(sender, instance, **kwargs):
+    stats.produce_removed(instance.farmer_id, getattr(instance, '_loaded_status', None) or instance.status)
+    catalog_cache.bump_version()
+    sync.record_deletion('produce', instance.pk, [instance.farmer_id])
+
+
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = None if created else getattr(instance, '_loaded_status', None)
+    if created or old is not None:
+        stats.order_status_changed(instance.farmer_id, instance.restaurant_id, old, instance.status)
+        if old != instance.status:
+            facts.order_transition(
+                instance.farmer_id, instance.produce.name, old, instance.status,
+                instance.quantity_requested, instance.total_price, instance.updated_at,
+            )
+    instance._loaded_status = instance.status
+    catalog_cache.bump_version()
+    order_feed.publish([instance])
+
+
+@receiver(post_delete, sender=Order)
+def order_deleted(sender, instance, **kwargs):
+    old = getattr(instance, '_loaded_status', None) or instance.status
+    stats.order_status_changed(instance.farmer_id, instance.restaurant_id, old, None)
+    catalog_cache.bump_version()
+    order_feed.publish([instance])
+    sync.record_deletion('order', instance.pk, [instance.farmer_id, instance.restaurant_id])
@@ -0,0 +1,106 @@
+"""
+Static asset pipeline.
+
+Page styles and scripts live as plain files under ``frontend/static``
+(``style.css`` and ``pages/``) rather than inline blocks, so browsers keep
+them between page views. ``collectstatic`` through
+``MinifiedManifestStaticFilesStorage`` then, for each of the project's own
+CSS and JS files:
+
+1. minifies the collected copy (``minify_css`` / ``minify_js``);
+2. fingerprints it, e.g. ``pages/login.3f2a9c1b7e4d.css``, rewriting
+   ``url()`` references to match (Django's ManifestStaticFilesStorage);
+3. writes ``.gz`` and ``.br`` siblings (WhiteNoise; ``.br`` needs Brotli).
+
+WhiteNoise serves fingerprinted names as ``immutable`` for a year and picks
+the precompressed sibling the browser accepts. Apps' own files (the admin's)
+ship minified already and are only fingerprinted and compressed.
+"""
+import os
+import re
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+_CSS_TOKEN = re.compile(r'''
+    (?P<string>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')
+  | (?P<comment>/\*.*?\*/)
+  | (?P<space>\s+)
+  | (?P<punct>[{};,>:])
+  | (?P<other>[^"'\s{};,>:/]+|/)
+''', re.S | re.X)
+
+# No whitespace is needed on either side of these; after ":" only, since a
+# space before it can be a descendant combinator (".menu :hover")
+_CSS_TIGHT = frozenset('{};,>')
+
+
+def minify_css(source):
+    """Drop comments and needless whitespace; strings are left alone."""
+    out, space = [], False
+    for match in _CSS_TOKEN.finditer(source):
+        kind, text = match.lastgroup, match.group()
+        if kind == 'comment':
+            continue
+        if kind == 'space':
+            space = bool(out)
+            continue
+        if kind == 'punct':
+            if text == '}' and out and out[-1] == ';':
+                out.pop()
+            if text == ':' and space and out[-1] not in _CSS_TIGHT:
+                out.append(' ')
+        elif space and out[-1] not in _CSS_TIGHT and out[-1] != ':':
+            out.append(' ')
+        out.append(text)
+        space = False
+    return ''.join(out)
+
+
+def minify_js(source):
+    """
+    Strip indentation, blank lines and whole-line ``//`` comments.
+
+    Line breaks stay, so automatic semicolon insertion and anything inside
+    strings or regexes behave exactly as before; lines inside a multi-line
+    template literal are kept verbatim.
+    """
+    lines, in_template = [], False
+    for line in source.splitlines():
+        if in_template:
+            lines.append(line)
+        else:
+            stripped = line.strip()
+            if stripped and not stripped.startswith('//'):
+                lines.append(stripped)
+        if (line.count('`') - line.count('\\`')) % 2:
+            in_template = not in_template
+    return '\n'.join(lines) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def _project_dirs():
+    for entry in settings.STATICFILES_DIRS:
+        path = entry[1] if isinstance(entry, (list, tuple)) else entry
+        yield os.path.realpath(path)
+
+
+class MinifiedManifestStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            paths = dict(paths)
+            project_dirs = tuple(_project_dirs())
+            for name, (storage, path) in paths.items():
+                minify = MINIFIERS.get(os.path.splitext(name)[1])
+                if minify is None or not os.path.realpath(storage.location).startswith(project_dirs):
+                    continue
+                with storage.open(path) as source:
+                    minified = minify(source.read().decode('utf-8'))
+                self.delete(name)
+                self._save(name, ContentFile(minified.encode('utf-8')))
+                # Hash and compress the minified copy, not the original
+                paths[name] = (self, name)
+        yield from super().post_process(paths, dry_run=dry_run, **options)
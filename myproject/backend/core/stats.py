@@ -0,0 +1,181 @@
+"""
+Denormalized dashboard counters.
+
+Dashboards used to COUNT growing tables on every page view. Instead, every
+write that can change a headline number applies a +/- delta to a per-user
+UserStats row and the single GlobalStats row, in the same transaction as the
+write. Ordinary saves and deletes are handled by the signal receivers in
+``core.signals``; code that writes with ``update()`` or ``bulk_create()``
+(which send no signals) calls the helpers below itself.
+
+``recompute()`` rebuilds everything from the source tables and backs the
+``recompute_stats`` repair command.
+"""
+from collections import Counter
+
+from django.db.models import Count, F, Q, Subquery
+
+from .models import GlobalStats, Order, Produce, User, UserStats
+
+
+def _apply(model, pk, deltas):
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if deltas:
+        # A missing row is left missing rather than created from a partial
+        # delta; dashboard_stats() rebuilds it exactly on first read.
+        model.objects.filter(pk=pk).update(
+            **{field: F(field) + delta for field, delta in deltas.items()}
+        )
+
+
+def bump_user(user_id, **deltas):
+    _apply(UserStats, user_id, deltas)
+
+
+def bump_global(**deltas):
+    _apply(GlobalStats, GlobalStats.SINGLETON_ID, deltas)
+
+
+def _produce_counts(status, sign=1):
+    return {
+        'produce_available': sign * (status == 'available'),
+        'catalog_produce': sign * (status in Produce.CATALOG_STATUSES),
+    }
+
+
+def produce_added(farmer_id, statuses):
+    """``statuses`` of listings just created for one farmer."""
+    available = sum(status == 'available' for status in statuses)
+    catalog = sum(status in Produce.CATALOG_STATUSES for status in statuses)
+    bump_user(farmer_id, produce_total=len(statuses), produce_available=available)
+    bump_global(catalog_produce=catalog)
+
+
+def produce_removed(farmer_id, status):
+    counts = _produce_counts(status, sign=-1)
+    bump_user(farmer_id, produce_total=-1, produce_available=counts['produce_available'])
+    bump_global(catalog_produce=counts['catalog_produce'])
+
+
+def produce_status_changed(farmer_id, old, new):
+    if old == new:
+        return
+    before, after = _produce_counts(old), _produce_counts(new)
+    bump_user(farmer_id, produce_available=after['produce_available'] - before['produce_available'])
+    bump_global(catalog_produce=after['catalog_produce'] - before['catalog_produce'])
+
+
+def produce_statuses_changed(transitions):
+    """``(farmer_id, old, new, count)`` rows from a set-based status update."""
+    available, catalog = Counter(), 0
+    for farmer_id, old, new, count in transitions:
+        before, after = _produce_counts(old), _produce_counts(new)
+        available[farmer_id] += count * (after['produce_available'] - before['produce_available'])
+        catalog += count * (after['catalog_produce'] - before['catalog_produce'])
+    for farmer_id, delta in available.items():
+        bump_user(farmer_id, produce_available=delta)
+    bump_global(catalog_produce=catalog)
+
+
+def orders_added(orders):
+    """Pending orders just created, e.g. by a bulk insert."""
+    received = Counter(o.farmer_id for o in orders if o.status == 'pending')
+    placed = Counter(o.restaurant_id for o in orders if o.status == 'pending')
+    for farmer_id, count in received.items():
+        bump_user(farmer_id, orders_pending_received=count)
+    for restaurant_id, count in placed.items():
+        bump_user(restaurant_id, orders_pending_placed=count)
+
+
+def order_status_changed(farmer_id, restaurant_id, old, new):
+    delta = (new == 'pending') - (old == 'pending')
+    if delta:
+        bump_user(farmer_id, orders_pending_received=delta)
+        bump_user(restaurant_id, orders_pending_placed=delta)
+
+
+def stats_query(user_id):
+    global_row = GlobalStats.objects.filter(pk=GlobalStats.SINGLETON_ID)
+    return UserStats.objects.filter(pk=user_id).annotate(
+        total_farmers=Subquery(global_row.values('farmers')[:1]),
+        catalog_produce=Subquery(global_row.values('catalog_produce')[:1]),
+        catalog_version=Subquery(global_row.values('catalog_version')[:1]),
+    ).values(
+        'produce_total', 'produce_available', 'orders_pending_received',
+        'orders_pending_placed', 'total_farmers', 'catalog_produce', 'catalog_version',
+    )
+
+
+def _stats_row(user_id):
+    return stats_query(user_id).first()
+
+
+def dashboard_stats(user):
+    """
+    Every headline number a dashboard shows, from one primary-key lookup.
+
+    The global row is joined in as a scalar subquery so the restaurant
+    dashboard still costs a single query.
+    """
+    row = _stats_row(user.pk)
+    if row is None or row['total_farmers'] is None:
+        # Accounts or databases that predate the stats tables; fill in once.
+        recompute(user_ids=[user.pk], include_global=not GlobalStats.objects.exists())
+        row = _stats_row(user.pk)
+    return row
+
+
+def recompute(user_ids=None, include_global=True, batch_size=1000):
+    """
+    Rebuild counters from the source tables.
+
+    Repairs drift after raw SQL, admin edits of stale rows, or failures
+    between a write and its counter update. With ``user_ids`` only those
+    users are rebuilt. Returns the number of user rows written.
+    """
+    users = User.objects.order_by('pk').values_list('pk', flat=True)
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+
+    written = 0
+    last_pk = 0
+    while True:
+        batch = list(users.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        last_pk = batch[-1]
+
+        stats = {pk: UserStats(user_id=pk) for pk in batch}
+        produce = Produce.objects.filter(farmer_id__in=batch).values('farmer_id').annotate(
+            total=Count('id'), available=Count('id', filter=Q(status='available')),
+        )
+        for row in produce:
+            stats[row['farmer_id']].produce_total = row['total']
+            stats[row['farmer_id']].produce_available = row['available']
+
+        pending = Order.objects.filter(status='pending')
+        for row in pending.filter(farmer_id__in=batch).values('farmer_id').annotate(n=Count('id')):
+            stats[row['farmer_id']].orders_pending_received = row['n']
+        for row in pending.filter(restaurant_id__in=batch).values('restaurant_id').annotate(n=Count('id')):
+            stats[row['restaurant_id']].orders_pending_placed = row['n']
+
+        UserStats.objects.bulk_create(
+            stats.values(),
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=[
+                'produce_total', 'produce_available',
+                'orders_pending_received', 'orders_pending_placed',
+            ],
+        )
+        written += len(batch)
+
+    if include_global:
+        GlobalStats.objects.update_or_create(
+            pk=GlobalStats.SINGLETON_ID,
+            defaults={
+                'farmers': User.objects.filter(role='farmer').count(),
+                'catalog_produce': Produce.objects.filter(status__in=Produce.CATALOG_STATUSES).count(),
+            },
+        )
+    return written
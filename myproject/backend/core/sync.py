@@ -0,0 +1,183 @@
+"""
+Delta sync for clients that keep a local replica of their listings and orders.
+
+A client sends back the opaque cursor from its previous sync and gets only
+the rows changed since, plus tombstones for rows deleted since. It upserts
+the rows and drops the tombstoned ones. With no cursor it gets everything.
+Farmers sync their own listings and the orders they received; restaurants
+sync the orders they placed.
+
+Each stream (listings, orders, tombstones) is one range scan of a
+``(user, updated_at, id)`` index starting at that stream's position in the
+cursor. A batch stops at ``limit`` rows per stream; ``more`` says to call
+again straight away.
+
+Rows are only handed out once their ``updated_at`` is ``SYNC_SETTLE_SECONDS``
+old. Timestamps are taken before a transaction commits, so a younger row
+could still be joined by a slower transaction with an earlier timestamp,
+which a cursor that had already moved past it would never see.
+
+Tombstones are written by ``core.signals`` on every delete and purged after
+``SYNC_TOMBSTONE_DAYS`` (``purge_tombstones``). A client whose cursor is
+older than that may have missed a deletion, so it must sync from scratch.
+"""
+import base64
+import datetime
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+
+from . import api
+from .models import Order, Produce, Tombstone
+from .pagination import InvalidCursor
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 2000
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+STREAMS = ('produce', 'orders', 'deleted')
+
+
+class ResyncRequired(Exception):
+    """The cursor predates the oldest tombstone still kept."""
+
+
+def encode_cursor(positions):
+    raw = json.dumps(
+        {stream: [ts.isoformat(), pk] for stream, (ts, pk) in positions.items()},
+        separators=(',', ':'),
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        positions = {
+            stream: (datetime.datetime.fromisoformat(raw[stream][0]), raw[stream][1])
+            for stream in STREAMS
+        }
+    except (ValueError, TypeError, KeyError, IndexError, OverflowError) as exc:
+        raise InvalidCursor('Malformed sync cursor.') from exc
+    for ts, pk in positions.values():
+        if timezone.is_naive(ts) or not isinstance(pk, int) or isinstance(pk, bool) or not 0 <= pk < 2 ** 63:
+            raise InvalidCursor('Malformed sync cursor.')
+    return positions
+
+
+def _scopes(user):
+    if user.is_farmer():
+        return Produce.objects.filter(farmer=user), Order.objects.filter(farmer=user)
+    if user.is_restaurant():
+        return None, Order.objects.filter(restaurant=user)
+    return None, None
+
+
+def changed_after(queryset, field, position, horizon, limit):
+    """
+    Up to ``limit + 1`` rows after ``position`` on (``field``, id), oldest first.
+
+    The ``>=`` bound on ``field`` alone is implied by the OR below it, but
+    it is what lets the database seek straight to the cursor in the index.
+    """
+    ts, pk = position
+    return (
+        queryset.filter(**{f'{field}__gte': ts, f'{field}__lte': horizon})
+        .filter(Q(**{f'{field}__gt': ts}) | Q(pk__gt=pk))
+        .order_by(field, 'pk')[:limit + 1]
+    )
+
+
+def changes(user, cursor=None, produce_fields=None, order_fields=None, limit=DEFAULT_LIMIT, now=None):
+    """
+    One sync batch for ``user``: changed listings and orders (as API field
+    dicts), deletions, the cursor to send next time and whether there is more.
+    """
+    now = now or timezone.now()
+    horizon = now - datetime.timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+    limit = max(1, min(limit, MAX_LIMIT))
+    produce_fields = produce_fields or list(api.PRODUCE_FIELDS)
+    order_fields = order_fields or list(api.ORDER_FIELDS)
+
+    if cursor:
+        positions = decode_cursor(cursor)
+        if positions['deleted'][0] < now - datetime.timedelta(days=settings.SYNC_TOMBSTONE_DAYS):
+            raise ResyncRequired('Sync cursor is too old; start again without one.')
+    else:
+        # A new replica has nothing to delete: skip tombstones up to now
+        positions = {'produce': (EPOCH, 0), 'orders': (EPOCH, 0), 'deleted': (horizon, 0)}
+
+    produce_scope, order_scope = _scopes(user)
+    result = {'produce': [], 'orders': [], 'deleted': [], 'more': False}
+
+    for stream, scope, fields, names in (
+        ('produce', produce_scope, api.PRODUCE_FIELDS, produce_fields),
+        ('orders', order_scope, api.ORDER_FIELDS, order_fields),
+    ):
+        if scope is None:
+            continue
+        rows = list(changed_after(
+            scope.values(*api.columns(fields, names, extra=('updated_at', 'id'))),
+            'updated_at', positions[stream], horizon, limit,
+        ))
+        if len(rows) > limit:
+            rows, result['more'] = rows[:limit], True
+        if rows:
+            positions[stream] = (rows[-1]['updated_at'], rows[-1]['id'])
+        result[stream] = [api.serialize(row, fields, names) for row in rows]
+
+    tombstones = list(changed_after(
+        Tombstone.objects.filter(user=user).values('id', 'kind', 'object_id', 'deleted_at'),
+        'deleted_at', positions['deleted'], horizon, limit,
+    ))
+    if len(tombstones) > limit:
+        tombstones, result['more'] = tombstones[:limit], True
+        positions['deleted'] = (tombstones[-1]['deleted_at'], tombstones[-1]['id'])
+    else:
+        # Every deletion up to the horizon has been seen. Move up to it, so a
+        # client on a quiet account is not sent back to a full resync.
+        last = (tombstones[-1]['deleted_at'], tombstones[-1]['id']) if tombstones else positions['deleted']
+        positions['deleted'] = max(last, (horizon, 0))
+    result['deleted'] = [{'kind': t['kind'], 'id': t['object_id']} for t in tombstones]
+
+    result['cursor'] = encode_cursor(positions)
+    return result
+
+
+def as_json(result):
+    return json.dumps(result, cls=DjangoJSONEncoder, separators=(',', ':'))
+
+
+def as_ndjson(result):
+    """One line per record, then a final line with the cursor."""
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    lines = [encoder.encode({'type': 'produce', **row}) for row in result['produce']]
+    lines += [encoder.encode({'type': 'order', **row}) for row in result['orders']]
+    lines += [encoder.encode({'type': 'deleted', **row}) for row in result['deleted']]
+    lines.append(encoder.encode({'type': 'cursor', 'cursor': result['cursor'], 'more': result['more']}))
+    return '\n'.join(lines) + '\n'
+
+
+def record_deletion(kind, object_id, user_ids):
+    """Leave a tombstone for each user whose replica held the deleted row."""
+    Tombstone.objects.bulk_create([
+        Tombstone(user_id=user_id, kind=kind, object_id=object_id)
+        for user_id in dict.fromkeys(user_ids) if user_id is not None
+    ])
+
+
+def purge_tombstones(batch_size=5000, now=None):
+    """Delete tombstones older than SYNC_TOMBSTONE_DAYS; returns how many."""
+    cutoff = (now or timezone.now()) - datetime.timedelta(days=settings.SYNC_TOMBSTONE_DAYS)
+    purged = 0
+    while True:
+        batch = list(
+            Tombstone.objects.filter(deleted_at__lt=cutoff).values_list('pk', flat=True)[:batch_size]
+        )
+        if not batch:
+            return purged
+        purged += Tombstone.objects.filter(pk__in=batch).delete()[0]
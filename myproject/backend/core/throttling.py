@@ -0,0 +1,33 @@
+"""
+Per-client request throttling backed by the shared cache.
+
+A fixed window counter per (scope, client IP): cheap enough to run on every
+keystroke-driven AJAX call and shared between workers when the cache is.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+
+def client_ip(request):
+    """
+    The caller's address. Behind a proxy that appends to X-Forwarded-For
+    (set TRUST_X_FORWARDED_FOR), the last entry is the one the proxy saw;
+    earlier entries are client-supplied and cannot be trusted.
+    """
+    if settings.TRUST_X_FORWARDED_FOR:
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+        if forwarded:
+            return forwarded.split(',')[-1].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def is_throttled(request, scope, limit, window):
+    """Count this request; True once the client has made more than ``limit`` in ``window`` seconds."""
+    key = f'throttle:{scope}:{client_ip(request)}'
+    if cache.add(key, 1, timeout=window):
+        return False
+    try:
+        return cache.incr(key) > limit
+    except ValueError:  # the window expired between add() and incr()
+        cache.add(key, 1, timeout=window)
+        return False
@@ -1,29 +1,63 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+from .db import replica_reads
+from .instrumentation import query_budget
+
+dashboards = async_views if settings.ASYNC_DASHBOARDS else views
 
 urlpatterns = [
     # Home
-    path('', views.home, name='home'),
+    path('', query_budget(3)(views.home), name='home'),
     
     # Authentication
-    path('register/', views.register_farmer, name='register'),
-    path('register/farmer/', views.register_farmer, name='register_farmer'),
-    path('register/restaurant/', views.register_restaurant, name='register_restaurant'),
-    path('login/', views.user_login, name='login'),
-    path('logout/', views.user_logout, name='logout'),
+    path('register/', query_budget(4)(views.register_farmer), name='register'),
+    path('register/farmer/', query_budget(4)(views.register_farmer), name='register_farmer'),
+    path('register/restaurant/', query_budget(4)(views.register_restaurant), name='register_restaurant'),
+    path('login/', query_budget(8)(views.user_login), name='login'),
+    # Reads the session, then deletes it
+    path('logout/', query_budget(4)(views.user_logout), name='logout'),
     
-    # Dashboard
-    path('dashboard/', views.dashboard, name='dashboard'),
-    path('farmer/dashboard/', views.farmer_dashboard, name='farmer_dashboard'),
-    path('restaurant/dashboard/', views.restaurant_dashboard, name='restaurant_dashboard'),
+    # Dashboard (replica_reads: may be served by a read replica)
+    path('dashboard/', query_budget(2)(views.dashboard), name='dashboard'),
+    path('farmer/dashboard/', query_budget(4)(replica_reads(dashboards.farmer_dashboard)), name='farmer_dashboard'),
+    path('restaurant/dashboard/', query_budget(7)(replica_reads(dashboards.restaurant_dashboard)), name='restaurant_dashboard'),
+    # Reads only the pre-aggregated daily facts (core.facts)
+    path('farmer/analytics/', query_budget(4)(replica_reads(views.farmer_analytics)), name='farmer_analytics'),
+    # Both variants stay reachable whichever one the main routes serve
+    path('async/farmer/dashboard/', query_budget(4)(replica_reads(async_views.farmer_dashboard)), name='farmer_dashboard_async'),
+    path('async/restaurant/dashboard/', query_budget(7)(replica_reads(async_views.restaurant_dashboard)), name='restaurant_dashboard_async'),
     
     # Farmer actions
-    path('farmer/add-produce/', views.add_produce, name='add_produce'),
-    path('farmer/order/<int:order_id>/<str:status>/', views.update_order_status, name='update_order_status'),
+    # Budgets include the market price rollup (core.market) and the farmer's daily facts (core.facts),
+    # which cost more on a period's first listing or order
+    path('farmer/add-produce/', query_budget(13)(views.add_produce), name='add_produce'),
+    # No budget for the bulk endpoints: their query count grows with the batch
+    path('farmer/import-produce/', views.import_produce_file, name='import_produce'),
+    path('farmer/order/<int:order_id>/<str:status>/', query_budget(17)(views.update_order_status), name='update_order_status'),
     
     # Restaurant actions
-    path('restaurant/request/<int:produce_id>/', views.request_supply, name='request_supply'),
+    # Includes the farmer's daily facts (core.facts), two queries more on their first order of the day
+    path('restaurant/request/<int:produce_id>/', query_budget(13)(views.request_supply), name='request_supply'),
+    path('restaurant/cart/', views.request_supply_cart, name='request_supply_cart'),
+    # 3 when the page is cached; every catalog write forces a rebuild (the page and its market prices)
+    path('restaurant/catalog/', query_budget(5)(replica_reads(views.catalog_fragment)), name='catalog_fragment'),
+    
+    # Exports
+    path('orders/export/', query_budget(2)(replica_reads(views.export_my_orders)), name='export_my_orders'),
+    path('farmer/export/produce/', query_budget(2)(replica_reads(views.export_my_produce)), name='export_my_produce'),
+    path('exports/orders/', query_budget(2)(replica_reads(views.export_all_orders)), name='export_all_orders'),
+    path('exports/produce/', query_budget(2)(replica_reads(views.export_all_produce)), name='export_all_produce'),
+    
+    # JSON API (read-only, session auth; conditional GETs answer 304)
+    path('api/v1/produce/', query_budget(4)(views.api_produce_list), name='api_produce_list'),
+    path('api/v1/produce/<int:produce_id>/', query_budget(4)(views.api_produce_detail), name='api_produce_detail'),
+    path('api/v1/orders/', query_budget(4)(views.api_order_list), name='api_order_list'),
+    path('api/v1/sync/', query_budget(5)(views.sync_changes), name='sync_changes'),
     
     # API
-    path('api/check-email/', views.check_email, name='check_email'),
+    path('api/check-email/', query_budget(1)(views.check_email), name='check_email'),
+    # One JSON poll under WSGI; under ASGI a long-lived stream whose queries run after the middleware has returned
+    path('api/orders/events/', query_budget(3)(dashboards.order_events), name='order_events'),
+    path('api/catalog-cache/', views.catalog_cache_stats, name='catalog_cache_stats'),
 ]
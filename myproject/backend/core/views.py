@@ -1,12 +1,40 @@
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_POST
 from django.contrib import messages
 from django.db.models import Sum, Count
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
 from .models import User, Produce, Order, FarmerProfile, RestaurantProfile
-from .forms import FarmerRegistrationForm, RestaurantRegistrationForm, ProduceForm, OrderForm
+from .forms import FarmerRegistrationForm, RestaurantRegistrationForm, ProduceForm, OrderForm, CatalogFilterForm, ExportFilterForm, AnalyticsRangeForm
+from . import api, catalog_cache, email_filter, exports, facts, importers, market, order_feed, stats, sync
+from .page_cache import anonymous_page
+from .pagination import KeysetPaginator, InvalidCursor
+from .throttling import is_throttled
+from .orders import place_order, place_cart, accept_order, reject_order, OrderTransitionError, InsufficientStock, ProduceUnavailable
+
+CATALOG_PAGE_SIZE = 25
+
+# Newest incoming requests listed on the farmer dashboard; later ones arrive live
+INCOMING_ORDERS_SHOWN = 50
+
+# Newest orders listed on the restaurant dashboard; the orders export has them all
+RECENT_ORDERS_SHOWN = 50
 
+# Most lines a single cart request may carry
+CART_MAX_LINES = 100
 
+
+@anonymous_page
 def home(request):
     """Landing page"""
     if request.user.is_authenticated:
@@ -14,6 +42,7 @@ def home(request):
     return render(request, 'index.html')
 
 
+@anonymous_page
 def register_farmer(request):
     """Farmer registration view"""
     if request.user.is_authenticated:
@@ -24,12 +53,12 @@ def register_farmer(request):
         if form.is_valid():
             # Check if email already exists
             email = form.cleaned_data['email']
-            if User.objects.filter(email=email).exists():
+            if User.objects.with_email(email).exists():
                 messages.error(request, 'This email is already registered. Please login instead.')
                 return render(request, 'register.html', {'form': form, 'role': 'farmer', 'email_exists': True})
             
             user = form.save()
-            login(request, user, backend='django.contrib.auth.backends.ModelBackend')
+            login(request, user, backend='core.backends.EmailBackend')
             messages.success(request, f'Welcome to AgriConnect, {user.first_name}! Your farmer account has been created.')
             return redirect('farmer_dashboard')
         else:
@@ -40,6 +69,7 @@ def register_farmer(request):
     return render(request, 'register.html', {'form': form, 'role': 'farmer'})
 
 
+@anonymous_page
 def register_restaurant(request):
     """Restaurant registration view"""
     if request.user.is_authenticated:
@@ -49,12 +79,12 @@ def register_restaurant(request):
         form = RestaurantRegistrationForm(request.POST)
         if form.is_valid():
             email = form.cleaned_data['email']
-            if User.objects.filter(email=email).exists():
+            if User.objects.with_email(email).exists():
                 messages.error(request, 'This email is already registered. Please login instead.')
                 return render(request, 'register.html', {'form': form, 'role': 'restaurant', 'email_exists': True})
             
             user = form.save()
-            login(request, user, backend='django.contrib.auth.backends.ModelBackend')
+            login(request, user, backend='core.backends.EmailBackend')
             messages.success(request, f'Welcome to AgriConnect! Your restaurant account has been created.')
             return redirect('restaurant_dashboard')
         else:
@@ -65,6 +95,7 @@ def register_restaurant(request):
     return render(request, 'register.html', {'form': form, 'role': 'restaurant'})
 
 
+@anonymous_page
 def user_login(request):
     """Login view for both farmers and restaurants"""
     if request.user.is_authenticated:
@@ -117,25 +148,56 @@ def farmer_dashboard(request):
     # Get farmer's produce listings
     produce_listings = Produce.objects.filter(farmer=request.user)
     
+    # Live updates resume from here, so read it before the orders themselves
+    feed_after = order_feed.latest(request.user.pk)
+    
     # Get incoming orders/requests
-    incoming_orders = Order.objects.filter(farmer=request.user).select_related('restaurant', 'produce')
+    incoming_orders = (
+        Order.objects.filter(farmer=request.user)
+        .select_related('restaurant__restaurant_profile', 'produce')[:INCOMING_ORDERS_SHOWN]
+    )
     
-    # Stats
-    total_produce = produce_listings.count()
-    available_produce = produce_listings.filter(status='available').count()
-    pending_orders = incoming_orders.filter(status='pending').count()
+    # Stats, maintained incrementally by core.stats
+    headline = stats.dashboard_stats(request.user)
     
     context = {
         'produce_listings': produce_listings,
         'incoming_orders': incoming_orders,
-        'total_produce': total_produce,
-        'available_produce': available_produce,
-        'pending_orders': pending_orders,
+        'feed_after': feed_after,
+        **order_feed.client_options(),
+        'total_produce': headline['produce_total'],
+        'available_produce': headline['produce_available'],
+        'pending_orders': headline['orders_pending_received'],
         'form': ProduceForm(),
     }
     return render(request, 'farmer_dashboard.html', context)
 
 
+@login_required
+def farmer_analytics(request):
+    """Revenue, volume sold and acceptance rate over a date range, from core.facts only"""
+    if not request.user.is_farmer():
+        messages.error(request, 'Access denied. This page is for farmers only.')
+        return redirect('dashboard')
+    
+    form = AnalyticsRangeForm(request.GET or None)
+    start, end = form.date_range()
+    grain = facts.grain_for(start, end)
+    series = facts.series(request.user.pk, start, end, grain)
+    produce = facts.by_produce(request.user.pk, start, end)
+    
+    context = {
+        'form': form,
+        'date_from': start,
+        'date_to': end,
+        'grain': grain,
+        'series': series,
+        'produce': produce,
+        'totals': facts.totals(produce),
+    }
+    return render(request, 'farmer_analytics.html', context)
+
+
 @login_required
 def add_produce(request):
     """Add new produce listing"""
@@ -156,6 +218,25 @@ def add_produce(request):
     return redirect('farmer_dashboard')
 
 
+@login_required
+@require_POST
+def import_produce_file(request):
+    """Bulk-create listings from an uploaded CSV or NDJSON file"""
+    if not request.user.is_farmer():
+        return JsonResponse({'error': 'Access denied.'}, status=403)
+    
+    upload = request.FILES.get('file')
+    if upload is None:
+        return JsonResponse({'error': 'Attach a CSV or NDJSON file as "file".'}, status=400)
+    
+    fmt = request.POST.get('format') or importers.guess_format(upload.name)
+    if fmt not in importers.FORMATS:
+        return JsonResponse({'error': f'Unsupported format "{fmt}".'}, status=400)
+    
+    result = importers.import_produce(request.user, importers.iter_rows(upload.file, fmt))
+    return JsonResponse(result.as_dict())
+
+
 @login_required
 def update_order_status(request, order_id, status):
     """Accept or reject an order"""
@@ -163,24 +244,57 @@ def update_order_status(request, order_id, status):
         messages.error(request, 'Access denied.')
         return redirect('dashboard')
     
-    order = get_object_or_404(Order, id=order_id, farmer=request.user)
+    order = get_object_or_404(
+        Order.objects.only(
+            'id', 'status', 'quantity_requested', 'total_price', 'produce_id', 'farmer_id', 'restaurant_id',
+        ),
+        id=order_id, farmer=request.user,
+    )
     
-    if status in ['accepted', 'rejected']:
-        order.status = status
-        order.save()
-        
+    try:
         if status == 'accepted':
-            # Update produce quantity
-            produce = order.produce
-            produce.quantity -= order.quantity_requested
-            produce.update_status()
+            accept_order(order)
             messages.success(request, f'Order #{order.id} has been accepted!')
-        else:
+        elif status == 'rejected':
+            reject_order(order)
             messages.info(request, f'Order #{order.id} has been rejected.')
+    except OrderTransitionError as e:
+        messages.error(request, str(e))
     
     return redirect('farmer_dashboard')
 
 
+def _catalog_page(filter_form, version, cursor=None, page_size=CATALOG_PAGE_SIZE):
+    """
+    One keyset page of the produce catalog, newest listings first, with its
+    rendered rows and price-vs-market badges. Shared by all restaurants
+    through core.catalog_cache.
+    """
+    queryset = filter_form.filter(
+        Produce.objects.filter(status__in=Produce.CATALOG_STATUSES).select_related('farmer__farmer_profile')
+    )
+    paginator = KeysetPaginator(queryset, keys=('created_at', 'id'), page_size=page_size)
+    
+    def build():
+        page = paginator.page(cursor)
+        market.annotate_listings(page)
+        return page, render_to_string('catalog_rows.html', {'available_produce': page})
+    
+    return catalog_cache.get_or_build(
+        version, [filter_form.querystring(), cursor or '', str(paginator.page_size)], build,
+    )
+
+
+def _recent_orders(restaurant):
+    """The restaurant's newest orders, and whether it has older ones"""
+    # One row past the page says whether there are more, without a COUNT
+    orders = list(
+        Order.objects.filter(restaurant=restaurant)
+        .select_related('farmer', 'produce')[:RECENT_ORDERS_SHOWN + 1]
+    )
+    return orders[:RECENT_ORDERS_SHOWN], len(orders) > RECENT_ORDERS_SHOWN
+
+
 @login_required
 def restaurant_dashboard(request):
     """Restaurant dashboard view"""
@@ -188,29 +302,72 @@ def restaurant_dashboard(request):
         messages.error(request, 'Access denied. This page is for restaurants only.')
         return redirect('dashboard')
     
-    # Get all available produce from farmers
-    available_produce = Produce.objects.filter(
-        status__in=['available', 'pending']
-    ).select_related('farmer')
+    # Stats, maintained incrementally by core.stats
+    headline = stats.dashboard_stats(request.user)
     
-    # Get restaurant's orders
-    my_orders = Order.objects.filter(restaurant=request.user).select_related('farmer', 'produce')
+    # First page of the produce catalog; further pages load via catalog_fragment
+    catalog_form = CatalogFilterForm(request.GET or None)
+    available_produce, catalog_rows = _catalog_page(catalog_form, headline['catalog_version'])
     
-    # Stats
-    total_farmers = User.objects.filter(role='farmer').count()
-    total_produce = available_produce.count()
-    pending_orders = my_orders.filter(status='pending').count()
+    # Get restaurant's orders, after noting where live updates resume
+    feed_after = order_feed.latest(request.user.pk)
+    my_orders, more_orders = _recent_orders(request.user)
     
     context = {
         'available_produce': available_produce,
+        'catalog_rows': catalog_rows,
+        'catalog_form': catalog_form,
+        'catalog_query': catalog_form.querystring(),
         'my_orders': my_orders,
-        'total_farmers': total_farmers,
-        'total_produce': total_produce,
-        'pending_orders': pending_orders,
+        'more_orders': more_orders,
+        'feed_after': feed_after,
+        **order_feed.client_options(),
+        'total_farmers': headline['total_farmers'],
+        'total_produce': headline['catalog_produce'],
+        'pending_orders': headline['orders_pending_placed'],
     }
     return render(request, 'restaurant_dashboard.html', context)
 
 
+@login_required
+def catalog_fragment(request):
+    """HTML rows for the next catalog page, loaded incrementally by the dashboard"""
+    if not request.user.is_restaurant():
+        return HttpResponseForbidden('This catalog is for restaurants only.')
+    
+    catalog_form = CatalogFilterForm(request.GET)
+    try:
+        page, rows = _catalog_page(
+            catalog_form,
+            catalog_cache.current_version(),
+            cursor=request.GET.get('cursor') or None,
+            page_size=request.GET.get('limit', CATALOG_PAGE_SIZE),
+        )
+    except InvalidCursor as e:
+        return HttpResponseBadRequest(str(e))
+    
+    response = HttpResponse(rows)
+    if page.next_cursor:
+        response['X-Next-Cursor'] = page.next_cursor
+    return response
+
+
+def _event_stream_response(events):
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # don't let nginx hold events back
+    return response
+
+
+@login_required
+def order_events(request):
+    """The user's order changes since ``after``, as JSON, patched into the dashboard tables"""
+    if request.user.role not in order_feed.ROW_TEMPLATES:
+        return HttpResponseForbidden('Order updates are for farmers and restaurants.')
+    # A stream would pin this sync worker; the page polls instead (order_feed.client_options)
+    return JsonResponse(order_feed.snapshot(request.user, order_feed.start_position(request)))
+
+
 @login_required
 def request_supply(request, produce_id):
     """Request supply from a farmer"""
@@ -218,7 +375,7 @@ def request_supply(request, produce_id):
         messages.error(request, 'Access denied.')
         return redirect('dashboard')
     
-    produce = get_object_or_404(Produce, id=produce_id)
+    produce = get_object_or_404(Produce.objects.select_related('farmer'), id=produce_id)
     
     if request.method == 'POST':
         quantity = request.POST.get('quantity', '').strip()
@@ -230,38 +387,213 @@ def request_supply(request, produce_id):
         
         try:
             # Replace comma with period for decimal parsing
-            quantity = quantity.replace(',', '.')
-            quantity = float(quantity)
-            
-            if quantity <= 0:
-                messages.error(request, 'Quantity must be greater than zero.')
-                return redirect('restaurant_dashboard')
-            
-            if quantity > float(produce.quantity):
-                messages.error(request, f'Requested quantity exceeds available stock ({produce.quantity} kg).')
-                return redirect('restaurant_dashboard')
-            
-            # Create order
-            from decimal import Decimal
-            order = Order.objects.create(
-                restaurant=request.user,
-                farmer=produce.farmer,
-                produce=produce,
-                quantity_requested=Decimal(str(quantity))
-            )
-            messages.success(request, f'✅ Supply request sent to {produce.farmer.first_name} for {quantity} kg of {produce.name}!')
-        except (ValueError, TypeError) as e:
-            messages.error(request, f'Please enter a valid number for quantity.')
+            quantity = Decimal(quantity.replace(',', '.')).quantize(Decimal('0.01'))
+            if not quantity.is_finite():
+                raise InvalidOperation
+        except InvalidOperation:
+            messages.error(request, 'Please enter a valid number for quantity.')
+            return redirect('restaurant_dashboard')
+        
+        if quantity <= 0:
+            messages.error(request, 'Quantity must be greater than zero.')
+            return redirect('restaurant_dashboard')
+        
+        # Create order, holding its stock until the farmer responds
+        try:
+            place_order(request.user, produce, quantity)
+        except ProduceUnavailable:
+            messages.error(request, 'This produce is not available.')
+            return redirect('restaurant_dashboard')
+        except InsufficientStock:
+            messages.error(request, f'Requested quantity exceeds available stock ({produce.available_to_promise} kg).')
+            return redirect('restaurant_dashboard')
+        messages.success(request, f'✅ Supply request sent to {produce.farmer.first_name} for {quantity} kg of {produce.name}!')
     
     return redirect('restaurant_dashboard')
 
 
+def _parse_cart(request):
+    """(produce_id, quantity) pairs from a JSON body or repeated form fields"""
+    if request.content_type == 'application/json':
+        try:
+            items = json.loads(request.body)['items']
+            raw = [(item.get('produce_id'), item.get('quantity')) for item in items]
+        except (ValueError, KeyError, TypeError, AttributeError):
+            raise ValueError('Expected a JSON body like {"items": [{"produce_id": 1, "quantity": 10}]}.')
+    else:
+        raw = list(zip(request.POST.getlist('produce_id'), request.POST.getlist('quantity')))
+    
+    if not raw:
+        raise ValueError('The cart is empty.')
+    if len(raw) > CART_MAX_LINES:
+        raise ValueError(f'A cart can hold at most {CART_MAX_LINES} lines.')
+    
+    lines = []
+    for produce_id, quantity in raw:
+        # Form fields are strings and JSON ids integers; int() would also
+        # turn 1.7 or true into an id
+        if isinstance(produce_id, str):
+            try:
+                produce_id = int(produce_id)
+            except ValueError:
+                produce_id = None
+        elif not isinstance(produce_id, int) or isinstance(produce_id, bool):
+            produce_id = None
+        try:
+            # Replace comma with period for decimal parsing
+            quantity = Decimal(str(quantity).strip().replace(',', '.')).quantize(Decimal('0.01'))
+            if not quantity.is_finite():
+                raise InvalidOperation
+        except (InvalidOperation, ValueError):
+            quantity = None
+        lines.append((produce_id, quantity))
+    return lines
+
+
+@login_required
+@require_POST
+def request_supply_cart(request):
+    """Request supply for many produce listings at once; reports per line"""
+    if not request.user.is_restaurant():
+        return JsonResponse({'error': 'Access denied.'}, status=403)
+    
+    try:
+        lines = _parse_cart(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    report = place_cart(request.user, lines)
+    placed = sum(line['ok'] for line in report)
+    return JsonResponse({'placed': placed, 'failed': len(report) - placed, 'lines': report})
+
+
+def _export(request, queryset, columns, status_choices, basename):
+    """Validate export filters and stream the matching rows"""
+    form = ExportFilterForm(request.GET, status_choices=status_choices)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    return exports.stream_export(
+        form.filter(queryset), columns, form.cleaned_data['format'] or 'csv', basename,
+    )
+
+
+@login_required
+def export_my_orders(request):
+    """Orders a farmer received or a restaurant placed"""
+    if request.user.is_farmer():
+        queryset = exports.order_queryset().filter(farmer=request.user)
+    elif request.user.is_restaurant():
+        queryset = exports.order_queryset().filter(restaurant=request.user)
+    else:
+        return HttpResponseForbidden('Exports are for farmers and restaurants.')
+    return _export(request, queryset, exports.ORDER_COLUMNS, Order.STATUS_CHOICES, 'orders')
+
+
+@login_required
+def export_my_produce(request):
+    """A farmer's own produce listings"""
+    if not request.user.is_farmer():
+        return HttpResponseForbidden('This export is for farmers only.')
+    queryset = exports.produce_queryset().filter(farmer=request.user)
+    return _export(request, queryset, exports.PRODUCE_COLUMNS, Produce.STATUS_CHOICES, 'produce')
+
+
+@staff_member_required
+def export_all_orders(request):
+    """Every order on the platform (staff only)"""
+    return _export(request, exports.order_queryset(), exports.ORDER_COLUMNS, Order.STATUS_CHOICES, 'all-orders')
+
+
+@staff_member_required
+def export_all_produce(request):
+    """Every produce listing on the platform (staff only)"""
+    return _export(request, exports.produce_queryset(), exports.PRODUCE_COLUMNS, Produce.STATUS_CHOICES, 'all-produce')
+
+
+@api.endpoint
+def api_produce_list(request):
+    """Catalog listings, newest first, with the dashboard's filters (restaurants)"""
+    if not request.user.is_restaurant():
+        raise api.ApiError(403, 'The catalog is for restaurants only.')
+    scope = CatalogFilterForm(request.GET).filter(
+        Produce.objects.filter(status__in=Produce.CATALOG_STATUSES)
+    )
+    return api.list_response(request, scope, api.PRODUCE_FIELDS)
+
+
+@api.endpoint
+def api_produce_detail(request, produce_id):
+    """One listing, whatever its status (restaurants)"""
+    if not request.user.is_restaurant():
+        raise api.ApiError(403, 'The catalog is for restaurants only.')
+    return api.detail_response(request, Produce.objects.filter(pk=produce_id), api.PRODUCE_FIELDS)
+
+
+@api.endpoint
+def api_order_list(request):
+    """Orders a farmer received or a restaurant placed, newest first"""
+    if request.user.is_farmer():
+        scope = Order.objects.filter(farmer=request.user)
+    elif request.user.is_restaurant():
+        scope = Order.objects.filter(restaurant=request.user)
+    else:
+        raise api.ApiError(403, 'Orders are for farmers and restaurants.')
+    status = request.GET.get('status')
+    if status:
+        if status not in dict(Order.STATUS_CHOICES):
+            raise api.ApiError(400, f"Unknown status '{status}'.")
+        scope = scope.filter(status=status)
+    return api.list_response(request, scope, api.ORDER_FIELDS)
+
+
+@gzip_page
+@api.endpoint
+def sync_changes(request):
+    """Listings and orders changed since the client's sync cursor, plus deletions"""
+    try:
+        limit = int(request.GET.get('limit', sync.DEFAULT_LIMIT))
+    except ValueError:
+        raise api.ApiError(400, 'limit must be a number.')
+    try:
+        result = sync.changes(
+            request.user,
+            cursor=request.GET.get('cursor') or None,
+            produce_fields=api.selected_fields(request, api.PRODUCE_FIELDS, param='produce_fields'),
+            order_fields=api.selected_fields(request, api.ORDER_FIELDS, param='order_fields'),
+            limit=limit,
+        )
+    except sync.ResyncRequired as e:
+        return JsonResponse({'error': str(e), 'resync': True}, status=410)
+    
+    if request.GET.get('format') == 'ndjson':
+        response = HttpResponse(sync.as_ndjson(result), content_type='application/x-ndjson')
+    else:
+        response = HttpResponse(sync.as_json(result), content_type='application/json')
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@staff_member_required
+def catalog_cache_stats(request):
+    """Hit/miss counters for the shared catalog cache (staff only)"""
+    return JsonResponse(catalog_cache.counters())
+
+
 def check_email(request):
     """AJAX endpoint to check if email already exists"""
-    email = request.GET.get('email', '')
-    exists = User.objects.filter(email=email).exists()
+    limit, window = settings.CHECK_EMAIL_RATE
+    if is_throttled(request, 'check_email', limit, window):
+        response = JsonResponse({'error': 'Too many requests. Please slow down.'}, status=429)
+        response['Retry-After'] = str(window)
+        return response
+    
+    email = request.GET.get('email', '').strip()
+    try:
+        validate_email(email)
+    except ValidationError:
+        return JsonResponse({'error': 'Enter a valid email address.'}, status=400)
+    
+    # The filter rules out almost every new address without a query
+    exists = email_filter.might_exist(email) and User.objects.with_email(email).exists()
     return JsonResponse({'exists': exists})
 
-
-# Import JsonResponse for AJAX
-from django.http import JsonResponse
@@ -0,0 +1,45 @@
+"""
+Work done once per worker process at startup, before it serves requests.
+
+Called from the WSGI/ASGI entry points rather than ``AppConfig.ready()``,
+which also runs for management commands such as ``migrate`` where the
+tables may not exist yet.
+"""
+import logging
+from pathlib import Path
+
+from django.db import DatabaseError
+from django.template import TemplateSyntaxError, engines
+
+from . import email_filter
+
+logger = logging.getLogger(__name__)
+
+
+def compile_templates():
+    """
+    Compile every template in the engines' DIRS (frontend/templates) into
+    the cached loader, so no request pays to parse one. Returns the count.
+    """
+    compiled = 0
+    for engine in engines.all():
+        for directory in map(Path, engine.dirs):
+            for path in sorted(directory.rglob('*.html')):
+                name = path.relative_to(directory).as_posix()
+                try:
+                    engine.get_template(name)
+                except TemplateSyntaxError as exc:
+                    # Left for the page that uses it to report
+                    logger.warning('Skipped template %s: %s', name, exc)
+                else:
+                    compiled += 1
+    return compiled
+
+
+def run():
+    compile_templates()
+    try:
+        email_filter.warm()
+    except DatabaseError as exc:
+        # Unmigrated database: the filter builds itself on first use instead
+        logger.warning('Skipped email filter warmup: %s', exc)
@@ -0,0 +1,57 @@
+// Farmer analytics: one SVG bar chart per .chart element, drawn from the
+// per-period series the page embeds as JSON. Bars carry the period and value
+// as a tooltip; periods without orders are simply absent.
+(function () {
+    const series = JSON.parse(document.getElementById('analytics-series').textContent);
+    const SVG = 'http://www.w3.org/2000/svg';
+    const WIDTH = 800, HEIGHT = 220, LEFT = 48, BOTTOM = 24, TOP = 8;
+
+    function element(name, attributes, text) {
+        const node = document.createElementNS(SVG, name);
+        for (const [key, value] of Object.entries(attributes)) node.setAttribute(key, value);
+        if (text !== undefined) node.textContent = text;
+        return node;
+    }
+
+    function draw(chart) {
+        const field = chart.dataset.field;
+        const points = series
+            .filter(row => row[field] !== null)
+            .map(row => ({ period: row.period, value: Number(row[field]) }));
+        if (!points.length) {
+            chart.innerHTML = '<p class="empty-message">No orders in this range.</p>';
+            return;
+        }
+
+        const max = Number(chart.dataset.max) || Math.max(...points.map(p => p.value)) || 1;
+        const plotHeight = HEIGHT - TOP - BOTTOM;
+        const step = (WIDTH - LEFT) / points.length;
+        const svg = element('svg', { viewBox: `0 0 ${WIDTH} ${HEIGHT}`, preserveAspectRatio: 'none', role: 'img' });
+
+        svg.appendChild(element('line', { class: 'axis', x1: LEFT, y1: HEIGHT - BOTTOM, x2: WIDTH, y2: HEIGHT - BOTTOM }));
+        svg.appendChild(element('text', { x: LEFT - 6, y: TOP + 10, 'text-anchor': 'end' }, max.toLocaleString()));
+        svg.appendChild(element('text', { x: LEFT - 6, y: HEIGHT - BOTTOM, 'text-anchor': 'end' }, '0'));
+
+        points.forEach((point, i) => {
+            const height = plotHeight * point.value / max;
+            const bar = element('rect', {
+                class: 'bar',
+                x: LEFT + i * step + step * 0.1,
+                y: HEIGHT - BOTTOM - height,
+                width: Math.max(step * 0.8, 1),
+                height: height,
+            });
+            bar.appendChild(element('title', {}, `${point.period}: ${point.value.toLocaleString()}`));
+            svg.appendChild(bar);
+        });
+
+        // First and last period under the axis
+        svg.appendChild(element('text', { x: LEFT, y: HEIGHT - 6 }, points[0].period));
+        if (points.length > 1) {
+            svg.appendChild(element('text', { x: WIDTH, y: HEIGHT - 6, 'text-anchor': 'end' }, points[points.length - 1].period));
+        }
+        chart.replaceChildren(svg);
+    }
+
+    document.querySelectorAll('.chart').forEach(draw);
+})();
@@ -0,0 +1,64 @@
+// Tab switching
+const farmerTab = document.getElementById('farmer-tab');
+const restaurantTab = document.getElementById('restaurant-tab');
+const farmerForm = document.getElementById('farmer-login-form');
+const restaurantForm = document.getElementById('restaurant-login-form');
+const errorAlert = document.getElementById('error-alert');
+
+farmerTab.addEventListener('click', function() {
+    farmerTab.classList.add('active-farmer');
+    restaurantTab.classList.remove('active-restaurant');
+    farmerForm.style.display = 'block';
+    restaurantForm.style.display = 'none';
+    errorAlert.style.display = 'none';
+});
+
+restaurantTab.addEventListener('click', function() {
+    restaurantTab.classList.add('active-restaurant');
+    farmerTab.classList.remove('active-farmer');
+    restaurantForm.style.display = 'block';
+    farmerForm.style.display = 'none';
+    errorAlert.style.display = 'none';
+});
+
+// Demo credentials validation
+const demoUsers = {
+    'farmer@demo.com': {
+        password: 'farmer123',
+        redirect: 'farmer_dashboard.html'
+    },
+    'restaurant@demo.com': {
+        password: 'restaurant123',
+        redirect: 'restaurent_dash.html'
+    }
+};
+
+// Farmer login
+farmerForm.addEventListener('submit', function(e) {
+    e.preventDefault();
+    const email = document.getElementById('farmer-email').value.toLowerCase();
+    const password = document.getElementById('farmer-password').value;
+
+    if (demoUsers[email] && demoUsers[email].password === password) {
+        // Successful login
+        window.location.href = 'farmer_dashboard.html';
+    } else {
+        // Show error
+        errorAlert.style.display = 'block';
+    }
+});
+
+// Restaurant login
+restaurantForm.addEventListener('submit', function(e) {
+    e.preventDefault();
+    const email = document.getElementById('rest-email').value.toLowerCase();
+    const password = document.getElementById('rest-password').value;
+
+    if (demoUsers[email] && demoUsers[email].password === password) {
+        // Successful login
+        window.location.href = 'restaurent_dash.html';
+    } else {
+        // Show error
+        errorAlert.style.display = 'block';
+    }
+});
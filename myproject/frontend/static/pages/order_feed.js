@@ -0,0 +1,51 @@
+// Live order updates: patch rows in place as the server reports changes.
+// The page passes the events URL in the script tag's data-events-url and,
+// in data-events-mode, whether it is a Server-Sent Events stream (ASGI) or
+// answers one JSON poll per request (WSGI, every data-poll-seconds).
+(function ({ eventsUrl, eventsMode, pollSeconds }) {
+    function apply(id, html) {
+        const row = document.getElementById(`order-${id}`);
+        if (!html) {
+            if (row) row.remove();
+        } else if (row) {
+            row.outerHTML = html;
+        } else {
+            const empty = document.getElementById('orders-empty');
+            if (empty) empty.remove();
+            document.getElementById('order-rows').insertAdjacentHTML('afterbegin', html);
+        }
+    }
+
+    if (eventsMode === 'stream') {
+        if (!window.EventSource) return;
+        const orderEvents = new EventSource(eventsUrl);
+        orderEvents.addEventListener('order', event => {
+            const { id, html } = JSON.parse(event.data);
+            apply(id, html);
+        });
+        orderEvents.addEventListener('reload', () => window.location.reload());
+        return;
+    }
+
+    const url = new URL(eventsUrl, window.location.href);
+    const interval = (Number(pollSeconds) || 5) * 1000;
+    function poll() {
+        fetch(url, { credentials: 'same-origin', headers: { 'Accept': 'application/json' } })
+            .then(response => (response.ok ? response.json() : null))
+            .then(data => {
+                if (!data) return;
+                if (data.reload) {
+                    window.location.reload();
+                    return;
+                }
+                data.events.forEach(({ id, html }) => apply(id, html));
+                url.searchParams.set('after', data.after);
+            })
+            .catch(() => {})
+            .finally(() => {
+                // The next poll is scheduled once this one is done, so slow responses never overlap
+                setTimeout(poll, interval);
+            });
+    }
+    setTimeout(poll, interval);
+})(document.currentScript.dataset);
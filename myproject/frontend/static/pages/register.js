@@ -0,0 +1,58 @@
+// Simple tab switching for role selection
+const farmerTab = document.getElementById('farmer-tab');
+const restaurantTab = document.getElementById('restaurant-tab');
+const farmerForm = document.getElementById('farmer-form');
+const restaurantForm = document.getElementById('restaurant-form');
+
+farmerTab.addEventListener('click', function() {
+    farmerTab.classList.add('active-farmer');
+    restaurantTab.classList.remove('active-restaurant');
+    farmerForm.style.display = 'block';
+    restaurantForm.style.display = 'none';
+});
+
+restaurantTab.addEventListener('click', function() {
+    restaurantTab.classList.add('active-restaurant');
+    farmerTab.classList.remove('active-farmer');
+    restaurantForm.style.display = 'block';
+    farmerForm.style.display = 'none';
+});
+
+// Check URL parameter for pre-selected role
+const urlParams = new URLSearchParams(window.location.search);
+const role = urlParams.get('role');
+if (role === 'restaurant') {
+    restaurantTab.click();
+}
+
+// Warn early when the email is already registered (URL from data-check-email-url)
+const checkEmailUrl = document.currentScript.dataset.checkEmailUrl;
+const farmerEmail = document.getElementById('farmer-email');
+const restEmail = document.getElementById('rest-email');
+const alertBox = document.getElementById('already-registered');
+let checkTimer = null;
+
+function checkEmail(email) {
+    email = email.trim();
+    if (!/^[^@\s]+@[^@\s]+\.[^@\s]+$/.test(email)) {
+        alertBox.style.display = 'none';
+        return;
+    }
+    fetch(`${checkEmailUrl}?email=${encodeURIComponent(email)}`)
+        .then(response => response.ok ? response.json() : { exists: false })
+        .then(data => {
+            alertBox.style.display = data.exists ? 'block' : 'none';
+        })
+        .catch(() => {});
+}
+
+[farmerEmail, restEmail].forEach(input => {
+    input.addEventListener('input', function() {
+        clearTimeout(checkTimer);
+        checkTimer = setTimeout(() => checkEmail(this.value), 400);
+    });
+    input.addEventListener('blur', function() {
+        clearTimeout(checkTimer);
+        checkEmail(this.value);
+    });
+});
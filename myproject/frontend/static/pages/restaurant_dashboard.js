@@ -0,0 +1,84 @@
+// The page passes its URLs in the script tag's data attributes
+const catalogUrl = document.currentScript.dataset.catalogUrl;
+let currentPrice = 0;
+
+function openModal(produceId, produceName, maxQty, price) {
+    document.getElementById('requestModal').style.display = 'block';
+    document.getElementById('modal-produce-info').textContent = `${produceName} - ₹${price}/kg (Max: ${maxQty} kg)`;
+    document.getElementById('request-form').action = `/restaurant/request/${produceId}/`;
+    document.getElementById('request-quantity').max = maxQty;
+    currentPrice = price;
+    updateTotal();
+}
+
+function closeModal() {
+    document.getElementById('requestModal').style.display = 'none';
+}
+
+function updateTotal() {
+    const qty = document.getElementById('request-quantity').value || 0;
+    const total = (qty * currentPrice).toFixed(2);
+    document.getElementById('modal-total').textContent = `Total: ₹${total}`;
+}
+
+document.getElementById('request-quantity').addEventListener('input', updateTotal);
+
+// Close modal when clicking outside
+window.onclick = function(event) {
+    if (event.target == document.getElementById('requestModal')) {
+        closeModal();
+    }
+    if (event.target == document.getElementById('logoutModal')) {
+        closeLogoutModal();
+    }
+}
+
+// Catalog pagination: append the next keyset page of rows
+function loadMoreProduce() {
+    const button = document.getElementById('catalog-more');
+    const params = new URLSearchParams(button.dataset.query);
+    params.set('cursor', button.dataset.next);
+    button.disabled = true;
+
+    fetch(`${catalogUrl}?${params}`, { credentials: 'same-origin' })
+        .then(response => {
+            if (!response.ok) throw new Error(response.statusText);
+            const next = response.headers.get('X-Next-Cursor');
+            return response.text().then(html => ({ html, next }));
+        })
+        .then(({ html, next }) => {
+            document.getElementById('catalog-rows').insertAdjacentHTML('beforeend', html);
+            if (next) {
+                button.dataset.next = next;
+                button.disabled = false;
+            } else {
+                button.parentElement.remove();
+            }
+        })
+        .catch(() => { button.disabled = false; });
+}
+
+// Logout modal functions
+function showLogoutModal() {
+    document.getElementById('logoutModal').style.display = 'block';
+}
+
+function closeLogoutModal() {
+    document.getElementById('logoutModal').style.display = 'none';
+}
+
+function toggleProfileDropdown(event) {
+    event.preventDefault();
+    const dropdown = document.getElementById('profileDropdown');
+    dropdown.classList.toggle('show');
+}
+
+// Close dropdown when clicking outside
+document.addEventListener('click', function(event) {
+    if (!event.target.closest('.profile-menu')) {
+        const dropdown = document.getElementById('profileDropdown');
+        if (dropdown && dropdown.classList.contains('show')) {
+            dropdown.classList.remove('show');
+        }
+    }
+});